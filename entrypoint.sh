@@ -1,20 +1,22 @@
 #!/bin/bash
 cd inventro
 
-echo "Running makemigrations..."
-python manage.py makemigrations --noinput
-
 if [[ $DEBUG == "0" ]]; then
-    echo "Running makemigrations..."
-    python manage.py collectstatic
+    echo "Collecting static files..."
+    python manage.py collectstatic --noinput
 fi
 
+# Migrations belong to the release, not to every pod start: the Kubernetes
+# deployment runs them once in the inventro-migrate Job and sets
+# RUN_MIGRATIONS=0 here, so scaled-up pods only boot the app.
+if [[ $RUN_MIGRATIONS != "0" ]]; then
+    echo "Running migrate..."
+    python manage.py migrate --noinput
+    python manage.py createcachetable
 
-echo "Running migrate..."
-python manage.py migrate --noinput
-
-echo "Creating Superuser..."
-python manage.py createsuperuser --noinput 
+    echo "Creating Superuser..."
+    python manage.py createsuperuser --noinput
+fi
 
 
 if [[ $DEBUG != "0" && $POPULATE_DATABASE != "0" ]]; then
@@ -27,8 +29,9 @@ fi
 
 if [[ $DEBUG == "0" ]]; then
     echo "Starting Gunicorn..."
-    exec gunicorn inventro.wsgi:application --bind 0.0.0.0:8000 --workers 3
+    # Workers warm up before taking requests; GUNICORN_PRELOAD=1 shares the app copy-on-write
+    exec gunicorn -c gunicorn.conf.py inventro.wsgi:application
 else 
     echo "Starting Django development server..."
     exec python manage.py runserver 0.0.0.0:8000
-fi
\ No newline at end of file
+fi
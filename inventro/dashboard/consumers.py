@@ -1,5 +1,14 @@
+import asyncio
 import json
+from collections import Counter, defaultdict
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+
+from inventory import live
+from inventory.models import ItemCategory
 
 
 class LowStockConsumer(AsyncWebsocketConsumer):
@@ -26,3 +35,195 @@ class LowStockConsumer(AsyncWebsocketConsumer):
                 }
             )
         )
+
+
+
+class ItemDeltaHub:
+    """
+    The item deltas of one process: a single channel layer channel joins the
+    ``inventory.live`` groups its consumers follow and hands each delta only
+    to the consumers that show the item - every one following the whole
+    group, and through an index by item id those following the ids on screen.
+    """
+
+    CHANNEL_PREFIX = "items-hub."
+
+    def __init__(self):
+        self.loop = None
+        self.channel = None
+        self.whole = defaultdict(set)  # group -> consumers following all of it
+        self.by_id = defaultdict(lambda: defaultdict(set))  # group -> item id -> consumers
+        self.members = Counter()  # group -> consumers following it in any way
+
+    async def _start(self, layer):
+        loop = asyncio.get_running_loop()
+        if self.loop is loop:
+            return
+        self.__init__()
+        self.loop = loop
+        self.channel = await layer.new_channel(self.CHANNEL_PREFIX)
+        self.task = loop.create_task(self._receive(layer, self.channel))
+
+    async def _receive(self, layer, channel):
+        while True:
+            message = await layer.receive(channel)
+            group = message.get("group")
+            for consumer in self.whole.get(group, ()):
+                consumer.offer(message["items"])
+            index = self.by_id.get(group)
+            if index:
+                for delta in message["items"]:
+                    for consumer in index.get(delta[0], ()):
+                        consumer.offer((delta,))
+
+    async def follow(self, consumer, layer, group, ids):
+        await self._start(layer)
+        if ids is None:
+            self.whole[group].add(consumer)
+        else:
+            for pk in ids:
+                self.by_id[group][pk].add(consumer)
+        self.members[group] += 1
+        if self.members[group] == 1:
+            await layer.group_add(group, self.channel)
+
+    async def unfollow(self, consumer, layer, group, ids):
+        if self.loop is not asyncio.get_running_loop() or not self.members[group]:
+            return
+        if ids is None:
+            self.whole[group].discard(consumer)
+        else:
+            index = self.by_id[group]
+            for pk in ids:
+                index[pk].discard(consumer)
+                if not index[pk]:
+                    del index[pk]
+        self.members[group] -= 1
+        if not self.members[group]:
+            del self.members[group]
+            await layer.group_discard(group, self.channel)
+
+
+hub = ItemDeltaHub()
+
+
+class ItemDeltaConsumer(AsyncWebsocketConsumer):
+    """
+    Live stock of the rows an inventory table shows (``ws/items/``).
+
+    The client says what it shows in the query string (``?category=<name>&ids=1,2``)
+    and again with ``{"subscribe": {"category": ..., "ids": [...]}}`` whenever
+    that changes: a category, the item ids on screen, both, or neither for
+    every item. Deltas reach it through the process's ``ItemDeltaHub``.
+
+    Deltas are coalesced per item and sent as frames
+    ``{"seq": n, "items": [[id, in_stock, reserved, status], ...]}``, at most
+    one every ``INVENTRO_LIVE_FRAME_MS``. The client acknowledges each frame
+    with ``{"ack": n}``; while ``MAX_UNACKED`` frames are unacknowledged
+    nothing more is sent and changes keep coalescing. At most
+    ``INVENTRO_LIVE_MAX_PENDING`` items wait; beyond that the oldest are
+    dropped and the next frame carries ``"dropped": n`` so the client reloads.
+    """
+
+    MAX_UNACKED = 2
+    MAX_IDS = 1000
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if not user or not user.is_authenticated:
+            await self.close()
+            return
+        self.group = None
+        self.ids = None
+        self.pending = {}  # item id -> latest delta, oldest first
+        self.dropped = 0
+        self.seq = self.acked = 0
+        self.last_frame = 0.0
+        self.timer = None
+        self.flushing = None
+        self.interval = getattr(settings, "INVENTRO_LIVE_FRAME_MS", 250) / 1000
+        self.max_pending = getattr(settings, "INVENTRO_LIVE_MAX_PENDING", 500)
+
+        query = parse_qs(self.scope.get("query_string", b"").decode(), keep_blank_values=True)
+        ids = None
+        if "ids" in query:
+            ids = [part for value in query["ids"] for part in value.split(",") if part]
+        await self.subscribe(query.get("category", [None])[0], ids)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if getattr(self, "timer", None) is not None:
+            self.timer.cancel()
+        if getattr(self, "group", None) is not None:
+            await hub.unfollow(self, self.channel_layer, self.group, self.ids)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            data = json.loads(text_data or bytes_data or b"{}")
+        except ValueError:
+            return
+        if not isinstance(data, dict):
+            return
+        if isinstance(data.get("subscribe"), dict):
+            await self.subscribe(data["subscribe"].get("category"), data["subscribe"].get("ids"))
+        if isinstance(data.get("ack"), int):
+            self.acked = min(max(self.acked, data["ack"]), self.seq)
+            self.schedule()
+
+    async def subscribe(self, category, ids):
+        group = live.ALL_GROUP
+        if category:
+            category_id = await database_sync_to_async(
+                ItemCategory.objects.filter(name__iexact=category).values_list("pk", flat=True).first
+            )()
+            # An unknown category has no items to follow
+            group = live.category_group(category_id) if category_id is not None else None
+        if ids is not None:
+            try:
+                ids = {int(pk) for pk in ids[:self.MAX_IDS]}
+            except (TypeError, ValueError):
+                ids = set()
+
+        if self.group is not None:
+            await hub.unfollow(self, self.channel_layer, self.group, self.ids)
+        self.group, self.ids = group, ids
+        if group is not None:
+            await hub.follow(self, self.channel_layer, group, ids)
+        if ids is not None:
+            self.pending = {pk: delta for pk, delta in self.pending.items() if pk in ids}
+
+    def offer(self, deltas):
+        """Take deltas from the hub; runs on the event loop, between sends."""
+        pending = self.pending
+        for delta in deltas:
+            # Re-insert so the dict stays ordered oldest change first
+            pending.pop(delta[0], None)
+            pending[delta[0]] = delta
+        while len(pending) > self.max_pending:
+            del pending[next(iter(pending))]
+            self.dropped += 1
+        self.schedule()
+
+    def schedule(self):
+        """Set a timer for the next frame, as soon as the rate limit allows one."""
+        if not self.pending or self.timer is not None or self.seq - self.acked >= self.MAX_UNACKED:
+            return
+        loop = asyncio.get_running_loop()
+        self.timer = loop.call_later(max(self.last_frame + self.interval - loop.time(), 0), self.on_timer)
+
+    def on_timer(self):
+        self.timer = None
+        # Keep a reference so the task is not collected mid-send
+        self.flushing = asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        if not self.pending or self.seq - self.acked >= self.MAX_UNACKED:
+            return
+        self.seq += 1
+        frame = {"seq": self.seq, "items": list(self.pending.values())}
+        if self.dropped:
+            frame["dropped"] = self.dropped
+        self.pending = {}
+        self.dropped = 0
+        self.last_frame = asyncio.get_running_loop().time()
+        await self.send(text_data=json.dumps(frame, separators=(",", ":")))
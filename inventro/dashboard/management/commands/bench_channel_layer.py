@@ -0,0 +1,121 @@
+import asyncio
+import multiprocessing
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from inventro.channel_layer import PostgresChannelLayer
+
+GROUP = "bench_fanout"
+
+
+def _consumer(index, options, ready, results):
+    """One consumer process: ``--channels`` channels in the group, each counting what it receives."""
+
+    async def main():
+        layer = PostgresChannelLayer(capacity=options["capacity"])
+        channels = [await layer.new_channel() for _ in range(options["channels"])]
+        for channel in channels:
+            await layer.group_add(GROUP, channel)
+        ready.put(index)
+
+        latencies, counts, last = [], [], 0.0
+
+        async def drain(channel):
+            nonlocal last
+            received = 0
+            while True:
+                message = await layer.receive(channel)
+                if message["type"] == "bench.done":
+                    counts.append(received)
+                    return
+                now = time.time()
+                received += 1
+                last = max(last, now)
+                if received % 10 == 0:
+                    latencies.append((now - message["sent"]) * 1000)
+
+        await asyncio.gather(*(drain(channel) for channel in channels))
+        layer.close()
+        results.put({"received": sum(counts), "dropped": layer.dropped, "latencies": latencies, "last": last})
+
+    asyncio.run(main())
+
+
+class Command(BaseCommand):
+    help = (
+        "Fan-out throughput of inventro.channel_layer.PostgresChannelLayer: --processes local "
+        "consumer processes with --channels channels each join one group, and --messages "
+        "group_sends are delivered to all of them. Needs the Postgres database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=4)
+        parser.add_argument("--channels", type=int, default=50, help="Channels per consumer process.")
+        parser.add_argument("--messages", type=int, default=2000)
+        parser.add_argument("--size", type=int, default=200, help="Bytes of payload per message.")
+        parser.add_argument("--concurrency", type=int, default=50, help="group_sends in flight at once.")
+        parser.add_argument("--capacity", type=int, default=100_000, help="Buffer per consumer channel.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("The Postgres channel layer needs the Postgres database.")
+
+        context = multiprocessing.get_context("fork")
+        ready, results = context.Queue(), context.Queue()
+        consumers = [
+            context.Process(target=_consumer, args=(index, options, ready, results), daemon=True)
+            for index in range(options["processes"])
+        ]
+        for process in consumers:
+            process.start()
+        for _ in consumers:
+            ready.get(timeout=60)
+
+        sent_at = asyncio.run(self._produce(options))
+
+        reports = [results.get(timeout=120) for _ in consumers]
+        for process in consumers:
+            process.join(timeout=10)
+
+        expected = options["messages"] * options["processes"] * options["channels"]
+        received = sum(report["received"] for report in reports)
+        dropped = sum(report["dropped"] for report in reports)
+        latencies = sorted(latency for report in reports for latency in report["latencies"])
+        elapsed = max(report["last"] for report in reports) - sent_at[0]
+        send_elapsed = sent_at[1] - sent_at[0]
+
+        self.stdout.write(
+            f"{options['processes']} processes x {options['channels']} channels, "
+            f"{options['messages']:,} group_sends of {options['size']} bytes"
+        )
+        self.stdout.write(
+            f"  sent      {options['messages'] / send_elapsed:,.0f} group_sends/s ({send_elapsed * 1000:.0f} ms)"
+        )
+        self.stdout.write(
+            f"  delivered {received:,}/{expected:,} ({dropped:,} dropped), "
+            f"{received / elapsed:,.0f} messages/s"
+        )
+        if latencies:
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(
+                f"  latency   p50 {statistics.median(latencies):.1f} ms, p99 {p99:.1f} ms"
+            )
+
+    async def _produce(self, options):
+        layer = PostgresChannelLayer()
+        blob = "x" * options["size"]
+        semaphore = asyncio.Semaphore(options["concurrency"])
+
+        async def send(number):
+            async with semaphore:
+                await layer.group_send(GROUP, {"type": "bench.message", "n": number, "sent": time.time(), "blob": blob})
+
+        start = time.time()
+        await asyncio.gather(*(send(number) for number in range(options["messages"])))
+        finished = time.time()
+        await layer.group_send(GROUP, {"type": "bench.done"})
+        layer.close()
+        return start, finished
@@ -0,0 +1,237 @@
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from importlib import import_module
+from urllib.parse import urlencode
+
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import live
+from inventory.models import ItemCategory
+
+IDS_PER_SCREEN = 50
+
+
+def _proc(pid):
+    """Resident memory (MB) and CPU seconds used so far by a process."""
+    with open(f"/proc/{pid}/status") as status:
+        rss = next(int(line.split()[1]) for line in status if line.startswith("VmRSS:")) / 1024
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    return rss, (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+class Command(BaseCommand):
+    help = (
+        "Live item deltas (ws/items/) under load: starts one daphne worker, opens "
+        "--connections websockets to it (by category or by the ids on screen, some of "
+        "them never reading) and publishes --rate item changes per second through "
+        "the channel layer. Needs CHANNEL_LAYER=postgres."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=2000)
+        parser.add_argument("--items", type=int, default=5000, help="Distinct item ids that change.")
+        parser.add_argument("--categories", type=int, default=20, help="Existing categories to spread changes over.")
+        parser.add_argument("--rate", type=int, default=1000, help="Item changes published per second.")
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument("--by-ids", type=float, default=0.5, help="Share of clients following ids on screen.")
+        parser.add_argument("--slow", type=float, default=0.05, help="Share of clients that stop reading.")
+        parser.add_argument("--frame-ms", type=int, default=250)
+        parser.add_argument("--port", type=int, default=8765)
+
+    def handle(self, *args, **options):
+        if isinstance(get_channel_layer(), InMemoryChannelLayer):
+            raise CommandError("The daphne worker needs a shared channel layer: set CHANNEL_LAYER=postgres.")
+        user = get_user_model().objects.filter(is_active=True).order_by("pk").first()
+        if user is None:
+            raise CommandError("Needs a user to open authenticated websockets as.")
+        # Clients follow categories by name, like the table's filter
+        categories = list(ItemCategory.objects.order_by("pk").values_list("pk", "name")[:options["categories"]])
+        if not categories:
+            raise CommandError("Needs at least one item category.")
+
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+
+        server = subprocess.Popen(
+            [sys.executable, "-m", "daphne", "-b", "127.0.0.1", "-p", str(options["port"]), "inventro.asgi:application"],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "INVENTRO_LIVE_FRAME_MS": str(options["frame_ms"])},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            self._wait_for_port(options["port"], server)
+            cookie = f"{settings.SESSION_COOKIE_NAME}={session.session_key}"
+            asyncio.run(self._run(options, categories, server.pid, cookie))
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+            session.delete()
+
+    def _wait_for_port(self, port, server):
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            if server.poll() is not None:
+                raise CommandError("daphne exited on startup.")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError("daphne did not start listening.")
+
+    async def _run(self, options, categories, pid, cookie):
+        from autobahn.asyncio.websocket import WebSocketClientFactory, WebSocketClientProtocol
+
+        sent_at = {}
+
+        class Client(WebSocketClientProtocol):
+            slow = False
+
+            def onOpen(self):
+                self.frames = self.items = self.dropped = 0
+                self.stalled_frames = 0
+                self.last = None
+                self.gaps, self.latencies = [], []
+                self.opened.set_result(None)
+
+            def onMessage(self, payload, is_binary):
+                now = time.time()
+                frame = json.loads(payload)
+                self.frames += 1
+                self.items += len(frame["items"])
+                self.dropped += frame.get("dropped", 0)
+                if self.last is not None:
+                    self.gaps.append(now - self.last)
+                self.last = now
+                if self.frames % 5 == 0:
+                    self.latencies.extend(now - sent_at[seq] for _, seq, _, _ in frame["items"][:3] if seq in sent_at)
+                if self.slow:
+                    # Stop reading: the socket and the server's pending deltas fill up
+                    self.stalled_frames += 1
+                    self.transport.pause_reading()
+                else:
+                    self.sendMessage(json.dumps({"ack": frame["seq"]}).encode())
+
+        loop = asyncio.get_running_loop()
+        port = options["port"]
+        clients = []
+        rss_start, _ = _proc(pid)
+
+        opening = asyncio.Semaphore(100)
+
+        async def open_client(index):
+            rng = random.Random(index)
+            if rng.random() < options["by_ids"]:
+                follow = {"ids": sorted(rng.sample(range(1, options["items"] + 1), IDS_PER_SCREEN))}
+                query = {"ids": ",".join(map(str, follow["ids"]))}
+            else:
+                follow = {"category": rng.randrange(len(categories))}
+                query = {"category": categories[follow["category"]][1]}
+            url = f"ws://127.0.0.1:{port}/ws/items/?{urlencode(query)}"
+            factory = WebSocketClientFactory(url, headers={"Cookie": cookie})
+            factory.protocol = Client
+            client = factory()
+            client.follow = follow
+            client.slow = client.stalls = rng.random() < options["slow"]
+            client.opened = loop.create_future()
+            async with opening:
+                await loop.create_connection(lambda: client, "127.0.0.1", port)
+                await asyncio.wait_for(client.opened, 30)
+            clients.append(client)
+
+        start = time.time()
+        await asyncio.gather(*(open_client(index) for index in range(options["connections"])))
+        connect_elapsed = time.time() - start
+        rss_open, cpu_start = _proc(pid)
+        _, own_cpu_start = _proc(os.getpid())
+
+        # Publish --rate changes per second in 10 ms ticks
+        per_cat, per_id = Counter(), Counter()
+        seq = 0
+        tick = 0.01
+        batch = max(1, round(options["rate"] * tick))
+        start = time.time()
+        while time.time() - start < options["duration"]:
+            rows = []
+            now = time.time()
+            for _ in range(batch):
+                seq += 1
+                pk = random.randint(1, options["items"])
+                sent_at[seq] = now
+                per_cat[pk % len(categories)] += 1
+                per_id[pk] += 1
+                rows.append((pk, seq, 0, live.STATUS_IN, categories[pk % len(categories)][0]))
+            await live.apublish(rows)
+            await asyncio.sleep(max(0.0, start + (seq / batch) * tick - time.time()))
+        publish_elapsed = time.time() - start
+        await asyncio.sleep(options["frame_ms"] / 1000 * 2 + 1)
+        rss_end, cpu_end = _proc(pid)
+        _, own_cpu_end = _proc(os.getpid())
+
+        # Let the stalled clients catch up: their first frame after that reports the drops
+        for client in clients:
+            if client.slow:
+                client.slow = False
+                client.transport.resume_reading()
+                client.sendMessage(json.dumps({"ack": 1 << 30}).encode())
+        await asyncio.sleep(options["frame_ms"] / 1000 * 2 + 1)
+        for client in clients:
+            client.dropConnection(abort=True)
+
+        fast = [client for client in clients if not client.stalls]
+        slow = [client for client in clients if client.stalls]
+        expected = sum(
+            per_cat[client.follow["category"]] if "category" in client.follow
+            else sum(per_id[pk] for pk in client.follow["ids"])
+            for client in fast
+        )
+        frames = sum(client.frames for client in fast)
+        items = sum(client.items for client in fast)
+        gaps = [gap for client in fast for gap in client.gaps]
+        latencies = sorted(latency * 1000 for client in fast for latency in client.latencies)
+
+        self.stdout.write(
+            f"{len(clients):,} connections to one daphne worker in {connect_elapsed:.1f} s "
+            f"({len(slow)} stopped reading); RSS {rss_start:.0f} -> {rss_open:.0f} MB "
+            f"({(rss_open - rss_start) * 1024 / len(clients):.0f} KB per connection)"
+        )
+        self.stdout.write(
+            f"  published {seq:,} changes ({seq / publish_elapsed:,.0f}/s) over {options['items']:,} items"
+        )
+        self.stdout.write(
+            f"  reading clients: {frames:,} frames, {items:,} deltas for {expected:,} matching changes "
+            f"({items / max(expected, 1):.0%} after coalescing), "
+            f"{frames / len(fast) / publish_elapsed:.1f} frames/s per client"
+        )
+        if gaps:
+            self.stdout.write(
+                f"  frame gap as received min {min(gaps) * 1000:.0f} ms, median "
+                f"{statistics.median(gaps) * 1000:.0f} ms (limit {options['frame_ms']} ms); "
+                f"latency p50 {statistics.median(latencies):.0f} ms, "
+                f"p99 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]:.0f} ms"
+            )
+        self.stdout.write(
+            f"  daphne CPU {(cpu_end - cpu_start) / publish_elapsed:.0%} of a core, RSS at end {rss_end:.0f} MB "
+            f"(clients and producer: {(own_cpu_end - own_cpu_start) / publish_elapsed:.0%})"
+        )
+        if slow:
+            self.stdout.write(
+                f"  stalled clients: at most {max(client.stalled_frames for client in slow)} frames while stalled, "
+                f"{sum(client.dropped for client in slow):,} deltas dropped (reported on catch-up)"
+            )
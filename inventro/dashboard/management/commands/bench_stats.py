@@ -0,0 +1,79 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from dashboard.stats import inventory_stats
+from inventory.models import Item, ItemCategory
+
+
+def legacy_stats():
+    """What dashboard_stats did before: five COUNTs and a Python loop for the value."""
+    active_items = Item.objects.filter(is_active=True)
+    total_value = Decimal("0")
+    for item in active_items:
+        total_value += Decimal(str(item.in_stock or 0)) * Decimal(str(item.cost or 0))
+    return {
+        "total_items": active_items.count(),
+        "low_stock": active_items.filter(Q(in_stock__lte=F("low_stock_bar")) & Q(in_stock__gt=0)).count(),
+        "out_of_stock": active_items.filter(in_stock__lte=0).count(),
+        "inventory_value": total_value,
+        "new_items_7d": Item.objects.filter(created_at__gte=timezone.now() - timedelta(days=7)).count(),
+        "categories": ItemCategory.objects.count(),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the dashboard KPI aggregate (dashboard.stats.inventory_stats) with the "
+        "item table topped up to --items rows. Seeded rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=1_000_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--legacy", action="store_true", help="Also time the old per-item loop once.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options["items"] - Item.objects.count())
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE inventory_item")
+
+            timings = []
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                stats = inventory_stats()
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                f"{Item.objects.count():,} items ({connection.vendor}): inventory_stats "
+                f"median {statistics.median(timings):.1f} ms, 1 query"
+            )
+            self.stdout.write(f"  {stats}")
+
+            if options["legacy"]:
+                start = time.perf_counter()
+                legacy_stats()
+                self.stdout.write(f"  legacy loop: {(time.perf_counter() - start) * 1000:.1f} ms")
+            transaction.set_rollback(True)
+
+    def _seed(self, count, batch_size=10_000):
+        if count <= 0:
+            return
+        rng = random.Random(7)
+        category, _ = ItemCategory.objects.get_or_create(name="Benchmark")
+        now = timezone.now()
+        for offset in range(0, count, batch_size):
+            Item.objects.bulk_create([
+                Item(name=f"Stats bench {i}", sku=f"ST-{i:07d}", in_stock=rng.randint(0, 50), total_amount=50,
+                     low_stock_bar=10, cost=rng.randint(1, 2000), category=category,
+                     is_active=rng.random() > 0.05, created_at=now - timedelta(days=rng.randint(0, 60)))
+                for i in range(offset, min(offset + batch_size, count))
+            ])
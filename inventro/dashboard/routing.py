@@ -4,4 +4,5 @@ from . import consumers
 
 websocket_urlpatterns = [
     re_path(r"^ws/low-stock/$", consumers.LowStockConsumer.as_asgi()),
+    re_path(r"^ws/items/$", consumers.ItemDeltaConsumer.as_asgi()),
 ]
@@ -0,0 +1,103 @@
+"""
+One dashboard snapshot per page view.
+
+Everything the dashboard shows — the KPIs, the chart series, the per-category
+cost summary, the category totals and the first page of recent activity — is
+computed together by ``build_snapshot`` and shared by every consumer: the
+dashboard and analytics pages, ``/api/dashboard/`` (the whole bundle) and the
+older ``/api/stats/`` and ``/api/metrics/`` endpoints.
+
+``get_snapshot(request)`` computes it at most once per request and keeps it in
+the shared cache under the catalog version (``inventory.versioning``), so
+every worker and pod reuses one aggregation pass until items or categories
+change. ``INVENTRO_DASHBOARD_SNAPSHOT_TTL`` (default 300 seconds; 0 turns
+the shared copy off) bounds how stale the time-based figures (new items in
+the last seven days) can get.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from inventory.models import StockMovement
+from inventory.pagination import keyset_paginate
+from inventory.versioning import catalog_version
+
+from .stats import category_counts, cost_distribution, inventory_stats, metrics_series
+
+SNAPSHOT_TTL = getattr(settings, "INVENTRO_DASHBOARD_SNAPSHOT_TTL", 300)
+SNAPSHOT_KEY = "inventro:dashboard:snapshot:{version}"
+ACTIVITY_LIMIT = 10
+
+
+def _activity_summary(movement):
+    before = movement.in_stock_after - movement.delta
+    if movement.reason == StockMovement.REASON_CREATED:
+        return 'New item added'
+    if movement.reason == StockMovement.REASON_DELETED:
+        return 'Removed from inventory'
+    if movement.reason == StockMovement.REASON_CHECKOUT:
+        return f'Checked out {-movement.delta} (stock {before} to {movement.in_stock_after})'
+    if movement.reason == StockMovement.REASON_RETURN:
+        return f'Returned {movement.delta} (stock {before} to {movement.in_stock_after})'
+    return f'Quantity updated from {before} to {movement.in_stock_after}'
+
+
+def activity_page(limit=ACTIVITY_LIMIT, cursor=''):
+    """
+    ``{"results": [...], "next": cursor}``: stock movements, newest first,
+    read from the ``StockMovement`` ledger with one query on its
+    ``(created_at, id)`` index.
+    """
+    page = keyset_paginate(
+        StockMovement.objects.select_related('actor'),
+        limit,
+        cursor,
+        keys=('-created_at', '-id'),
+    )
+
+    results = []
+    for movement in page:
+        actor = movement.actor
+        results.append({
+            'id': movement.item_id,
+            'name': movement.item_name,
+            'action': movement.reason if movement.reason in (
+                StockMovement.REASON_CREATED, StockMovement.REASON_DELETED
+            ) else 'updated',
+            'reason': movement.reason,
+            'source': movement.source,
+            'delta': movement.delta,
+            'summary': _activity_summary(movement),
+            'user': (actor.get_full_name() or actor.username) if actor else None,
+            'timestamp': movement.created_at.isoformat(),
+        })
+    return {'results': results, 'next': page.next_cursor}
+
+
+def build_snapshot() -> dict:
+    """Compute the full dashboard snapshot (see the module docstring)."""
+    return {
+        'stats': inventory_stats(),
+        'series': metrics_series(),
+        'cost_distribution': cost_distribution(),
+        'categories': category_counts(),
+        'activity': activity_page(),
+        'generated_at': timezone.now().isoformat(),
+    }
+
+
+def get_snapshot(request=None) -> dict:
+    """The dashboard snapshot for ``request``: memoized on it, then the shared cache."""
+    snapshot = getattr(request, '_dashboard_snapshot', None)
+    if snapshot is not None:
+        return snapshot
+    key = SNAPSHOT_KEY.format(version=catalog_version())
+    if SNAPSHOT_TTL:
+        snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_snapshot()
+        if SNAPSHOT_TTL:
+            cache.set(key, snapshot, SNAPSHOT_TTL)
+    if request is not None:
+        request._dashboard_snapshot = snapshot
+    return snapshot
@@ -0,0 +1,82 @@
+/**
+ * Live stock for the inventory table: follows ws/items/ and patches the rows
+ * on screen in place (see dashboard.consumers.ItemDeltaConsumer).
+ */
+(function (window, document) {
+  const STATUS = {
+    in: ["chip-success", "In Stock"],
+    low: ["chip-warning", "Low Stock"],
+    out: ["chip-danger", "Out of Stock"],
+  };
+  let socket = null;
+  let retry = 1000;
+
+  function tbody() {
+    return document.getElementById("inventory-tbody");
+  }
+
+  function subscription() {
+    const body = tbody();
+    const category = document.querySelector("#inventory-filters [name='category']");
+    const ids = body
+      ? Array.from(body.querySelectorAll("tr[data-item-id]"), (row) => Number(row.dataset.itemId))
+      : [];
+    return { category: category ? category.value || null : null, ids };
+  }
+
+  function subscribe() {
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      socket.send(JSON.stringify({ subscribe: subscription() }));
+    }
+  }
+
+  function patch(items) {
+    const body = tbody();
+    if (!body) return;
+    for (const [id, inStock, reserved, status] of items) {
+      const row = body.querySelector(`tr[data-item-id="${id}"]`);
+      if (!row) continue;
+      if (status === "gone") {
+        row.remove();
+        continue;
+      }
+      const available = row.querySelector("[data-live='available']");
+      if (available) available.textContent = Math.max(inStock - reserved, 0);
+      const cell = row.querySelector("[data-live='status']");
+      const [chip, label] = STATUS[status] || STATUS.in;
+      if (cell) cell.innerHTML = `<span class="chip ${chip}">${label}</span>`;
+    }
+  }
+
+  function connect() {
+    if (!tbody()) return;
+    const scheme = window.location.protocol === "https:" ? "wss" : "ws";
+    const { category, ids } = subscription();
+    const query = new URLSearchParams({ ids: ids.join(",") });
+    if (category) query.set("category", category);
+    socket = new WebSocket(`${scheme}://${window.location.host}/ws/items/?${query}`);
+
+    socket.addEventListener("open", () => {
+      retry = 1000;
+    });
+    socket.addEventListener("message", (event) => {
+      const frame = JSON.parse(event.data);
+      if (frame.dropped && window.htmx && document.getElementById("inventory-filters")) {
+        // Changes were lost while we lagged behind: reload the table instead
+        window.htmx.trigger("#inventory-filters", "submit");
+      } else {
+        patch(frame.items || []);
+      }
+      socket.send(JSON.stringify({ ack: frame.seq }));
+    });
+    socket.addEventListener("close", () => {
+      socket = null;
+      setTimeout(connect, retry);
+      retry = Math.min(retry * 2, 30000);
+    });
+  }
+
+  // Infinite scroll and the filters swap rows in: follow what is on screen now
+  document.addEventListener("htmx:afterSettle", subscribe);
+  document.addEventListener("DOMContentLoaded", connect);
+})(window, document);
@@ -0,0 +1,222 @@
+"""
+Dashboard KPIs, computed in one ``aggregate()`` over the active items.
+
+``dashboard_stats`` (``/api/stats/``), the dashboard page and the analytics
+page all read from ``inventory_stats`` so they agree on every number:
+
+* ``total_items`` – active items
+* ``low_stock`` – in stock, but at or below the item's ``low_stock_bar``
+* ``out_of_stock`` – ``in_stock`` at or below zero
+* ``inventory_value`` – sum of ``cost * in_stock``
+* ``total_quantity`` – sum of ``in_stock``
+* ``new_items_7d`` – created in the last seven days
+* ``categories`` – distinct categories among the active items
+
+``metrics_series`` and ``cost_distribution`` feed the dashboard charts with
+``GROUP BY`` queries, so their cost and size follow the number of days and
+categories, not the number of items. Per-category totals come straight from
+the ``CategoryRollup`` table (see ``inventory.rollups``), one row per category,
+and the trend charts from the daily snapshots (see ``inventory.history``).
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import (
+    Avg, Case, Count, DecimalField, F, FloatField, IntegerField, Max, Min, Q, Sum, Value, When, Window,
+)
+from django.db.models.functions import Cast, Coalesce, Floor, Least, RowNumber, TruncDate
+from django.utils import timezone
+
+from inventory.models import CategoryDailySnapshot, Item, ItemCategory
+
+HISTORY_DAYS = getattr(settings, "INVENTRO_HISTORY_DAYS", 365)
+
+
+def inventory_stats(queryset=None) -> dict:
+    if queryset is None:
+        queryset = Item.objects.filter(is_active=True)
+    seven_days_ago = timezone.now() - timedelta(days=7)
+    stats = queryset.order_by().aggregate(
+        total_items=Count("pk"),
+        low_stock=Count("pk", filter=Q(in_stock__gt=0, in_stock__lte=F("low_stock_bar"))),
+        out_of_stock=Count("pk", filter=Q(in_stock__lte=0)),
+        inventory_value=Sum(
+            F("cost") * F("in_stock"), output_field=DecimalField(max_digits=20, decimal_places=2)
+        ),
+        total_quantity=Sum("in_stock"),
+        new_items_7d=Count("pk", filter=Q(created_at__gte=seven_days_ago)),
+        categories=Count("category", distinct=True),
+    )
+    stats["inventory_value"] = stats["inventory_value"] or Decimal("0")
+    stats["total_quantity"] = stats["total_quantity"] or 0
+    return stats
+
+
+def category_counts() -> list:
+    """
+    ``[{"name", "total", "units_in_stock", "value", "low_stock", "out_of_stock"}]``
+    over the active items of every category, read from the rollup table.
+    """
+    return list(
+        ItemCategory.objects.annotate(
+            total=Coalesce("rollup__item_count", 0),
+            units_in_stock=Coalesce("rollup__units_in_stock", 0),
+            value=Coalesce("rollup__value", Value(Decimal("0")), output_field=DecimalField(max_digits=20, decimal_places=2)),
+            low_stock=Coalesce("rollup__low_stock_count", 0),
+            out_of_stock=Coalesce("rollup__out_of_stock_count", 0),
+        )
+        .order_by("name")
+        .values("name", "total", "units_in_stock", "value", "low_stock", "out_of_stock")
+    )
+
+
+def history_series(days=HISTORY_DAYS) -> list:
+    """
+    ``[{date, count, value}]``: active items and stock value per day over the
+    last ``days`` days, summed from the daily category snapshots.
+    """
+    since = timezone.localdate() - timedelta(days=days)
+    return list(
+        CategoryDailySnapshot.objects.filter(date__gte=since)
+        .order_by()
+        .values("date")
+        .annotate(count=Sum("item_count"), value=Sum("value"))
+        .order_by("date")
+    )
+
+
+def metrics_series(queryset=None) -> dict:
+    """
+    Chart series over the active items, each one grouped query:
+    ``inventory_trend`` and ``value_over_time``, and ``category_count``
+    (items per category; from the rollups unless a ``queryset`` is given).
+
+    Once daily snapshots exist the two trends are real history: active items
+    and stock value per day. Before that (or for a ``queryset``) they fall
+    back to the items created per day and their cost.
+    """
+    per_day = history_series() if queryset is None else []
+    if queryset is None:
+        queryset = Item.objects.filter(is_active=True)
+        per_category = [
+            {"category__name": row["name"], "count": row["total"]} for row in category_counts() if row["total"]
+        ]
+    else:
+        per_category = (
+            queryset.order_by()
+            .values("category__name")
+            .annotate(count=Count("pk"))
+            .order_by("category__name")
+        )
+    if not per_day:
+        per_day = (
+            queryset.order_by()
+            .annotate(date=TruncDate("created_at"))
+            .values("date")
+            .annotate(count=Count("pk"), value=Sum("cost"))
+            .order_by("date")
+        )
+    trend, value = [], []
+    for row in per_day:
+        trend.append({"date": row["date"].isoformat(), "count": row["count"]})
+        value.append({"date": row["date"].isoformat(), "cost": float(row["value"] or 0)})
+    return {
+        "inventory_trend": trend,
+        "value_over_time": value,
+        "category_count": [{"category": row["category__name"], "count": row["count"]} for row in per_category],
+    }
+
+
+PERCENTILES = (25, 50, 75, 95)
+
+
+def _percentile_ranks(count: int) -> dict:
+    """
+    For each percentile, the two 1-based ranks around position ``p * (n - 1)``
+    and the weight of the upper one (``percentile_cont`` interpolation).
+    """
+    ranks = {}
+    for p in PERCENTILES:
+        position = p / 100 * (count - 1)
+        lower = int(position)
+        ranks[p] = (lower + 1, min(lower + 2, count), position - lower)
+    return ranks
+
+
+def cost_distribution(queryset=None, bins: int = 10) -> list:
+    """
+    Per-category summary of item costs, in place of every raw cost:
+    ``count``, ``min``, ``max``, ``mean``, ``p25``/``p50``/``p75``/``p95`` and
+    ``histogram``, ``bins`` equal-width ``{start, end, count}`` buckets between
+    the category's min and max.
+
+
+    Three queries whatever the catalog size: per-category count/min/max/mean,
+    bucket counts, and the rows at the percentile ranks (picked with a
+    ``ROW_NUMBER()`` window, interpolated like ``percentile_cont``).
+    """
+    if queryset is None:
+        queryset = Item.objects.filter(is_active=True)
+    queryset = queryset.order_by()
+
+    summaries = {
+        row["category_id"]: row
+        for row in queryset.values("category_id", "category__name").annotate(
+            count=Count("pk"), min=Min("cost"), max=Max("cost"), mean=Avg("cost")
+        )
+    }
+    if not summaries:
+        return []
+
+    # Bucket index per row: floor((cost - min) / width), with each category's
+    # own min and width picked by a CASE over the (few) categories
+    lows, widths = [], []
+    for category_id, row in summaries.items():
+        width = (float(row["max"]) - float(row["min"])) / bins or 1.0
+        row["width"] = width
+        lows.append(When(category_id=category_id, then=Value(float(row["min"]))))
+        widths.append(When(category_id=category_id, then=Value(width)))
+    offset = Cast("cost", FloatField()) - Case(*lows, output_field=FloatField())
+    bucket = Least(
+        Cast(Floor(offset / Case(*widths, output_field=FloatField())), IntegerField()), Value(bins - 1)
+    )
+    counts = {}
+    for row in queryset.annotate(bucket=bucket).values("category_id", "bucket").annotate(n=Count("pk")):
+        counts[(row["category_id"], row["bucket"])] = row["n"]
+
+    ranks = {category_id: _percentile_ranks(row["count"]) for category_id, row in summaries.items()}
+    wanted = Q()
+    for category_id, by_percentile in ranks.items():
+        needed = {rank for lower, upper, _ in by_percentile.values() for rank in (lower, upper)}
+        wanted |= Q(category_id=category_id, rank__in=needed)
+    at_rank = {}
+    ranked = queryset.annotate(
+        rank=Window(RowNumber(), partition_by=[F("category_id")], order_by=[F("cost").asc(), F("pk").asc()])
+    )
+    for category_id, rank, cost in ranked.filter(wanted).values_list("category_id", "rank", "cost"):
+        at_rank[(category_id, rank)] = float(cost)
+
+    results = []
+    for category_id, row in sorted(summaries.items(), key=lambda item: item[1]["category__name"]):
+        low, width = float(row["min"]), row["width"]
+        summary = {
+            "category": row["category__name"],
+            "count": row["count"],
+            "min": low,
+            "max": float(row["max"]),
+            "mean": round(float(row["mean"]), 2),
+        }
+        for p, (lower, upper, weight) in ranks[category_id].items():
+            below, above = at_rank[(category_id, lower)], at_rank[(category_id, upper)]
+            summary[f"p{p}"] = round(below + (above - below) * weight, 2)
+        summary["histogram"] = [
+            {
+                "start": round(low + i * width, 2),
+                "end": round(low + (i + 1) * width, 2),
+                "count": counts.get((category_id, i), 0),
+            }
+            for i in range(bins)
+        ]
+        results.append(summary)
+    return results
@@ -1,3 +1,185 @@
-from django.test import TestCase
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from inventory import live
+from inventory.models import Item, ItemCategory
+from inventro.channel_layer import SPILL_MARKER, PostgresChannelLayer
+
+from . import views
+from .consumers import ItemDeltaConsumer, hub
+
+
+class DashboardPageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = ItemCategory.objects.create(name="Cables")
+        for name, in_stock in (("alpha", 10), ("beta", 1), ("gamma", 0)):
+            Item.objects.create(
+                name=name, sku=name.upper(), in_stock=in_stock, low_stock_bar=2,
+                total_amount=10, location="A1", cost="1.00", category=category,
+            )
+        self.client.force_login(get_user_model().objects.create_user("viewer", password="x"))
+
+    def test_analytics_renders_the_stock_counts(self):
+        response = self.client.get(reverse("dashboard_analytics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "[1, 1, 1]")
+        self.assertContains(response, "'Cables'")
+
+    def test_warm_fragments_skip_the_snapshot(self):
+        self.client.get(reverse("dashboard_home"))
+        with mock.patch.object(views, "get_snapshot", side_effect=AssertionError("snapshot fetched")):
+            response = self.client.get(reverse("dashboard_home"))
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(INVENTRO_LIVE_FRAME_MS=50, INVENTRO_LIVE_MAX_PENDING=3)
+class ItemDeltaConsumerTests(SimpleTestCase):
+    async def open_socket(self):
+        await get_channel_layer().flush()
+        self.socket = WebsocketCommunicator(ItemDeltaConsumer.as_asgi(), "/ws/items/")
+        self.socket.scope["user"] = SimpleNamespace(is_authenticated=True)
+        connected, _ = await self.socket.connect()
+        self.assertTrue(connected)
+
+    async def close_socket(self):
+        await self.socket.disconnect()
+        hub.task.cancel()
+
+    async def publish(self, *deltas):
+        await live.apublish([(pk, in_stock, 0, live.STATUS_IN, None) for pk, in_stock in deltas])
+
+    async def frame(self):
+        return json.loads(await self.socket.receive_from(timeout=1))
+
+    async def test_coalesces_deltas_per_item(self):
+        await self.open_socket()
+        try:
+            await self.publish((1, 5))
+            self.assertEqual(await self.frame(), {"seq": 1, "items": [[1, 5, 0, "in"]]})
+
+            # Within one frame interval: item 1 keeps only its latest state, moved behind item 2
+            await self.publish((1, 4))
+            await self.publish((2, 9))
+            await self.publish((1, 3))
+            self.assertEqual(await self.frame(), {"seq": 2, "items": [[2, 9, 0, "in"], [1, 3, 0, "in"]]})
+        finally:
+            await self.close_socket()
+
+    async def test_waits_for_acks_and_drops_the_oldest_beyond_the_limit(self):
+        await self.open_socket()
+        try:
+            await self.publish((1, 5))
+            await self.frame()
+            await self.publish((2, 5))
+            await self.frame()
+
+            # Two frames unacknowledged: nothing more is sent
+            await self.publish((3, 5), (4, 5), (5, 5), (6, 5))
+            self.assertTrue(await self.socket.receive_nothing(timeout=0.2))
+
+            await self.socket.send_to(text_data=json.dumps({"ack": 2}))
+            self.assertEqual(await self.frame(), {
+                "seq": 3, "items": [[4, 5, 0, "in"], [5, 5, 0, "in"], [6, 5, 0, "in"]], "dropped": 1,
+            })
+        finally:
+            await self.close_socket()
+
+
+class PostgresChannelLayerTests(SimpleTestCase):
+    class Cursor:
+        """Records what the layer would run; spilled rows get ids 1, 2, ..."""
+
+        def __init__(self):
+            self.spilled, self.notifications = [], []
+
+        def execute(self, sql, params):
+            self.spilled.append(params)
+
+        def fetchone(self):
+            return (len(self.spilled),)
+
+        def executemany(self, sql, rows):
+            self.notifications.extend(rows)
+
+    class Connection:
+        """Answers the spill claim of ``_receive`` from a recording cursor."""
+
+        def __init__(self, cursor):
+            self.cursor = cursor
+
+        def execute(self, sql, params):
+            ids = params[0]
+            rows = [(pk, payload) for pk, (_, payload) in enumerate(self.cursor.spilled, 1) if pk in ids]
+            return SimpleNamespace(fetchall=lambda: rows)
+
+    def layer(self, **config):
+        layer = PostgresChannelLayer(**config)
+        layer.client_id = "a" * 16
+        layer.pg_channel = "inventro_layer_" + layer.client_id
+        layer.local_groups = {"stock": {"specific.x!one": time.time() + 60}}
+        return layer
+
+    def round_trip(self, layer, outgoing):
+        cursor = self.Cursor()
+        layer._notify(cursor, outgoing)
+        delivered = []
+        with mock.patch.object(layer, "_deliver", side_effect=delivered.extend):
+            layer._receive(self.Connection(cursor), cursor.notifications)
+        return cursor, [message for _, _, message in delivered]
+
+    def test_packs_entries_into_few_notifications(self):
+        layer = self.layer(max_payload=1000)
+        messages = [{"type": "items.delta", "n": n} for n in range(100)]
+        deadline = time.time() + 60
+
+        cursor, delivered = self.round_trip(
+            layer, {layer.pg_channel: [["group_send", "stock", message, deadline] for message in messages]}
+        )
+
+        self.assertEqual(cursor.spilled, [])
+        self.assertLess(len(cursor.notifications), 10)
+        self.assertTrue(all(len(payload) <= 1000 for _, payload in cursor.notifications))
+        self.assertEqual(delivered, messages)
+
+    def test_spills_oversized_messages(self):
+        layer = self.layer(max_payload=1000)
+        small, large = {"type": "x", "text": "a"}, {"type": "x", "text": "b" * 2000}
+        deadline = time.time() + 60
+
+        cursor, delivered = self.round_trip(layer, {layer.pg_channel: [
+            ["send", ["specific.x!one"], small, deadline],
+            ["send", ["specific.x!one"], large, deadline],
+        ]})
+
+        self.assertEqual(len(cursor.spilled), 1)
+        self.assertEqual(
+            [payload.startswith(SPILL_MARKER) for _, payload in cursor.notifications], [False, True]
+        )
+        self.assertEqual(delivered, [small, large])
+
+    def test_concurrent_sends_publish_in_one_batch(self):
+        layer = PostgresChannelLayer(batch_delay=0.05)
+        batches = []
+        with mock.patch.object(layer, "_listen_loop"), mock.patch.object(layer, "_connect"), \
+                mock.patch.object(layer, "_publish", side_effect=lambda conn, ops: batches.append(ops) or []):
+
+            async def send_all():
+                await asyncio.gather(*(layer.group_send("stock", {"type": "x", "n": n}) for n in range(20)))
+
+            async_to_sync(send_all)()
+            layer.close()
+
+        self.assertEqual([len(ops) for ops in batches[:1]], [20])
+        self.assertEqual(batches[1:], [[("forget",)]])
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Item, ItemCategory, InventoryItem
+from .models import Item, ItemCategory, InventoryItem, StockMovement
 
 class CategoryListFilter(admin.SimpleListFilter):
     title = "category"
@@ -43,8 +43,38 @@ class ItemAdmin(admin.ModelAdmin):
 
     ordering = ("name",)
 
+    def save_model(self, request, obj, form, change):
+        previous = form.initial.get("in_stock", 0) if change else 0
+        super().save_model(request, obj, form, change)
+        if not change:
+            reason, delta = StockMovement.REASON_CREATED, obj.in_stock
+        elif obj.in_stock != previous:
+            reason, delta = StockMovement.REASON_ADJUSTMENT, obj.in_stock - previous
+        else:
+            return
+        StockMovement.for_item(obj, delta, reason, StockMovement.SOURCE_ADMIN, request.user).save()
+
     def category(self, obj):
         # Gracefully handle items without category
         return getattr(getattr(obj, "item", None), "category", None)
     category.short_description = "Category"
     category.admin_order_field = "item__category"
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    # The ledger is append-only: browsable, never editable
+    list_display = ("created_at", "item_name", "delta", "in_stock_after", "reason", "source", "actor")
+    list_filter = ("reason", "source")
+    search_fields = ("item_name",)
+    ordering = ("-created_at", "-id")
+    list_select_related = ("actor",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
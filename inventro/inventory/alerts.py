@@ -0,0 +1,155 @@
+"""
+Low-stock alerts, sent as coalesced digests.
+
+An item is low while it is active and its ``in_stock`` is at or below its
+``low_stock_bar``. Write paths call ``record(items)`` in the same transaction
+as the write:
+
+* ``Item.save()`` through ``on_item_save`` in ``inventory.signals``;
+* the bulk API and checkout, next to ``rollups.record``;
+* ``manage.py import_items`` writes with SQL and calls ``sync()``.
+
+``record`` compares each item with its loaded values (``Item.loaded_value``)
+and only touches ``LowStockAlert`` on a crossing: going low adds a pending
+row, recovering above the bar deletes it. An item that stays low therefore
+alerts once, however often its stock moves.
+
+``manage.py send_low_stock_digests`` (a CronJob) calls ``send_digests()``.
+Once the oldest pending alert is ``INVENTRO_LOW_STOCK_DIGEST_WINDOW`` seconds
+old, every pending alert goes out together: one email per recipient over a
+single SMTP connection, plus one call to ``NOTIFY_LOW_STOCK_WEBHOOK``.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Item, LowStockAlert
+
+LOGGER = logging.getLogger(__name__)
+
+DIGEST_WINDOW = getattr(settings, "INVENTRO_LOW_STOCK_DIGEST_WINDOW", 300)
+NOTIFY_LOW_STOCK_WEBHOOK = getattr(settings, "NOTIFY_LOW_STOCK_WEBHOOK", "")  # optional serverless endpoint
+
+# Item columns that decide whether an item is low
+FIELDS = ("is_active", "in_stock", "low_stock_bar")
+
+
+def is_low(item: Item) -> bool:
+    return bool(item.is_active) and item.in_stock <= item.low_stock_bar
+
+
+def _was_low(item: Item):
+    """Whether the item was low as loaded; ``None`` when that is unknown."""
+    values = [item.loaded_value(field) for field in FIELDS]
+    if None in values:
+        return None
+    is_active, in_stock, low_stock_bar = values
+    return bool(is_active) and in_stock <= low_stock_bar
+
+
+def record(items, created=False):
+    """Raise or clear alerts for ``items`` after a write (inside its transaction)."""
+    raised, recovered = [], []
+    for item in items:
+        low = is_low(item)
+        was_low = False if created else _was_low(item)
+        if low and was_low is not True:
+            raised.append(LowStockAlert(item_id=item.pk))
+        elif not low and was_low is not False:
+            recovered.append(item.pk)
+    if raised:
+        # An item that is still alerted keeps its row (and stays quiet)
+        LowStockAlert.objects.bulk_create(raised, ignore_conflicts=True)
+    if recovered:
+        LowStockAlert.objects.filter(item_id__in=recovered).delete()
+
+
+def sync():
+    """Bring the alert rows in line with the items after a write that bypassed ``record``."""
+    now = timezone.now()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            """
+            DELETE FROM inventory_lowstockalert WHERE item_id IN (
+                SELECT id FROM inventory_item
+                WHERE NOT is_active OR in_stock > low_stock_bar
+            )
+            """
+        )
+        cursor.execute(
+            """
+            INSERT INTO inventory_lowstockalert (item_id, triggered_at, notified_at)
+            SELECT i.id, %s, NULL FROM inventory_item AS i
+            WHERE i.is_active AND i.in_stock <= i.low_stock_bar
+              AND NOT EXISTS (SELECT 1 FROM inventory_lowstockalert AS a WHERE a.item_id = i.id)
+            """,
+            [now],
+        )
+
+
+def recipients() -> list[str]:
+    """``ALERT_EMAILS`` (comma-separated), else every superuser with an email."""
+    configured = getattr(settings, "ALERT_EMAILS", "")
+    if configured:
+        return [e.strip() for e in configured.split(",") if e.strip()]
+    User = get_user_model()
+    return list(User.objects.filter(is_superuser=True, email__isnull=False)
+                .exclude(email="").values_list("email", flat=True))
+
+
+def _digest(items) -> tuple:
+    subject = f"[Inventro] Low stock: {len(items)} item{'s' if len(items) != 1 else ''}"
+    lines = [f"{len(items)} item(s) reached their low-stock bar:", ""]
+    for item in items:
+        lines.append(f"- {item.name} (SKU {item.sku}): {item.in_stock} in stock, bar {item.low_stock_bar}")
+    return subject, "\n".join(lines) + "\n"
+
+
+def _call_webhook(items):
+    if not NOTIFY_LOW_STOCK_WEBHOOK:
+        return
+    # requests is only needed here; keep it out of the web workers' import path
+    import requests
+    try:
+        requests.post(NOTIFY_LOW_STOCK_WEBHOOK, json={"items": [
+            {"sku": item.sku, "name": item.name, "in_stock": item.in_stock} for item in items
+        ]}, timeout=10)
+    except Exception as e:
+        LOGGER.warning("Serverless notify failed: %s", e)
+
+
+def send_digests(window=DIGEST_WINDOW, force=False) -> dict:
+    """
+    Send every pending alert once the oldest is ``window`` seconds old (or
+    at once with ``force``). Returns ``{"items": n, "emails": n, "pending": n}``.
+    A failed send raises and leaves the alerts pending for the next run.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        alerts = list(
+            LowStockAlert.objects.filter(notified_at__isnull=True)
+            .select_for_update(skip_locked=True, of=("self",))
+            .select_related("item")
+            .order_by("triggered_at")
+        )
+        if not alerts or (not force and alerts[0].triggered_at > now - timedelta(seconds=window)):
+            return {"items": 0, "emails": 0, "pending": len(alerts)}
+
+        items = [alert.item for alert in alerts]
+        subject, body = _digest(items)
+        messages = [
+            EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [recipient])
+            for recipient in recipients()
+        ]
+        sent = 0
+        if messages:
+            # One connection (one SMTP handshake) for every recipient's digest
+            sent = get_connection(fail_silently=False).send_messages(messages)
+        _call_webhook(items)
+        LowStockAlert.objects.filter(pk__in=[alert.pk for alert in alerts]).update(notified_at=now)
+    return {"items": len(items), "emails": sent or 0, "pending": 0}
@@ -1,4 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _ensure_search_triggers(sender, using="default", **kwargs):
+    from .search import ensure_sqlite_fts
+
+    ensure_sqlite_fts(using)
 
 
 class InventoryConfig(AppConfig):
@@ -9,3 +16,5 @@ class InventoryConfig(AppConfig):
         """Import signals when app is ready."""
         from . import signals  # noqa: F401 to register signal handlers
 
+        post_migrate.connect(_ensure_search_triggers, sender=self)
+
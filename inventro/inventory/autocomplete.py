@@ -0,0 +1,264 @@
+"""
+In-process autocomplete index for the quick-search endpoint (``api_search``).
+
+Each worker keeps a compact copy of the active catalog in memory:
+
+* a sorted array of lowercased tokens (words of the name and category, the
+  whole name and the whole SKU) with a parallel ``array('q')`` of item ids,
+  ordered on ``(token, item id)`` and answered with ``bisect`` for prefix
+  matches;
+* sorted ``array('q')`` posting lists per trigram for substring matches,
+  verified against the item text.
+
+The index is built lazily on the first search, kept current by the ``Item``
+signals in this worker, and caught up with writes made by other workers every
+``INVENTRO_AUTOCOMPLETE_SYNC_INTERVAL`` seconds through one indexed
+``updated_at`` query. ``manage.py rebuild_autocomplete`` bumps a generation
+number in the cache that makes every worker rebuild from scratch on its next
+sync.
+"""
+import re
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+SYNC_INTERVAL = getattr(settings, "INVENTRO_AUTOCOMPLETE_SYNC_INTERVAL", 5)
+GENERATION_KEY = "inventro:autocomplete:generation"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class AutocompleteIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs = {}             # id -> (name, sku, category, lowercased text)
+        self._keys = []             # sorted tokens
+        self._key_ids = array("q")  # item id for each entry of _keys
+        self._trigrams = {}         # trigram -> sorted array of item ids
+        self.built = False
+        self.built_at = None
+        self.synced_at = None
+        self.generation = None
+
+    # -- maintenance ---------------------------------------------------------
+
+    def _tokens(self, name: str, sku: str, category: str) -> set:
+        name, sku, category = name.lower(), sku.lower(), category.lower()
+        tokens = set(_WORD_RE.findall(name)) | set(_WORD_RE.findall(category))
+        tokens.update(t for t in (name, sku) if t)
+        # Intern so a word shared by thousands of items is stored once
+        return {sys.intern(t) for t in tokens}
+
+    def _entry(self, token: str, item_id: int):
+        """Position of ``(token, item_id)`` in the entries, which are sorted on that pair."""
+        lo = bisect_left(self._keys, token)
+        hi = bisect_right(self._keys, token, lo)
+        # Within a token's run the ids are sorted too
+        return bisect_left(self._key_ids, item_id, lo, hi)
+
+    def _insert(self, item_id: int, name: str, sku: str, category: str):
+        category = sys.intern(category)
+        text = f"{name} {sku} {category}".lower()
+        self._docs[item_id] = (name, sku, category, text)
+        for token in self._tokens(name, sku, category):
+            pos = self._entry(token, item_id)
+            self._keys.insert(pos, token)
+            self._key_ids.insert(pos, item_id)
+        for gram in _trigrams(text):
+            ids = self._trigrams.setdefault(gram, array("q"))
+            ids.insert(bisect_left(ids, item_id), item_id)
+
+    def _delete(self, item_id: int):
+        doc = self._docs.pop(item_id, None)
+        if doc is None:
+            return
+        name, sku, category, text = doc
+        for token in self._tokens(name, sku, category):
+            pos = self._entry(token, item_id)
+            if pos < len(self._keys) and self._keys[pos] == token and self._key_ids[pos] == item_id:
+                del self._keys[pos]
+                del self._key_ids[pos]
+        for gram in _trigrams(text):
+            ids = self._trigrams.get(gram)
+            if ids is None:
+                continue
+            pos = bisect_left(ids, item_id)
+            if pos < len(ids) and ids[pos] == item_id:
+                del ids[pos]
+            if not ids:
+                del self._trigrams[gram]
+
+    def build(self, rows, generation=None):
+        """Replace the whole index with ``rows`` of ``(id, name, sku, category)``."""
+        docs, entries, trigrams = {}, [], {}
+        for item_id, name, sku, category in rows:
+            name, sku, category = name or "", sku or "", sys.intern(category or "")
+            text = f"{name} {sku} {category}".lower()
+            docs[item_id] = (name, sku, category, text)
+            entries.extend((token, item_id) for token in self._tokens(name, sku, category))
+            for gram in _trigrams(text):
+                trigrams.setdefault(gram, []).append(item_id)
+        entries.sort()
+        trigrams = {gram: array("q", sorted(ids)) for gram, ids in trigrams.items()}
+
+        with self._lock:
+            self._docs = docs
+            self._keys = [token for token, _ in entries]
+            self._key_ids = array("q", (item_id for _, item_id in entries))
+            self._trigrams = trigrams
+            self.built = True
+            self.built_at = self.synced_at = timezone.now()
+            self.generation = generation
+
+    def upsert(self, item_id: int, name: str, sku: str, category: str):
+        with self._lock:
+            self._delete(item_id)
+            self._insert(item_id, name or "", sku or "", category or "")
+
+    def remove(self, item_id: int):
+        with self._lock:
+            self._delete(item_id)
+
+    # -- queries -------------------------------------------------------------
+
+    def search(self, q: str, limit: int = 10) -> list:
+        """
+        Top ``limit`` matches for ``q``: prefix matches first, then substrings.
+
+        Queries shorter than three characters have no trigram to narrow the
+        substring search with and get prefix matches only.
+        """
+        q = (q or "").strip().lower()
+        if not q:
+            return []
+        with self._lock:
+            found = []
+            seen = set()
+
+            pos = bisect_left(self._keys, q)
+            while pos < len(self._keys) and len(found) < limit and self._keys[pos].startswith(q):
+                item_id = self._key_ids[pos]
+                if item_id not in seen:
+                    seen.add(item_id)
+                    found.append(item_id)
+                pos += 1
+
+            grams = _trigrams(q)
+            if grams and len(found) < limit:
+                postings = [self._trigrams.get(gram) for gram in grams]
+                candidates = () if None in postings else min(postings, key=len)
+                for item_id in candidates:
+                    if item_id not in seen and q in self._docs[item_id][3]:
+                        seen.add(item_id)
+                        found.append(item_id)
+                        if len(found) >= limit:
+                            break
+
+            results = []
+            for item_id in found:
+                name, sku, category, _ = self._docs[item_id]
+                results.append({"id": item_id, "name": name, "sku": sku, "category": category})
+            return results
+
+    def __len__(self):
+        return len(self._docs)
+
+    def footprint(self) -> dict:
+        """Approximate memory held by the index, in bytes, per structure."""
+        with self._lock:
+            # Category names are interned; count each distinct object once
+            fields = {id(f): f for doc in self._docs.values() for f in doc}
+            docs = (
+                sys.getsizeof(self._docs)
+                + sum(sys.getsizeof(doc) for doc in self._docs.values())
+                + sum(sys.getsizeof(f) for f in fields.values())
+            )
+            # Tokens are interned, so count each distinct string once
+            keys = sys.getsizeof(self._keys) + sum(sys.getsizeof(k) for k in set(self._keys))
+            key_ids = sys.getsizeof(self._key_ids)
+            trigrams = sys.getsizeof(self._trigrams) + sum(
+                sys.getsizeof(gram) + sys.getsizeof(ids) for gram, ids in self._trigrams.items()
+            )
+            return {
+                "items": len(self._docs),
+                "tokens": len(self._keys),
+                "trigrams": len(self._trigrams),
+                "docs_bytes": docs,
+                "keys_bytes": keys,
+                "key_ids_bytes": key_ids,
+                "trigrams_bytes": trigrams,
+                "total_bytes": docs + keys + key_ids + trigrams,
+            }
+
+
+def active_rows(queryset=None):
+    from .models import Item
+
+    if queryset is None:
+        queryset = Item.objects.filter(is_active=True)
+    return queryset.values_list("id", "name", "sku", "category__name").iterator(chunk_size=5000)
+
+
+index = AutocompleteIndex()
+_sync_lock = threading.Lock()
+_last_check = 0.0
+
+
+def get_index() -> AutocompleteIndex:
+    """
+    Return this worker's index, building it on first use. At most once per
+    ``SYNC_INTERVAL`` it also picks up writes made by other workers.
+    """
+    global _last_check
+
+    now = time.monotonic()
+    if index.built and now - _last_check < SYNC_INTERVAL:
+        return index
+    if not _sync_lock.acquire(blocking=not index.built):
+        # Another thread is already syncing; serve the slightly stale index
+        return index
+    try:
+        _last_check = time.monotonic()
+        generation = cache.get(GENERATION_KEY)
+        if not index.built or generation != index.generation:
+            index.build(active_rows(), generation=generation)
+        else:
+            _catch_up(index)
+    finally:
+        _sync_lock.release()
+    return index
+
+
+def _catch_up(idx: AutocompleteIndex):
+    from .models import Item
+
+    started = timezone.now()
+    # Overlap the window so rows committed late with an earlier updated_at are not missed
+    since = idx.synced_at - timedelta(seconds=max(SYNC_INTERVAL * 2, 10))
+    changed = Item.objects.filter(updated_at__gte=since)
+    for item_id, name, sku, category, is_active in changed.values_list(
+        "id", "name", "sku", "category__name", "is_active"
+    ):
+        if is_active:
+            idx.upsert(item_id, name, sku, category)
+        else:
+            idx.remove(item_id)
+    idx.synced_at = started
+
+
+def request_rebuild():
+    """Make every worker rebuild its index on its next sync."""
+    generation = time.time_ns()
+    cache.set(GENERATION_KEY, generation, None)
+    return generation
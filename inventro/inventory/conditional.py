@@ -0,0 +1,132 @@
+"""
+Conditional GETs (``ETag`` / ``Last-Modified``) for the catalog APIs.
+
+Viewsets using ``ConditionalGetMixin`` work out a cheap *version* of what a
+list or detail response would contain before running the query behind it. If
+the client's ``If-None-Match`` / ``If-Modified-Since`` still matches that
+version the view answers ``304 Not Modified`` straight away; otherwise the
+normal response goes out with the validators attached.
+
+List versions are the catalog version (``inventory.versioning``), which every
+item and category write path bumps once its transaction has committed. A
+version taken from the rows themselves would race: ``updated_at`` is stamped
+before commit, so a write committing after a later one is invisible to
+``max(updated_at)``. It is also a single cache read instead of an aggregate.
+
+* item list and category list: ``catalog_version()``;
+* one item: its ``updated_at`` and category name;
+* one category: its name.
+
+The ETag is the validator that counts. ``Last-Modified`` only has one-second
+precision: a client holding a copy from earlier in the same second as a later
+write would get a stale 304 for it, so it is only sent for versions whose
+timestamp falls on a whole second.
+"""
+import hashlib
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import Item
+from .versioning import catalog_version
+
+
+def catalog_list_version():
+    """``(version, last_modified)`` of the item list or the category list."""
+    return f"catalog:{catalog_version()}", None
+
+
+def item_version(pk):
+    """``(version, last_modified)`` of one item, or ``None`` if it does not exist."""
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    row = Item.objects.filter(pk=pk).values_list("updated_at", "category__name").first()
+    if row is None:
+        return None
+    last, category = row
+    return f"{pk}:{last.timestamp()}:{category}", last
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag / Last-Modified handling to a viewset's ``list`` and
+    ``retrieve``. ``list_version()`` and ``object_version(pk)`` return
+    ``(version, last_modified)`` (``last_modified`` may be ``None``), or
+    ``None`` to skip the check.
+
+    The defaults read ``version_field`` of ``get_queryset()``: the list is
+    versioned by ``count:max(updated_at)``, an object by its own
+    ``updated_at``. Viewsets whose payload also depends on other rows, or
+    whose model has no such column, override them.
+    """
+
+    version_field = "updated_at"
+
+    def _versioned_queryset(self):
+        queryset = self.get_queryset()
+        try:
+            queryset.model._meta.get_field(self.version_field)
+        except FieldDoesNotExist:
+            return None
+        return queryset.order_by()
+
+    def list_version(self):
+        queryset = self._versioned_queryset()
+        if queryset is None:
+            return None
+        stats = queryset.aggregate(last=Max(self.version_field), count=Count("pk"))
+        last = stats["last"]
+        return f"{stats['count']}:{last.timestamp() if last else 0}", last
+
+    def object_version(self, pk):
+        queryset = self._versioned_queryset()
+        if queryset is None:
+            return None
+        try:
+            last = queryset.filter(**{self.lookup_field: pk}).values_list(self.version_field, flat=True).first()
+        except (TypeError, ValueError, ValidationError):
+            return None
+        if last is None:
+            return None
+        return f"{pk}:{last.timestamp()}", last
+
+    def _etag(self, request, version) -> str:
+        # The same data renders differently per format and query string
+        key = f"{version}|{request.accepted_renderer.format}|{request.META.get('QUERY_STRING', '')}"
+        return '"%s"' % hashlib.md5(key.encode()).hexdigest()
+
+    def _conditional(self, request, current, render):
+        if current is None:
+            return render()
+        version, last_modified = current
+        etag = self._etag(request, version)
+        # Whole seconds only; anything finer is left to the ETag
+        if last_modified and last_modified.microsecond:
+            last_modified = None
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render()
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = http_date(last_modified)
+            # Let clients keep the copy but revalidate on every use
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(
+            request, self.list_version(), lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        return self._conditional(
+            request, self.object_version(pk), lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
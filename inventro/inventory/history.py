@@ -0,0 +1,121 @@
+"""
+Daily inventory history.
+
+``take_snapshot`` records the state of the inventory for one day in two
+tables:
+
+* ``CategoryDailySnapshot``: the ``CategoryRollup`` figures of every category,
+  copied as they stand (the rollups are already kept current incrementally,
+  so this is O(categories));
+* ``ItemDailySnapshot``: a row per item whose state (category, stock, cost,
+  active) differs from its latest snapshot. Only items updated since the
+  snapshot of the previous day on record was taken are compared, so a day's
+  run reads the day's changes, not the whole table. ``updated_at`` is stamped
+  before commit, so the window reaches ``SNAPSHOT_OVERLAP`` seconds further
+  back to catch writes that committed after that snapshot read the table.
+  The first run (or ``full=True``) compares every item.
+
+Charts then read a year of history as at most ``365 * categories`` rows
+through the ``(date, category)`` index, whatever the number of items.
+``manage.py snapshot_inventory`` runs this daily (see
+``k8s/cronjob-snapshot-inventory.yaml``); re-running it for the same day
+replaces that day's rows.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import CategoryDailySnapshot, CategoryRollup, Item, ItemDailySnapshot
+from .rollups import COUNTERS
+from .versioning import bump_on_commit
+
+ITEM_FIELDS = ("category_id", "in_stock", "cost", "is_active")
+BATCH_SIZE = 2000
+SNAPSHOT_OVERLAP = getattr(settings, "INVENTRO_SNAPSHOT_OVERLAP", 300)
+
+
+def _latest_states(item_ids, date) -> dict:
+    """``{item_id: state}`` from each item's latest snapshot at or before ``date``."""
+    latest = (
+        ItemDailySnapshot.objects.filter(item_id=OuterRef("item_id"), date__lte=date)
+        .order_by("-date")
+        .values("date")[:1]
+    )
+    rows = ItemDailySnapshot.objects.filter(item_id__in=item_ids, date=Subquery(latest)).values_list(
+        "item_id", *ITEM_FIELDS
+    )
+    return {row[0]: row[1:] for row in rows}
+
+
+def _snapshot_items(date, since) -> int:
+    items = Item.objects.order_by("pk")
+    if since is not None:
+        items = items.filter(updated_at__gte=since)
+    changed = 0
+    batch = []
+    rows = items.values_list("pk", *ITEM_FIELDS).iterator(chunk_size=BATCH_SIZE)
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            changed += _write_items(date, batch)
+            batch = []
+    if batch:
+        changed += _write_items(date, batch)
+    return changed
+
+
+def _write_items(date, batch) -> int:
+    previous = _latest_states([row[0] for row in batch], date)
+    snapshots = [
+        ItemDailySnapshot(date=date, item_id=pk, **dict(zip(ITEM_FIELDS, state)))
+        for pk, *state in batch
+        if previous.get(pk) != tuple(state)
+    ]
+    ItemDailySnapshot.objects.bulk_create(
+        snapshots, update_conflicts=True, unique_fields=["item", "date"], update_fields=list(ITEM_FIELDS)
+    )
+    return len(snapshots)
+
+
+@transaction.atomic
+def take_snapshot(date=None, full=False) -> dict:
+    """
+    Record the inventory as of ``date`` (default: today). Returns
+    ``{"date", "categories", "items", "full"}``.
+    """
+    date = date or timezone.localdate()
+    now = timezone.now()
+    since = None
+    if not full:
+        # The day before on record, whichever day this run is for (--date backfills too)
+        previous = CategoryDailySnapshot.objects.filter(date__lt=date).aggregate(last=Max("taken_at"))["last"]
+        if previous is not None:
+            since = previous - timedelta(seconds=SNAPSHOT_OVERLAP)
+
+    categories = [
+        CategoryDailySnapshot(
+            date=date,
+            category_id=rollup.category_id,
+            taken_at=now,
+            **{counter: getattr(rollup, counter) for counter in COUNTERS},
+        )
+        for rollup in CategoryRollup.objects.all()
+    ]
+    CategoryDailySnapshot.objects.bulk_create(
+        categories, update_conflicts=True, unique_fields=["date", "category"],
+        update_fields=[*COUNTERS, "taken_at"],
+    )
+    items = _snapshot_items(date, since)
+    bump_on_commit()
+    return {"date": date, "categories": len(categories), "items": items, "full": since is None}
+
+
+def item_history(item_id, since=None):
+    """``[{date, category_id, in_stock, cost, is_active}]``: the days ``item_id`` changed."""
+    rows = ItemDailySnapshot.objects.filter(item_id=item_id).order_by("date")
+    if since is not None:
+        rows = rows.filter(date__gte=since)
+    return list(rows.values("date", *ITEM_FIELDS))
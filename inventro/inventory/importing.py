@@ -0,0 +1,240 @@
+"""
+Bulk item import from vendor catalogs in the ``util/data/item_template.csv``
+format (``name,sku,total_amount,cost,category`` plus optional ``location``
+and ``in_stock``). Used by ``manage.py import_items``.
+
+Each chunk of the CSV is validated with vectorized pandas operations, its
+categories are resolved in one query, and the valid rows are loaded into a
+temporary staging table and upserted on the (unique) SKU with set-based SQL:
+
+* Postgres: ``COPY`` into the staging table, then one ``MERGE``.
+* SQLite: ``executemany`` into the staging table, then ``UPDATE`` + ``INSERT``.
+
+New items also get a ``created`` row in the stock ledger, and every upserted
+item is queued for OpenSearch in the same transaction (``search_sync``).
+Existing items keep their live ``in_stock``; only their catalog fields are
+updated.
+"""
+import numpy as np
+import pandas as pd
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import search_sync
+from .models import ItemCategory, SearchOutbox, StockMovement
+
+REQUIRED_COLUMNS = ["name", "sku", "total_amount", "cost", "category"]
+STAGING_TABLE = "import_items_staging"
+
+# Largest value of the integer columns (32-bit on every backend)
+MAX_QUANTITY = 2 ** 31 - 1
+CATEGORY_NAME_LENGTH = ItemCategory._meta.get_field("name").max_length
+
+
+def parse_costs(costs: pd.Series) -> pd.Series:
+    """Vectorized ``parse_cost``: ``"$1,234.50"`` -> ``1234.5``; unparseable -> NaN."""
+    cleaned = costs.astype(str).str.replace(r"[$,\s]", "", regex=True)
+    return pd.to_numeric(cleaned, errors="coerce").round(2)
+
+
+def _text(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df:
+        return pd.Series("", index=df.index)
+    return df[column].fillna("").astype(str).str.strip()
+
+
+def normalize_chunk(df: pd.DataFrame, category_ids: dict):
+    """
+    Validate and normalize one chunk. Returns ``(rows, rejects)``: a frame of
+    clean values ready to load, and the rejected input rows with an ``error``
+    column. Within a chunk the last row for a SKU wins.
+    """
+    errors = pd.Series("", index=df.index)
+
+    def reject(mask, message):
+        errors[mask.fillna(True).astype(bool) & (errors == "")] = message
+
+    name = _text(df, "name")
+    sku = _text(df, "sku")
+    category = _text(df, "category")
+    location = _text(df, "location")
+    total_amount = pd.to_numeric(df["total_amount"], errors="coerce")
+    in_stock = pd.to_numeric(df["in_stock"], errors="coerce") if "in_stock" in df else total_amount
+    cost = parse_costs(df["cost"])
+    category_id = category.map(category_ids)
+
+    reject(name == "", "missing name")
+    reject(name.str.len() > 255, "name longer than 255 characters")
+    reject(sku == "", "missing sku")
+    reject(sku.str.len() > 50, "sku longer than 50 characters")
+    for column, values in (("total_amount", total_amount), ("in_stock", in_stock)):
+        reject(
+            values.isna() | (values < 0) | (values > MAX_QUANTITY) | (values % 1 != 0),
+            f"{column} must be a whole number from 0 to {MAX_QUANTITY}",
+        )
+    reject(cost.isna() | (cost < 0) | (cost >= 10 ** 13), "cost must be an amount like $1,234.50")
+    reject(category.str.len() > CATEGORY_NAME_LENGTH, f"category longer than {CATEGORY_NAME_LENGTH} characters")
+    reject(category_id.isna(), "unknown category")
+    location_too_long = location.str.len() > 255
+    reject(location_too_long, "location longer than 255 characters")
+    reject(sku.duplicated(keep="last") & (sku != ""), "superseded by a later row with the same sku")
+
+    ok = errors == ""
+    rows = pd.DataFrame({
+        "name": name[ok],
+        "sku": sku[ok],
+        "total_amount": total_amount[ok].astype(np.int64),
+        "in_stock": in_stock[ok].astype(np.int64),
+        "low_stock_bar": np.maximum((total_amount[ok] * 0.5).astype(np.int64), 1),
+        "cost": cost[ok],
+        "category_id": category_id[ok].astype(np.int64),
+        "location": location[ok].replace("", None),
+    })
+    rejects = df[~ok].assign(error=errors[~ok])
+    return rows, rejects
+
+
+def resolve_categories(names, known: dict, create: bool = False) -> dict:
+    """
+    Add the ids of ``names`` not yet in ``known`` with one query (plus one
+    insert when ``create`` is set). Unknown names, and names too long to be
+    a category, are left out.
+    """
+    missing = {name for name in names if name and len(name) <= CATEGORY_NAME_LENGTH and name not in known}
+    if not missing:
+        return known
+    if create:
+        ItemCategory.objects.bulk_create(
+            [ItemCategory(name=name) for name in missing], ignore_conflicts=True
+        )
+    known.update(ItemCategory.objects.filter(name__in=missing).values_list("name", "id"))
+    return known
+
+
+COLUMNS = ["name", "sku", "total_amount", "in_stock", "low_stock_bar", "cost", "category_id", "location"]
+
+MERGE_SQL = f"""
+    MERGE INTO inventory_item AS item
+    USING {STAGING_TABLE} AS s ON item.sku = s.sku
+    WHEN MATCHED THEN UPDATE SET
+        name = s.name, total_amount = s.total_amount, low_stock_bar = s.low_stock_bar,
+        cost = s.cost, category_id = s.category_id,
+        location = COALESCE(s.location, item.location), updated_at = %s
+    WHEN NOT MATCHED THEN INSERT (
+        name, sku, in_stock, reserved, low_stock_bar, total_amount, cost,
+        category_id, location, is_active, created_at, updated_at
+    ) VALUES (
+        s.name, s.sku, s.in_stock, 0, s.low_stock_bar, s.total_amount, s.cost,
+        s.category_id, s.location, TRUE, %s, %s
+    )
+"""
+
+# Without MERGE (SQLite): correlated updates off the indexed staging table, then an insert
+UPDATE_SQL = f"""
+    UPDATE inventory_item SET
+        {", ".join(
+            f"{column} = (SELECT s.{column} FROM {STAGING_TABLE} AS s WHERE s.sku = inventory_item.sku)"
+            for column in ["name", "total_amount", "low_stock_bar", "cost", "category_id"]
+        )},
+        location = COALESCE(
+            (SELECT s.location FROM {STAGING_TABLE} AS s WHERE s.sku = inventory_item.sku), location
+        ),
+        updated_at = %s
+    WHERE sku IN (SELECT sku FROM {STAGING_TABLE} WHERE NOT is_new)
+"""
+INSERT_SQL = f"""
+    INSERT INTO inventory_item (
+        name, sku, in_stock, reserved, low_stock_bar, total_amount, cost,
+        category_id, location, is_active, created_at, updated_at
+    )
+    SELECT name, sku, in_stock, 0, low_stock_bar, total_amount, cost,
+        category_id, location, TRUE, %s, %s
+    FROM {STAGING_TABLE} WHERE is_new
+"""
+
+
+def _stage(cursor, rows: pd.DataFrame):
+    """Load ``rows`` into the per-connection staging table."""
+    values = rows[COLUMNS].itertuples(index=False, name=None)
+    if connection.vendor == "postgresql":
+        cursor.execute(
+            f"""
+            CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+                name varchar(255), sku varchar(50) PRIMARY KEY, total_amount integer,
+                in_stock integer, low_stock_bar integer, cost numeric(15, 2),
+                category_id bigint, location varchar(255), is_new boolean
+            ) ON COMMIT DELETE ROWS
+            """
+        )
+        # Django's wrapper hides psycopg's COPY API; use the driver cursor directly
+        with cursor.cursor.copy(f"COPY {STAGING_TABLE} ({', '.join(COLUMNS)}) FROM STDIN") as copy:
+            for row in values:
+                copy.write_row(row)
+    else:
+        cursor.execute(
+            f"""
+            CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+                name varchar(255), sku varchar(50) PRIMARY KEY, total_amount integer,
+                in_stock integer, low_stock_bar integer, cost decimal, category_id bigint,
+                location varchar(255), is_new boolean
+            )
+            """
+        )
+        cursor.execute(f"DELETE FROM {STAGING_TABLE}")
+        placeholders = ", ".join(["%s"] * len(COLUMNS))
+        cursor.executemany(
+            f"INSERT INTO {STAGING_TABLE} ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+            [(*row[:5], str(row[5]), *row[6:]) for row in values],
+        )
+
+
+def _upsert_staged(rows: pd.DataFrame, now) -> tuple:
+    with connection.cursor() as cursor:
+        _stage(cursor, rows)
+        cursor.execute(
+            f"""
+            UPDATE {STAGING_TABLE}
+            SET is_new = NOT EXISTS (SELECT 1 FROM inventory_item AS i WHERE i.sku = {STAGING_TABLE}.sku)
+            """
+        )
+        cursor.execute(
+            f"SELECT SUM(CASE WHEN is_new THEN 1 ELSE 0 END), SUM(CASE WHEN is_new THEN 0 ELSE 1 END) "
+            f"FROM {STAGING_TABLE}"
+        )
+        inserted, updated = cursor.fetchone()
+
+        if connection.vendor == "postgresql":
+            cursor.execute(MERGE_SQL, [now, now, now])
+        else:
+            cursor.execute(UPDATE_SQL, [now])
+            cursor.execute(INSERT_SQL, [now, now])
+
+        cursor.execute(
+            f"""
+            INSERT INTO inventory_stockmovement
+                (item_id, item_name, actor_id, delta, in_stock_after, reason, source, created_at)
+            SELECT i.id, i.name, NULL, i.in_stock, i.in_stock, %s, %s, %s
+            FROM {STAGING_TABLE} AS s JOIN inventory_item AS i ON i.sku = s.sku
+            WHERE s.is_new
+            """,
+            [StockMovement.REASON_CREATED, StockMovement.SOURCE_IMPORT, now],
+        )
+        if search_sync.enabled():
+            cursor.execute(
+                f"""
+                INSERT INTO inventory_searchoutbox (item_id, action, created_at, available_at, attempts, last_error)
+                SELECT i.id, %s, %s, %s, 0, ''
+                FROM {STAGING_TABLE} AS s JOIN inventory_item AS i ON i.sku = s.sku
+                """,
+                [SearchOutbox.ACTION_INDEX, now, now],
+            )
+    return inserted, updated
+
+
+def upsert_rows(rows: pd.DataFrame) -> tuple:
+    """Upsert a normalized chunk on SKU in one transaction. Returns ``(inserted, updated)``."""
+    if rows.empty:
+        return 0, 0
+    now = timezone.now()
+    with transaction.atomic():
+        return _upsert_staged(rows, now)
@@ -0,0 +1,103 @@
+"""
+Live item deltas for the inventory table (``dashboard.consumers.ItemDeltaConsumer``).
+
+Write paths report the items they changed with ``changed()``. Once the
+transaction commits, the stock columns of those items are read in one query
+and sent as compact rows ``[id, in_stock, reserved, status]`` to the channel
+layer group of each item's category and to the group of all items. In each
+websocket process ``dashboard.consumers.ItemDeltaHub`` hands them to the
+consumers showing those items, which coalesce and rate-limit them per client.
+
+Reported by the ``Item`` signals, by ``items_saved`` (bulk API, checkout) and
+by ``inventory.reservations`` (cart holds and their expiry). ``import_items``
+does not report; open tables pick its changes up on their next load.
+"""
+import asyncio
+from collections import defaultdict
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+
+from .models import Item
+
+ENABLED = getattr(settings, "INVENTRO_LIVE_ITEMS", True)
+
+# Item columns a delta is made of
+FIELDS = ("in_stock", "reserved", "low_stock_bar", "is_active", "category_id")
+
+ALL_GROUP = "inventory_items"
+# Rows per channel layer message
+CHUNK = 500
+
+STATUS_IN = "in"
+STATUS_LOW = "low"
+STATUS_OUT = "out"
+# Deleted or deactivated: the table drops the row
+STATUS_GONE = "gone"
+
+
+def category_group(category_id) -> str:
+    return f"{ALL_GROUP}.category.{category_id}"
+
+
+def status(in_stock, reserved, low_stock_bar, is_active=True) -> str:
+    """Stock status as the inventory table shows it, from what is still available."""
+    if not is_active:
+        return STATUS_GONE
+    available = in_stock - reserved
+    if available <= 0:
+        return STATUS_OUT
+    if available <= low_stock_bar:
+        return STATUS_LOW
+    return STATUS_IN
+
+
+def changed(item_ids):
+    """Send the state of ``item_ids`` once the current transaction commits."""
+    if not ENABLED:
+        return
+    item_ids = list(item_ids)
+    if item_ids:
+        transaction.on_commit(lambda: publish_items(item_ids))
+
+
+def removed(items):
+    """Tell open tables that deleted ``items`` are gone."""
+    if not ENABLED:
+        return
+    rows = [(item.pk, 0, 0, STATUS_GONE, item.category_id) for item in items]
+    transaction.on_commit(lambda: publish(rows))
+
+
+def publish_items(item_ids):
+    found = {
+        pk: (pk, in_stock, reserved, status(in_stock, reserved, bar, active), category_id)
+        for pk, in_stock, reserved, bar, active, category_id in Item.objects.filter(pk__in=item_ids)
+        .values_list("pk", *FIELDS)
+    }
+    # Gone in the meantime: no category to address, the all-items group still hears of it
+    publish([found.get(pk, (pk, 0, 0, STATUS_GONE, None)) for pk in item_ids])
+
+
+def publish(rows):
+    """Send ``(id, in_stock, reserved, status, category_id)`` rows to their groups."""
+    if get_channel_layer() is not None:
+        async_to_sync(apublish)(rows)
+
+
+async def apublish(rows):
+    layer = get_channel_layer()
+    by_group = defaultdict(list)
+    for pk, in_stock, reserved, state, category_id in rows:
+        delta = [pk, in_stock, reserved, state]
+        by_group[ALL_GROUP].append(delta)
+        if category_id is not None:
+            by_group[category_group(category_id)].append(delta)
+    # Concurrent, so a batching layer sends them all in one round
+    await asyncio.gather(*(
+        layer.group_send(group, {"type": "items.delta", "group": group, "items": deltas[start:start + CHUNK]})
+        for group, deltas in by_group.items()
+        for start in range(0, len(deltas), CHUNK)
+    ))
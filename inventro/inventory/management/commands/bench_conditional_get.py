@@ -0,0 +1,44 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+
+from inventory.models import Item
+
+
+class Command(BaseCommand):
+    help = (
+        "Time polling the items/categories APIs when nothing has changed: a plain "
+        "GET that re-serializes the data versus a conditional GET answered with 304."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--polls", type=int, default=5)
+
+    def handle(self, *args, **options):
+        client = Client()
+        item_id = Item.objects.values_list("pk", flat=True).first()
+        urls = ["/api/items/", "/api/categories/"]
+        if item_id:
+            urls.append(f"/api/items/{item_id}/")
+
+        self.stdout.write(f"{Item.objects.count():,} items ({connection.vendor})")
+        for url in urls:
+            first = client.get(url, HTTP_ACCEPT="application/json")
+            validators = {"HTTP_IF_NONE_MATCH": first["ETag"]}
+            for label, headers in (("full", {}), ("304", validators)):
+                timings, queries = [], []
+                for _ in range(options["polls"]):
+                    executed = []
+                    with connection.execute_wrapper(lambda execute, *args: executed.append(1) or execute(*args)):
+                        start = time.perf_counter()
+                        response = client.get(url, HTTP_ACCEPT="application/json", **headers)
+                        size, code = len(response.content), response.status_code
+                        timings.append((time.perf_counter() - start) * 1000)
+                    queries = len(executed)
+                self.stdout.write(
+                    f"  {url:<22} {label:>4}: {code}  median {statistics.median(timings):8.2f} ms  "
+                    f"{queries} queries  {size:,} bytes"
+                )
@@ -0,0 +1,84 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from inventory.models import Item, ItemCategory
+from inventory.serializers import ItemRowBuilder, ItemSerializer, item_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rendering an item listing with ItemSerializer(many=True) and with "
+        "the item_rows fast path: checks the JSON is byte-identical (with DRF's and "
+        "the configured JSON renderer) and times both with the configured renderer, "
+        "as GET /api/items/ renders them. Missing rows are seeded in a transaction "
+        "that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        # What the list endpoint renders JSON with
+        renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+        with transaction.atomic():
+            missing = rows - Item.objects.count()
+            if missing > 0:
+                category, _ = ItemCategory.objects.get_or_create(name="Benchmark")
+                Item.objects.bulk_create([
+                    Item(name=f"Serializer bench {i}", sku=f"SB-{i:07d}", in_stock=i % 40, total_amount=40,
+                         low_stock_bar=20, cost=f"{i % 997}.{i % 100:02d}", category=category,
+                         location=None if i % 3 else "Shelf 1", description="" if i % 2 else None)
+                    for i in range(missing)
+                ], batch_size=5000)
+            queryset = Item.objects.select_related("category")[:rows]
+
+            for label, context in (("full", {}), ("sparse", {"fields": {"id", "sku", "name", "in_stock", "category"}})):
+                slow_data = ItemSerializer(queryset, many=True, context=context).data
+                fast_data = item_rows(queryset, context)
+                identical = True
+                for check in (JSONRenderer(), renderer):
+                    if check.render(slow_data) != check.render(fast_data):
+                        identical = False
+                        self.stderr.write(self.style.ERROR(
+                            f"{label}: fast path output differs with {type(check).__name__}"
+                        ))
+                fast = renderer.render(fast_data)
+                self.stdout.write(
+                    f"{label}: {rows:,} rows, {len(fast):,} bytes, identical={identical} "
+                    f"({type(renderer).__name__}, {connection.vendor})"
+                )
+
+                # End to end: query + serialize + render
+                self._report("query+render", options["repeat"],
+                             lambda: renderer.render(ItemSerializer(queryset, many=True, context=context).data),
+                             lambda: renderer.render(item_rows(queryset, context)))
+
+                # Serialization alone, from rows already fetched
+                instances = list(queryset)
+                builder = ItemRowBuilder(context, connection.vendor)
+                tuples = list(queryset.values_list(*builder.lookups))
+                self._report("serialize", options["repeat"],
+                             lambda: ItemSerializer(instances, many=True, context=context).data,
+                             lambda: builder.build(tuples))
+            transaction.set_rollback(True)
+
+    def _report(self, label, repeat, slow, fast):
+        slow_ms, fast_ms = self._time(slow, repeat), self._time(fast, repeat)
+        self.stdout.write(
+            f"  {label:<13} serializer {slow_ms:8.1f} ms  fast path {fast_ms:7.1f} ms  x{slow_ms / fast_ms:.1f}"
+        )
+
+    def _time(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,54 @@
+import gzip
+import io
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from inventory.models import Item
+from inventory.renderers import MessagePackParser, MessagePackRenderer, UJSONParser, UJSONRenderer
+from inventory.serializers import item_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare payload size and encode/decode time of the /api/items/ listing "
+        "with DRF's JSON renderer, ujson and MessagePack."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000, help="Items in the payload (0 = all).")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        queryset = Item.objects.select_related("category")
+        if options["rows"]:
+            queryset = queryset[:options["rows"]]
+        data = item_rows(queryset)
+        self.stdout.write(f"/api/items/ payload: {len(data):,} items")
+
+        formats = [
+            ("json (stdlib)", JSONRenderer(), JSONParser()),
+            ("ujson", UJSONRenderer(), UJSONParser()),
+            ("msgpack", MessagePackRenderer(), MessagePackParser()),
+        ]
+        for label, renderer, parser in formats:
+            body = renderer.render(data)
+            encode = self._time(lambda: renderer.render(data), options["repeat"])
+            decode = self._time(lambda: parser.parse(io.BytesIO(body)), options["repeat"])
+            if parser.parse(io.BytesIO(body)) != data:
+                self.stderr.write(self.style.ERROR(f"{label}: round trip changed the data"))
+            self.stdout.write(
+                f"  {label:<14} {len(body):>12,} bytes  gzip {len(gzip.compress(body, 6)):>10,} bytes  "
+                f"encode {encode:7.1f} ms  decode {decode:7.1f} ms"
+            )
+
+    def _time(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
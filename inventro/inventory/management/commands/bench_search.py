@@ -0,0 +1,85 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from inventory.models import Item, ItemCategory
+from inventory.views import filtered_items
+
+WORDS = [
+    "wireless", "microphone", "mixer", "cable", "speaker", "stand", "light", "dimmer",
+    "projector", "camera", "tripod", "harness", "curtain", "fog", "hazer", "case",
+    "amplifier", "monitor", "switch", "battery", "gel", "clamp", "truss", "rope",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic items in growing batches and time the inventory quick "
+        "filter (filtered_items) at each size. Everything is rolled back afterwards "
+        "unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--keep", action="store_true", help="Commit the seeded rows.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(149302573)
+
+        with transaction.atomic():
+            category, _ = ItemCategory.objects.get_or_create(name="Benchmark")
+            seeded = 0
+            for size in sorted(options["sizes"]):
+                seeded += self._seed(category, seeded, size - seeded, options["batch_size"], rng)
+                if connection.vendor == "postgresql":
+                    with connection.cursor() as cursor:
+                        cursor.execute("ANALYZE inventory_item")
+
+                terms = [self._term(rng, seeded) for _ in range(options["queries"])]
+                timings = []
+                for term in terms:
+                    start = time.perf_counter()
+                    list(filtered_items({"q": term}).order_by("name", "id")[:25])
+                    timings.append((time.perf_counter() - start) * 1000)
+
+                timings.sort()
+                self.stdout.write(
+                    f"{size:>10,} items  median {statistics.median(timings):7.2f} ms  "
+                    f"p95 {timings[int(len(timings) * 0.95) - 1]:7.2f} ms  ({connection.vendor})"
+                )
+
+            if not options["keep"]:
+                transaction.set_rollback(True)
+
+    def _term(self, rng, seeded):
+        # What people type into the quick filter: part of a SKU, or a word
+        # fragment plus the distinguishing number of the item they want
+        i = rng.randrange(seeded)
+        if rng.random() < 0.5:
+            return f"{i:07d}"[-rng.choice((4, 5, 6)):]
+        name = Item.objects.filter(sku=f"BN-{i:07d}").values_list("name", flat=True).first()
+        return name.split(" ", 1)[1][2:]
+
+    def _seed(self, category, offset, count, batch_size, rng):
+        created = 0
+        while created < count:
+            batch = []
+            for i in range(offset + created, offset + created + min(batch_size, count - created)):
+                amount = rng.randint(1, 50)
+                batch.append(Item(
+                    name=f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}",
+                    sku=f"BN-{i:07d}",
+                    in_stock=amount,
+                    total_amount=amount,
+                    low_stock_bar=max(amount // 2, 1),
+                    cost=rng.randint(150, 2000),
+                    category=category,
+                ))
+            Item.objects.bulk_create(batch)
+            created += len(batch)
+        return created
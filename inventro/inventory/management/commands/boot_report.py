@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+# Loads the WSGI application in a fresh interpreter, like a gunicorn worker,
+# and reports what that cost
+PROBE = r"""
+import json, resource, sys, time
+
+def rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+start = time.perf_counter()
+from inventro.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+report = {"boot_ms": (time.perf_counter() - start) * 1000, "rss_mib": rss(), "lazy": {}}
+report["loaded"] = [name for name in sys.argv[1:] if name in sys.modules]
+for name in sys.argv[1:]:
+    if name in sys.modules:
+        continue
+    before, begin = rss(), time.perf_counter()
+    __import__(name)
+    report["lazy"][name] = [(time.perf_counter() - begin) * 1000, rss() - before]
+print(json.dumps(report))
+"""
+
+HEAVY = ["pandas", "numpy", "requests", "msgpack"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the import time and peak RSS of loading the application in a fresh "
+        "worker process, which heavy modules it loads at boot, and what the lazily "
+        "imported ones would have added."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="Fresh processes to sample (median reported).")
+        parser.add_argument("--module", action="append", default=[], help="Extra module to account for.")
+
+    def handle(self, *args, **options):
+        modules = HEAVY + options["module"]
+        env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+        samples = []
+        for _ in range(max(options["runs"], 1)):
+            output = subprocess.run(
+                [sys.executable, "-c", PROBE, *modules], env=env, capture_output=True, text=True, check=True
+            ).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+
+        samples.sort(key=lambda sample: sample["boot_ms"])
+        median = samples[len(samples) // 2]
+        self.stdout.write(f"Application boot ({len(samples)} fresh processes, median):")
+        self.stdout.write(f"  import + URLconf  {median['boot_ms']:8.1f} ms")
+        self.stdout.write(f"  peak RSS          {median['rss_mib']:8.1f} MiB")
+        self.stdout.write(f"  heavy modules loaded at boot: {', '.join(median['loaded']) or 'none'}")
+        if median["lazy"]:
+            self.stdout.write("  deferred until first use (import time / RSS they would add):")
+            for name, (ms, mib) in median["lazy"].items():
+                self.stdout.write(f"    {name:<12} {ms:8.1f} ms  {mib:6.1f} MiB")
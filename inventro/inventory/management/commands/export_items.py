@@ -0,0 +1,35 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from inventory.exporting import CHUNK_SIZE, FORMATS, export_lines
+from inventory.views import filtered_items
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream the inventory as CSV or NDJSON to a file or stdout, with the same "
+        "filters as the inventory page (--q, --category, --status)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(FORMATS), default="csv")
+        parser.add_argument("--output", "-o", help="File to write (default: stdout).")
+        parser.add_argument("--q", default="", help="Quick-filter text (name, SKU, description).")
+        parser.add_argument("--category", default="")
+        parser.add_argument("--status", choices=["in", "low", "out"])
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        params = {key: options[key] for key in ("q", "category", "status") if options[key]}
+        queryset = filtered_items(params)
+        blocks = export_lines(queryset, options["format"], options["chunk_size"])
+
+        if not options["output"]:
+            for block in blocks:
+                sys.stdout.write(block)
+            return
+        with open(options["output"], "w", encoding="utf-8", newline="") as out:
+            for block in blocks:
+                out.write(block)
+        self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,111 @@
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for OpenSearch (index creation, _bulk, GET/DELETE "
+        "_doc, _count) to try `manage.py sync_search` without a cluster. "
+        "Documents live in memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=9200)
+        parser.add_argument("--fail-rate", type=float, default=0.0,
+                            help="Share of _bulk requests answered with a 503 (default: 0).")
+        parser.add_argument("--reject-rate", type=float, default=0.0,
+                            help="Share of _bulk operations rejected with a 429 (default: 0).")
+
+    def handle(self, *args, **options):
+        indices, lock = {}, threading.Lock()
+        fail_rate, reject_rate = options["fail_rate"], options["reject_rate"]
+        stdout = self.stdout
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _body(self):
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode()
+
+            def _path(self):
+                return [part for part in self.path.split("?")[0].split("/") if part]
+
+            def do_PUT(self):
+                parts, body = self._path(), self._body()
+                with lock:
+                    if len(parts) == 1:
+                        if parts[0] in indices:
+                            return self._reply(400, {"error": {"type": "resource_already_exists_exception"}})
+                        indices[parts[0]] = {}
+                        return self._reply(200, {"acknowledged": True, "index": parts[0]})
+                    if len(parts) == 3 and parts[1] == "_doc":
+                        indices.setdefault(parts[0], {})[parts[2]] = json.loads(body)
+                        return self._reply(200, {"result": "updated", "_id": parts[2]})
+                self._reply(404, {"error": "not found"})
+
+            def do_POST(self):
+                parts, body = self._path(), self._body()
+                if parts != ["_bulk"]:
+                    return self._reply(404, {"error": "not found"})
+                if random.random() < fail_rate:
+                    return self._reply(503, {"error": "unavailable"})
+                lines = iter(line for line in body.splitlines() if line.strip())
+                items, errors = [], False
+                with lock:
+                    for line in lines:
+                        (action, meta), = json.loads(line).items()
+                        docs = indices.setdefault(meta["_index"], {})
+                        doc = json.loads(next(lines)) if action in ("index", "create") else None
+                        if random.random() < reject_rate:
+                            errors = True
+                            items.append({action: {"_id": meta["_id"], "status": 429,
+                                                   "error": {"type": "es_rejected_execution_exception"}}})
+                        elif action == "delete":
+                            status = 200 if docs.pop(meta["_id"], None) is not None else 404
+                            items.append({action: {"_id": meta["_id"], "status": status}})
+                        else:
+                            docs[meta["_id"]] = doc
+                            items.append({action: {"_id": meta["_id"], "status": 200}})
+                self._reply(200, {"took": 1, "errors": errors, "items": items})
+
+            def do_GET(self):
+                parts = self._path()
+                with lock:
+                    if len(parts) == 2 and parts[1] == "_count":
+                        return self._reply(200, {"count": len(indices.get(parts[0], {}))})
+                    if len(parts) == 3 and parts[1] == "_doc":
+                        doc = indices.get(parts[0], {}).get(parts[2])
+                        if doc is None:
+                            return self._reply(404, {"_id": parts[2], "found": False})
+                        return self._reply(200, {"_id": parts[2], "found": True, "_source": doc})
+                self._reply(404, {"error": "not found"})
+
+            def do_DELETE(self):
+                parts = self._path()
+                with lock:
+                    if len(parts) == 3 and parts[1] == "_doc":
+                        found = indices.get(parts[0], {}).pop(parts[2], None) is not None
+                        return self._reply(200 if found else 404, {"_id": parts[2]})
+                self._reply(404, {"error": "not found"})
+
+            def log_message(self, format, *args):
+                stdout.write(f"{self.command} {self.path} {args[1] if len(args) > 1 else ''}")
+
+        server = ThreadingHTTPServer(("127.0.0.1", options["port"]), Handler)
+        self.stdout.write(self.style.SUCCESS(f"Fake OpenSearch on http://127.0.0.1:{options['port']}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,74 @@
+import time
+from pathlib import Path
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from inventory import alerts, autocomplete, rollups
+from inventory.importing import REQUIRED_COLUMNS, normalize_chunk, resolve_categories, upsert_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import items from a CSV (name,sku,total_amount,cost,category[,location][,in_stock]), "
+        "upserting on SKU. Rows that fail validation are written to a rejects file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file to import.")
+        parser.add_argument("--chunk-size", type=int, default=10_000, help="Rows per batch/transaction.")
+        parser.add_argument("--rejects", help="Where to write rejected rows (default: <path>.rejects.csv).")
+        parser.add_argument("--create-categories", action="store_true", help="Create unknown categories.")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only; write nothing.")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"{path} does not exist.")
+        rejects_path = Path(options["rejects"] or f"{path}.rejects.csv")
+
+        header = pd.read_csv(path, nrows=0).columns
+        missing = [column for column in REQUIRED_COLUMNS if column not in header]
+        if missing:
+            raise CommandError(f"{path} is missing column(s): {', '.join(missing)}")
+
+        categories = {}
+        total = inserted = updated = rejected = 0
+        started = time.perf_counter()
+        chunks = pd.read_csv(path, chunksize=options["chunk_size"], dtype=str, keep_default_na=False)
+        rejects_path.unlink(missing_ok=True)
+
+        for chunk in chunks:
+            chunk.index += 2  # report CSV line numbers (line 1 is the header)
+            names = chunk["category"].str.strip().unique()
+            resolve_categories(names, categories, create=options["create_categories"] and not options["dry_run"])
+            rows, rejects = normalize_chunk(chunk, categories)
+
+            if not options["dry_run"]:
+                chunk_inserted, chunk_updated = upsert_rows(rows)
+                inserted += chunk_inserted
+                updated += chunk_updated
+            if not rejects.empty:
+                rejects.to_csv(rejects_path, mode="a", header=not rejected, index_label="line")
+                rejected += len(rejects)
+
+            total += len(chunk)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{total:>10,} rows  {inserted:,} inserted  {updated:,} updated  "
+                f"{rejected:,} rejected  ({total / elapsed:,.0f} rows/s)"
+            )
+
+        if inserted or updated:
+            # Pick up the bulk writes everywhere; they bypass the Item signals
+            autocomplete.request_rebuild()
+            rollups.rebuild()
+            alerts.sync()
+
+        summary = f"Imported {path.name} via {connection.vendor}: {inserted:,} inserted, {updated:,} updated"
+        if options["dry_run"]:
+            summary = f"Validated {path.name}: {total - rejected:,} rows OK"
+        self.stdout.write(self.style.SUCCESS(summary))
+        if rejected:
+            self.stdout.write(self.style.WARNING(f"{rejected:,} rows rejected; see {rejects_path}"))
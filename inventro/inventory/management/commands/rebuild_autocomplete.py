@@ -0,0 +1,53 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.autocomplete import AutocompleteIndex, active_rows, request_rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Ask every worker to rebuild its in-memory autocomplete index, and report "
+        "the build time, memory footprint and search latency of a fresh index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queries", type=int, default=1000, help="Sample searches to time.")
+        parser.add_argument("--no-signal", action="store_true", help="Only report; do not bump the generation.")
+
+    def handle(self, *args, **options):
+        index = AutocompleteIndex()
+        start = time.perf_counter()
+        index.build(active_rows())
+        build_ms = (time.perf_counter() - start) * 1000
+
+        footprint = index.footprint()
+        self.stdout.write(f"Built index of {len(index)} items in {build_ms:.1f} ms")
+        for key, value in footprint.items():
+            if key.endswith("_bytes"):
+                self.stdout.write(f"  {key[:-6]:<10} {value / 1024 / 1024:8.2f} MiB")
+            else:
+                self.stdout.write(f"  {key:<10} {value:>8,}")
+
+        names = [doc[0] for doc in index._docs.values()]
+        if names and options["queries"]:
+            rng = random.Random(0)
+            timings = []
+            for _ in range(options["queries"]):
+                name = rng.choice(names).lower()
+                begin = rng.randrange(max(len(name) - 3, 1))
+                term = name[begin:begin + rng.choice((1, 2, 3, 5, 8))]
+                start = time.perf_counter()
+                index.search(term)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"Search latency over {len(timings)} queries: median {statistics.median(timings):.3f} ms, "
+                f"p99 {timings[int(len(timings) * 0.99) - 1]:.3f} ms"
+            )
+
+        if not options["no_signal"]:
+            request_rebuild()
+            self.stdout.write(self.style.SUCCESS("Workers will rebuild their index on their next sync."))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-category rollup table from the items, or with --check "
+        "report where it has drifted from them (non-zero exit if it has)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Only compare; change nothing.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options["check"]:
+            problems = rollups.drift()
+            elapsed = (time.perf_counter() - start) * 1000
+            for category_id, counter, stored, actual in problems:
+                self.stdout.write(f"  category {category_id}: {counter} is {stored}, items say {actual}")
+            if problems:
+                raise CommandError(
+                    f"{len(problems)} rollup value(s) out of date; run rebuild_category_rollups to fix."
+                )
+            self.stdout.write(self.style.SUCCESS(f"Category rollups are consistent ({elapsed:.1f} ms)."))
+            return
+
+        count = rollups.rebuild()
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} category rollups in {elapsed:.1f} ms."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from inventory.alerts import DIGEST_WINDOW, send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        "Email one digest of the pending low-stock alerts to each recipient once the "
+        "oldest has waited --window seconds. Meant to run every minute from a CronJob."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--window", type=int, default=DIGEST_WINDOW,
+                            help="Seconds to collect alerts before sending (default: %(default)s).")
+        parser.add_argument("--force", action="store_true", help="Send whatever is pending now.")
+
+    def handle(self, *args, **options):
+        result = send_digests(window=options["window"], force=options["force"])
+        if result["items"]:
+            self.stdout.write(self.style.SUCCESS(
+                f"Sent {result['emails']} digest email(s) covering {result['items']} item(s)."
+            ))
+        else:
+            self.stdout.write(f"Nothing to send; {result['pending']} alert(s) waiting.")
@@ -0,0 +1,34 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.history import take_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Record today's (or --date's) daily inventory snapshot: per-category totals and "
+        "the items that changed since the previous run. Meant to run daily from a CronJob."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Day to record as, YYYY-MM-DD (default: today).")
+        parser.add_argument("--full", action="store_true", help="Compare every item, not just updated ones.")
+
+    def handle(self, *args, **options):
+        day = None
+        if options["date"]:
+            try:
+                day = date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError(f"--date must be YYYY-MM-DD, not {options['date']!r}.")
+
+        start = time.perf_counter()
+        result = take_snapshot(day, full=options["full"])
+        elapsed = (time.perf_counter() - start) * 1000
+        mode = "full" if result["full"] else "incremental"
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot for {result['date']} ({mode}): {result['categories']} categories, "
+            f"{result['items']} changed items in {elapsed:.1f} ms."
+        ))
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from inventory import search_sync
+from inventory.models import SearchOutbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Send queued item changes to OpenSearch with _bulk requests. Runs until "
+        "stopped, polling every --interval seconds; --once drains what is due and exits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the due rows and exit.")
+        parser.add_argument("--batch-size", type=int, default=search_sync.BATCH_SIZE,
+                            help="Outbox rows per _bulk request (default: %(default)s).")
+        parser.add_argument("--interval", type=float, default=1.0,
+                            help="Seconds to wait when nothing is due (default: %(default)s).")
+
+    def handle(self, *args, **options):
+        if not search_sync.enabled():
+            self.stdout.write(self.style.WARNING("OPENSEARCH_URL not set; nothing to sync."))
+            return
+
+        totals = {"rows": 0, "indexed": 0, "deleted": 0, "failed": 0}
+        try:
+            while True:
+                close_old_connections()
+                start = time.perf_counter()
+                result = search_sync.drain(options["batch_size"])
+                if result["rows"]:
+                    elapsed = (time.perf_counter() - start) * 1000
+                    self.stdout.write(
+                        f"{result['rows']} rows -> {result['items']} items: {result['indexed']} indexed, "
+                        f"{result['deleted']} deleted, {result['failed']} failed in {elapsed:.1f} ms"
+                    )
+                    for key in totals:
+                        totals[key] += result[key]
+                # Keep going through a backlog unless the whole batch failed
+                if result["rows"] == options["batch_size"] and result["failed"] < result["items"]:
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        pending = SearchOutbox.objects.count()
+        self.stdout.write(self.style.SUCCESS(
+            f"Synced {totals['rows']} rows: {totals['indexed']} indexed, {totals['deleted']} deleted, "
+            f"{totals['failed']} failed; {pending} rows still queued."
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from inventro.boot import STEPS, warm
+
+
+class Command(BaseCommand):
+    help = (
+        "Prime the caches a fresh worker would otherwise fill on its first requests "
+        "(URLs, templates, database connection, dashboard snapshot, autocomplete index)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only", nargs="+", choices=STEPS, default=STEPS, metavar="STEP",
+            help=f"Steps to run (default: all of {', '.join(STEPS)}).",
+        )
+
+    def handle(self, *args, **options):
+        total = 0.0
+        for step, ms, error in warm(options["only"]):
+            total += ms
+            line = f"  {step:<13} {ms:9.1f} ms"
+            self.stdout.write(self.style.WARNING(f"{line}  failed: {error}") if error else line)
+        self.stdout.write(self.style.SUCCESS(f"Warm-up done in {total:.1f} ms."))
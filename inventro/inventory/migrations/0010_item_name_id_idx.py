@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_remove_item_price_alter_item_category_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['name', 'id'], name='inventory_item_name_id_idx'),
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:32
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # Django renders icontains as UPPER(col) LIKE UPPER(%s); index that expression
+    "CREATE INDEX IF NOT EXISTS inventory_item_name_trgm ON inventory_item USING gin (UPPER(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS inventory_item_sku_trgm ON inventory_item USING gin (UPPER(sku) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS inventory_item_search_vector ON inventory_item USING gin (search_vector)",
+    """
+    CREATE OR REPLACE FUNCTION inventory_item_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.sku, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER inventory_item_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON inventory_item
+    FOR EACH ROW EXECUTE FUNCTION inventory_item_search_vector_update()
+    """,
+    # Touch every row once so the trigger backfills existing items
+    "UPDATE inventory_item SET name = name",
+]
+
+POSTGRES_REVERSE = [
+    "DROP TRIGGER IF EXISTS inventory_item_search_vector_trigger ON inventory_item",
+    "DROP FUNCTION IF EXISTS inventory_item_search_vector_update()",
+    "DROP INDEX IF EXISTS inventory_item_search_vector",
+    "DROP INDEX IF EXISTS inventory_item_sku_trgm",
+    "DROP INDEX IF EXISTS inventory_item_name_trgm",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS inventory_item_fts USING fts5(
+        name, sku, content='inventory_item', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS inventory_item_fts_ai AFTER INSERT ON inventory_item BEGIN
+        INSERT INTO inventory_item_fts(rowid, name, sku) VALUES (new.id, new.name, new.sku);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS inventory_item_fts_ad AFTER DELETE ON inventory_item BEGIN
+        INSERT INTO inventory_item_fts(inventory_item_fts, rowid, name, sku) VALUES ('delete', old.id, old.name, old.sku);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS inventory_item_fts_au AFTER UPDATE OF name, sku ON inventory_item BEGIN
+        INSERT INTO inventory_item_fts(inventory_item_fts, rowid, name, sku) VALUES ('delete', old.id, old.name, old.sku);
+        INSERT INTO inventory_item_fts(rowid, name, sku) VALUES (new.id, new.name, new.sku);
+    END
+    """,
+    "INSERT INTO inventory_item_fts(inventory_item_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS inventory_item_fts_au",
+    "DROP TRIGGER IF EXISTS inventory_item_fts_ad",
+    "DROP TRIGGER IF EXISTS inventory_item_fts_ai",
+    "DROP TABLE IF EXISTS inventory_item_fts",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_item_name_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": POSTGRES_REVERSE, "sqlite": SQLITE_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_item_updated_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_name', models.CharField(max_length=255)),
+                ('delta', models.IntegerField()),
+                ('in_stock_after', models.IntegerField()),
+                ('reason', models.CharField(choices=[('created', 'Created'), ('checkout', 'Checkout'), ('return', 'Return'), ('adjustment', 'Adjustment'), ('deleted', 'Deleted')], max_length=20)),
+                ('source', models.CharField(choices=[('web', 'Web'), ('api', 'API'), ('admin', 'Admin')], max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to=settings.AUTH_USER_MODEL)),
+                ('item', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movements', to='inventory.item')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at', 'id'], name='inventory_move_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:39
+
+import inventory.models
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_reserved(apps, schema_editor):
+    """Existing cart lines become reservations; count them into Item.reserved."""
+    Item = apps.get_model('inventory', 'Item')
+    CartItem = apps.get_model('inventory', 'CartItem')
+    held = (
+        CartItem.objects.filter(item=OuterRef('pk'))
+        .values('item')
+        .annotate(total=Sum('quantity'))
+        .values('total')
+    )
+    Item.objects.filter(carts__isnull=False).distinct().update(
+        reserved=Coalesce(Subquery(held), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_stockmovement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartitem',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, default=inventory.models.reservation_expiry),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='reserved',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_reserved, migrations.RunPython.noop),
+    ]
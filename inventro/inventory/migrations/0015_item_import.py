@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_cart_reservations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='source',
+            field=models.CharField(choices=[('web', 'Web'), ('api', 'API'), ('admin', 'Admin'), ('import', 'Import')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['sku'], name='inventory_item_sku_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, Q, Sum
+
+
+def build_rollups(apps, schema_editor):
+    Item = apps.get_model('inventory', 'Item')
+    ItemCategory = apps.get_model('inventory', 'ItemCategory')
+    CategoryRollup = apps.get_model('inventory', 'CategoryRollup')
+    totals = {
+        row.pop('category_id'): row
+        for row in Item.objects.filter(is_active=True)
+        .order_by()
+        .values('category_id')
+        .annotate(
+            item_count=Count('pk'),
+            units_in_stock=Sum('in_stock'),
+            value=Sum(F('cost') * F('in_stock'), output_field=DecimalField(max_digits=20, decimal_places=2)),
+            low_stock_count=Count('pk', filter=Q(in_stock__gt=0, in_stock__lte=F('low_stock_bar'))),
+            out_of_stock_count=Count('pk', filter=Q(in_stock__lte=0)),
+        )
+    }
+    CategoryRollup.objects.bulk_create([
+        CategoryRollup(category_id=pk, **{key: value or 0 for key, value in totals.get(pk, {}).items()})
+        for pk in ItemCategory.objects.values_list('pk', flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0015_item_import'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryRollup',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='inventory.itemcategory')),
+                ('item_count', models.IntegerField(default=0)),
+                ('units_in_stock', models.BigIntegerField(default=0)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('low_stock_count', models.IntegerField(default=0)),
+                ('out_of_stock_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0016_category_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryDailySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('item_count', models.IntegerField(default=0)),
+                ('units_in_stock', models.BigIntegerField(default=0)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('low_stock_count', models.IntegerField(default=0)),
+                ('out_of_stock_count', models.IntegerField(default=0)),
+                ('taken_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_snapshots', to='inventory.itemcategory')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'category'), name='inventory_catsnap_date_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemDailySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('in_stock', models.IntegerField()),
+                ('cost', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('is_active', models.BooleanField()),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.itemcategory')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_snapshots', to='inventory.item')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('item', 'date'), name='inventory_itemsnap_item_date_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def seed_alerts(apps, schema_editor):
+    # Items already low count as alerted, so the first digest is not a backlog of old news
+    Item = apps.get_model('inventory', 'Item')
+    LowStockAlert = apps.get_model('inventory', 'LowStockAlert')
+    now = django.utils.timezone.now()
+    low = Item.objects.filter(is_active=True, in_stock__lte=F('low_stock_bar')).values_list('pk', flat=True)
+    LowStockAlert.objects.bulk_create([
+        LowStockAlert(item_id=pk, triggered_at=now, notified_at=now) for pk in low.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0018_search_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LowStockAlert',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='low_stock_alert', serialize=False, to='inventory.item')),
+                ('triggered_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('notified_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('notified_at__isnull', True)), fields=['triggered_at'], name='inventory_alert_pending_idx')],
+            },
+        ),
+        migrations.RunPython(seed_alerts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0019_low_stock_alerts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelGroupMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group_name', models.CharField(max_length=100)),
+                ('channel', models.CharField(max_length=200)),
+                ('pg_channel', models.CharField(max_length=63)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'channel_layer_group',
+                'indexes': [models.Index(fields=['group_name', 'pg_channel'], name='channel_layer_group_pg_idx')],
+                'constraints': [models.UniqueConstraint(fields=('group_name', 'channel'), name='channel_layer_group_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChannelMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pg_channel', models.CharField(max_length=63)),
+                ('payload', models.BinaryField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'channel_layer_message',
+                'indexes': [models.Index(fields=['pg_channel', 'id'], name='channel_layer_msg_chan_idx'), models.Index(fields=['created_at'], name='channel_layer_msg_created_idx')],
+            },
+        ),
+    ]
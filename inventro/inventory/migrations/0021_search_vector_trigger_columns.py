@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# Only the searched columns feed search_vector; stock and reservation updates
+# no longer recompute it
+POSTGRES_FORWARD = [
+    "DROP TRIGGER IF EXISTS inventory_item_search_vector_trigger ON inventory_item",
+    """
+    CREATE TRIGGER inventory_item_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, sku, description ON inventory_item
+    FOR EACH ROW EXECUTE FUNCTION inventory_item_search_vector_update()
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "DROP TRIGGER IF EXISTS inventory_item_search_vector_trigger ON inventory_item",
+    """
+    CREATE TRIGGER inventory_item_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON inventory_item
+    FOR EACH ROW EXECUTE FUNCTION inventory_item_search_vector_update()
+    """,
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0020_channel_layer_tables'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD}),
+            _run({"postgresql": POSTGRES_REVERSE}),
+        ),
+    ]
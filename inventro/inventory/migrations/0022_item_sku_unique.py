@@ -0,0 +1,34 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_skus(apps, schema_editor):
+    """Refuse to guess which of several items sharing a SKU keeps it."""
+    Item = apps.get_model('inventory', 'Item')
+    duplicates = list(
+        Item.objects.values('sku').annotate(n=Count('pk')).filter(n__gt=1).values_list('sku', flat=True)[:20]
+    )
+    if duplicates:
+        raise RuntimeError(
+            'Items share these SKUs; give each item its own SKU before migrating: ' + ', '.join(duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0021_search_vector_trigger_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_skus, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='item',
+            name='inventory_item_sku_idx',
+        ),
+        migrations.AlterField(
+            model_name='item',
+            name='sku',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+    ]
@@ -1,11 +1,32 @@
+from datetime import timedelta
+
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.utils import timezone
 from authentication.models import User
 
 
 class ItemCategory(models.Model):
     name = models.CharField(max_length=50, unique=True)
 
+
+def reservation_expiry():
+    """Default ``CartItem.expires_at``: ``INVENTRO_CART_RESERVATION_TTL`` seconds from now."""
+    ttl = getattr(settings, "INVENTRO_CART_RESERVATION_TTL", 30 * 60)
+    return timezone.now() + timedelta(seconds=ttl)
+
+
+class ItemQuerySet(models.QuerySet):
+    def with_available(self):
+        """
+        Annotate each item with ``available``: ``in_stock`` minus the stock
+        held by live cart reservations. ``reserved`` is maintained by
+        ``inventory.reservations``, so this is a column read, not an aggregate.
+        """
+        return self.annotate(available=models.F("in_stock") - models.F("reserved"))
+
+
 class Item(models.Model):
     """
     Core inventory item model.
@@ -21,8 +42,11 @@ class Item(models.Model):
 
     name = models.CharField(max_length=255)
     
-    sku = models.CharField(max_length=50)
+    # Unique: bulk imports upsert on SKU (manage.py import_items)
+    sku = models.CharField(max_length=50, unique=True)
     in_stock = models.IntegerField()
+    # Units held by unexpired cart lines; see inventory.reservations
+    reserved = models.PositiveIntegerField(default=0)
     low_stock_bar = models.IntegerField()
     total_amount = models.IntegerField()
     location = models.TextField()
@@ -38,6 +62,9 @@ class Item(models.Model):
     location = models.CharField(max_length=255, null=True, blank=True)
     description = models.TextField(null=True, blank=True)
 
+    # Postgres-only full-text document, maintained by a trigger (migration 0011)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -56,8 +83,126 @@ class Item(models.Model):
         related_name="inventory_items_updated",
     )
 
+    objects = ItemQuerySet.as_manager()
+
     class Meta:
         ordering = ["name"]
+        indexes = [
+            # Backs keyset pagination of the inventory table on (name, id)
+            models.Index(fields=["name", "id"], name="inventory_item_name_id_idx"),
+            # Lets workers catch up on recently changed rows (autocomplete sync)
+            models.Index(fields=["updated_at"], name="inventory_item_updated_idx"),
+        ]
+
+    # Fields that feed CategoryRollup (see inventory.rollups)
+    ROLLUP_FIELDS = ("category_id", "is_active", "in_stock", "cost", "low_stock_bar")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Snapshot the loaded values: signal handlers compare against them and
+        # save() writes only the columns that changed
+        instance._loaded_values = instance.field_values()
+        # Remember the loaded rollup inputs for rollups.record() after bulk writes
+        if not instance.get_deferred_fields().intersection(cls.ROLLUP_FIELDS):
+            instance._rollup_state = instance.rollup_state()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # Also runs when a deferred field is first read
+        self._mark_loaded(fields)
+
+    def _mark_loaded(self, fields=None):
+        """Record the current values of ``fields`` (default: all) as the stored ones."""
+        current = self.field_values()
+        if fields is not None:
+            attnames = {self._meta.get_field(name).attname for name in fields}
+            current = {name: value for name, value in current.items() if name in attnames}
+        self._loaded_values = {**getattr(self, "_loaded_values", {}), **current}
+
+    def field_values(self) -> dict:
+        """Current values of the loaded (non-deferred) columns, by attname."""
+        return {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname in self.__dict__
+        }
+
+    def loaded_value(self, attname, default=None):
+        """``attname`` as last loaded or saved; ``default`` for a new item."""
+        return getattr(self, "_loaded_values", {}).get(attname, default)
+
+    def changed_fields(self):
+        """
+        Attnames whose value differs from the loaded one, or ``None`` when
+        the item was not loaded from the database (everything counts as new).
+        """
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            return None
+        return {
+            name for name, value in self.field_values().items()
+            if name not in loaded or loaded[name] != value
+        }
+
+    def has_changed(self, *attnames) -> bool:
+        """Whether any of ``attnames`` differs from its loaded value (in post_save: from before the save)."""
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            return True
+        return any(name not in loaded or loaded[name] != getattr(self, name) for name in attnames)
+
+    def save(self, *args, **kwargs):
+        # A loaded item writes only its changed columns, and nothing at all
+        # when nothing changed; explicit update_fields / force_* are honored
+        if (
+            not self._state.adding and not args and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert") and not kwargs.get("force_update")
+        ):
+            changed = self.changed_fields()
+            if changed is not None:
+                if not changed:
+                    return
+                kwargs["update_fields"] = changed | {"updated_at"}
+        super().save(*args, **kwargs)
+        self._mark_loaded(kwargs.get("update_fields"))
+
+    def _rollup_filter(self, state) -> dict:
+        return dict(zip(self.ROLLUP_FIELDS, state))
+
+    def stored_rollup_state(self, expected=None, using=None):
+        """
+        The rollup columns of this row as stored, locked until the end of the
+        current transaction. When they still equal ``expected`` that is
+        established without a read: a no-op ``UPDATE`` guarded by them takes
+        the lock and its row count answers. Anything else is re-read
+        ``FOR UPDATE``.
+        """
+        rows = Item._base_manager.using(using or self._state.db or "default").filter(pk=self.pk)
+        if expected is not None and rows.filter(**self._rollup_filter(expected)).update(in_stock=models.F("in_stock")):
+            return expected
+        return rows.select_for_update().values_list(*self.ROLLUP_FIELDS).first()
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # The rollup delta (inventory.signals.update_rollups) is taken from the
+        # loaded rollup columns. The UPDATE only matches while the row still
+        # has them, so a loaded item saves with no extra query; a row changed
+        # by someone else since it was loaded is locked and re-read, and the
+        # delta taken from that
+        before = getattr(self, "_rollup_state", None)
+        if before is not None and values:
+            guarded = base_qs.filter(**self._rollup_filter(before))
+            if super()._do_update(guarded, using, pk_val, values, update_fields, forced_update):
+                return True
+        with transaction.atomic(using=using):
+            self._rollup_state = base_qs.select_for_update().filter(pk=pk_val).values_list(
+                *self.ROLLUP_FIELDS
+            ).first()
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+    def rollup_state(self):
+        return tuple(getattr(self, field) for field in self.ROLLUP_FIELDS)
 
     def __str__(self) -> str:
         # Avoid referencing non-existent fields; include location when present
@@ -86,6 +231,8 @@ class CartItem(models.Model):
     item = models.ForeignKey(Item, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField()
     added_at = models.DateTimeField(auto_now_add=True)
+    # The line reserves its quantity until then; the sweeper releases it afterwards
+    expires_at = models.DateTimeField(default=reservation_expiry, db_index=True)
 
     def __str__(self):
         return f"{self.item.name} x{self.quantity}"
@@ -97,4 +244,254 @@ class InventoryItem(models.Model):
         related_name="inventory",
     )
     item = models.ForeignKey(Item, on_delete=models.RESTRICT)
-    quantity = models.IntegerField(default=1)
\ No newline at end of file
+    quantity = models.IntegerField(default=1)
+
+class CategoryRollup(models.Model):
+    """
+    Totals over the active items of one category, kept current by
+    ``inventory.rollups`` on every item write so the analytics pages read one
+    row per category instead of scanning items.
+    """
+
+    category = models.OneToOneField(
+        ItemCategory, on_delete=models.CASCADE, primary_key=True, related_name="rollup"
+    )
+    item_count = models.IntegerField(default=0)
+    units_in_stock = models.BigIntegerField(default=0)
+    value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    low_stock_count = models.IntegerField(default=0)
+    out_of_stock_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.category_id}: {self.item_count} items"
+
+
+class CategoryDailySnapshot(models.Model):
+    """
+    A category's ``CategoryRollup`` figures as of one day, one row per
+    category per day (written by ``manage.py snapshot_inventory``).
+    """
+
+    date = models.DateField()
+    category = models.ForeignKey(ItemCategory, on_delete=models.CASCADE, related_name="daily_snapshots")
+    item_count = models.IntegerField(default=0)
+    units_in_stock = models.BigIntegerField(default=0)
+    value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    low_stock_count = models.IntegerField(default=0)
+    out_of_stock_count = models.IntegerField(default=0)
+    taken_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            # Also the index behind the date-range reads of the history charts
+            models.UniqueConstraint(fields=["date", "category"], name="inventory_catsnap_date_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.category_id}: {self.item_count} items"
+
+
+class ItemDailySnapshot(models.Model):
+    """
+    An item's state as of ``date``. Rows are only written on days the state
+    changed; the state on any other day is the latest row at or before it.
+    """
+
+    date = models.DateField()
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="daily_snapshots")
+    category = models.ForeignKey(ItemCategory, on_delete=models.SET_NULL, null=True, related_name="+")
+    in_stock = models.IntegerField()
+    cost = models.DecimalField(max_digits=15, decimal_places=2)
+    is_active = models.BooleanField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["item", "date"], name="inventory_itemsnap_item_date_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.item_id}: {self.in_stock}"
+
+
+class LowStockAlert(models.Model):
+    """
+    Low-stock alert state of one item (see inventory.alerts). The row exists
+    while the item is at or below its ``low_stock_bar``; ``notified_at`` stays
+    empty until the item has gone out in a digest. Recovering above the bar
+    removes the row, which re-arms the alert.
+    """
+
+    item = models.OneToOneField(
+        Item,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="low_stock_alert",
+    )
+    triggered_at = models.DateTimeField(default=timezone.now)
+    notified_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The digest reads the alerts not sent yet, oldest first
+            models.Index(
+                fields=["triggered_at"],
+                condition=models.Q(notified_at__isnull=True),
+                name="inventory_alert_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Low stock: {self.item_id}"
+
+
+class SearchOutbox(models.Model):
+    """
+    Pending OpenSearch changes, written in the same transaction as the item
+    change and drained by ``manage.py sync_search`` (see inventory.search_sync).
+    """
+
+    ACTION_INDEX = "index"
+    ACTION_DELETE = "delete"
+    ACTION_CHOICES = [
+        (ACTION_INDEX, "Index"),
+        (ACTION_DELETE, "Delete"),
+    ]
+
+    # No foreign key: the row has to outlive a hard-deleted item
+    item_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+
+    class Meta:
+        indexes = [
+            # The worker takes the oldest rows that are due
+            models.Index(fields=["available_at", "id"], name="inventory_outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.item_id}"
+
+
+class StockMovement(models.Model):
+    """
+    Append-only ledger of stock changes. Every write path that touches an
+    item's stock (checkout, return, REST and admin edits) adds a row here;
+    rows are never updated or deleted.
+    """
+
+    REASON_CREATED = "created"
+    REASON_CHECKOUT = "checkout"
+    REASON_RETURN = "return"
+    REASON_ADJUSTMENT = "adjustment"
+    REASON_DELETED = "deleted"
+    REASON_CHOICES = [
+        (REASON_CREATED, "Created"),
+        (REASON_CHECKOUT, "Checkout"),
+        (REASON_RETURN, "Return"),
+        (REASON_ADJUSTMENT, "Adjustment"),
+        (REASON_DELETED, "Deleted"),
+    ]
+
+    SOURCE_WEB = "web"
+    SOURCE_API = "api"
+    SOURCE_ADMIN = "admin"
+    SOURCE_IMPORT = "import"
+    SOURCE_CHOICES = [
+        (SOURCE_WEB, "Web"),
+        (SOURCE_API, "API"),
+        (SOURCE_ADMIN, "Admin"),
+        (SOURCE_IMPORT, "Import"),
+    ]
+
+    # Keep history when an item is hard-deleted; item_name is a snapshot
+    item = models.ForeignKey(Item, on_delete=models.SET_NULL, null=True, related_name="movements")
+    item_name = models.CharField(max_length=255)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="stock_movements",
+    )
+    delta = models.IntegerField()
+    in_stock_after = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # The activity feed seeks backwards through this index
+            models.Index(fields=["created_at", "id"], name="inventory_move_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.item_name} {self.delta:+d} ({self.reason})"
+
+    @classmethod
+    def for_item(cls, item, delta, reason, source, actor=None):
+        """Unsaved movement for ``item``, whose ``in_stock`` is already the new value."""
+        if actor is not None and not actor.is_authenticated:
+            actor = None
+        return cls(
+            item=item,
+            item_name=item.name,
+            actor=actor,
+            delta=delta,
+            in_stock_after=item.in_stock,
+            reason=reason,
+            source=source,
+        )
+
+
+class ChannelGroupMember(models.Model):
+    """
+    Channel group membership for ``inventro.channel_layer.PostgresChannelLayer``,
+    shared by every worker and pod. Rows outlive a crashed process until
+    ``expires_at`` (the layer's ``group_expiry``).
+    """
+
+    group_name = models.CharField(max_length=100)
+    channel = models.CharField(max_length=200)
+    # The Postgres channel the member's process listens on
+    pg_channel = models.CharField(max_length=63)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "channel_layer_group"
+        constraints = [
+            models.UniqueConstraint(fields=["group_name", "channel"], name="channel_layer_group_uniq"),
+        ]
+        indexes = [
+            # group_send looks up which processes have members
+            models.Index(fields=["group_name", "pg_channel"], name="channel_layer_group_pg_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.group_name}: {self.channel}"
+
+
+class ChannelMessage(models.Model):
+    """
+    Channel layer messages that do not travel inline in a NOTIFY payload:
+    batches over the payload limit, and everything sent to a named
+    (non-process) channel, which exactly one receiver claims.
+    """
+
+    pg_channel = models.CharField(max_length=63)
+    payload = models.BinaryField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "channel_layer_message"
+        indexes = [
+            models.Index(fields=["pg_channel", "id"], name="channel_layer_msg_chan_idx"),
+            models.Index(fields=["created_at"], name="channel_layer_msg_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.pg_channel} #{self.pk}"
@@ -0,0 +1,100 @@
+"""
+Faster wire formats for the REST API, registered in ``REST_FRAMEWORK``:
+
+* ``UJSONRenderer`` / ``UJSONParser``: ``application/json`` through ``ujson``,
+  encoded in C. Compact output is DRF's byte for byte (unescaped unicode and
+  slashes, ``\\u2028`` / ``\\u2029`` escaped, NaN and Infinity refused under
+  ``STRICT_JSON``) except for floats in exponent form, which ujson writes with
+  the shortest exponent (``1e-7`` where DRF writes ``1e-07``; the same
+  number). Indented output (``; indent=4``, the browsable API) and anything
+  ujson cannot encode the way DRF does is left to DRF's renderer.
+* ``MessagePackRenderer`` / ``MessagePackParser``: ``application/msgpack``
+  (also ``?format=msgpack``) for the scanners and the ERP sync.
+
+Values the serializers leave as Python objects are handled like DRF's
+``JSONEncoder`` does: datetimes become ISO 8601 strings (``Z`` for UTC);
+decimals become floats in JSON (as DRF does) but keep their exact text in
+MessagePack. ``Item.cost`` and the timestamps already arrive as strings
+from the serializers, so they are identical across the three formats.
+
+``msgpack`` is imported on first use, as most workers only ever speak JSON.
+"""
+import decimal
+
+import ujson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import json
+from rest_framework.utils.encoders import JSONEncoder
+
+_default = JSONEncoder().default
+
+
+def _msgpack_default(value):
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return _default(value)
+
+
+class UJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if not self.compact or self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            text = ujson.dumps(
+                data, ensure_ascii=self.ensure_ascii, escape_forward_slashes=False,
+                allow_nan=not self.strict, default=_default,
+                # Encoded as UTF-8 text, as DRF's encoder does with bytes.decode()
+                reject_bytes=False,
+            )
+        except OverflowError:
+            # NaN / Infinity under STRICT_JSON: raise what DRF raises
+            return super().render(data, accepted_media_type, renderer_context)
+        return text.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode("utf-8")
+
+
+class UJSONParser(JSONParser):
+    renderer_class = UJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            text = stream.read().decode(encoding)
+            if self.strict and ("NaN" in text or "Infinity" in text):
+                # ujson accepts these constants; DRF's strict parser refuses them
+                return json.loads(text, parse_constant=json.strict_constant)
+            return ujson.loads(text)
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        import msgpack
+
+        return msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    media_type = "application/msgpack"
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        import msgpack
+
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except Exception as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
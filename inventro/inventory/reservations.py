@@ -0,0 +1,134 @@
+"""
+Cart reservations.
+
+A ``CartItem`` holds stock for its user until ``expires_at``. Every change to
+a cart line adjusts ``Item.reserved`` in the same transaction, with the item
+row locked, so ``in_stock - reserved`` is always the stock anyone can still
+put in a cart and reading it is a single column lookup.
+
+Adding to or editing a line pushes its expiry out by
+``INVENTRO_CART_RESERVATION_TTL`` seconds; ``manage.py release_expired_reservations``
+drops the lines that lapse and gives their stock back.
+"""
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.utils import timezone
+
+from . import live
+from .models import Cart, CartItem, Item, reservation_expiry
+
+
+class InsufficientStock(Exception):
+    pass
+
+
+def _lock_item(item_id: int) -> Item:
+    return Item.objects.select_for_update().get(pk=item_id)
+
+
+def _adjust_reserved(item_id: int, delta: int):
+    Item.objects.filter(pk=item_id).update(reserved=models.F("reserved") + delta)
+    live.changed([item_id])
+
+
+@transaction.atomic
+def reserve(user, item_id: int, quantity: int) -> CartItem:
+    """Add ``quantity`` of an item to ``user``'s cart, reserving the stock."""
+    if quantity <= 0:
+        raise ValueError("Quantity must be positive.")
+    item = _lock_item(item_id)
+    if quantity > item.in_stock - item.reserved:
+        raise InsufficientStock("Not enough stock available.")
+
+    cart, _ = Cart.objects.get_or_create(user=user)
+    cart_item = cart.cart_items.select_for_update().filter(item=item).first()
+    if cart_item is None:
+        cart_item = CartItem(cart=cart, item=item, quantity=0)
+    cart_item.quantity += quantity
+    cart_item.expires_at = reservation_expiry()
+    cart_item.save()
+    _adjust_reserved(item.pk, quantity)
+    return cart_item
+
+
+@transaction.atomic
+def set_quantity(user, item_id: int, quantity: int) -> CartItem:
+    """Change the quantity of an existing cart line to ``quantity``."""
+    if quantity <= 0:
+        raise ValueError("Quantity must be positive.")
+    item = _lock_item(item_id)
+    cart_item = CartItem.objects.select_for_update().get(cart__user=user, item=item)
+    delta = quantity - cart_item.quantity
+    if delta > item.in_stock - item.reserved:
+        raise InsufficientStock("Not enough stock available.")
+
+    cart_item.quantity = quantity
+    cart_item.expires_at = reservation_expiry()
+    cart_item.save(update_fields=["quantity", "expires_at"])
+    _adjust_reserved(item.pk, delta)
+    return cart_item
+
+
+@transaction.atomic
+def release(user, item_id: int, quantity=None) -> int:
+    """
+    Take ``quantity`` (default: all) of an item out of ``user``'s cart and
+    return it to the available pool. Returns the quantity left in the cart.
+    """
+    _lock_item(item_id)
+    cart_item = CartItem.objects.select_for_update().get(cart__user=user, item_id=item_id)
+    if quantity is None:
+        quantity = cart_item.quantity
+    if quantity <= 0 or quantity > cart_item.quantity:
+        raise ValueError("Quantity to remove exceeds quantity in cart.")
+
+    cart_item.quantity -= quantity
+    if cart_item.quantity == 0:
+        cart_item.delete()
+    else:
+        cart_item.save(update_fields=["quantity"])
+    _adjust_reserved(item_id, -quantity)
+    return cart_item.quantity
+
+
+def release_expired(batch_size: int = 1000, now=None) -> int:
+    """
+    Delete cart lines whose reservation has lapsed and give their stock back.
+
+    Works through ``CartItem.expires_at`` in batches of ``batch_size``, one
+    short transaction per batch, so a large backlog never holds locks for
+    long. Returns the number of lines released.
+    """
+    now = now or timezone.now()
+    expired = CartItem.objects.filter(expires_at__lte=now)
+    released = 0
+    while True:
+        with transaction.atomic():
+            candidates = list(expired.order_by("expires_at", "id").values_list("item_id", flat=True)[:batch_size])
+            if not candidates:
+                return released
+
+            # Same lock order as reserve(): items first, then their cart lines
+            item_ids = sorted(set(candidates))
+            list(Item.objects.select_for_update().filter(pk__in=item_ids).order_by("pk").values_list("pk"))
+            lines = list(
+                expired.select_for_update()
+                .filter(item_id__in=item_ids)
+                .order_by("expires_at", "id")
+                .values_list("id", "item_id", "quantity")[:batch_size]
+            )
+
+            held = defaultdict(int)
+            for _, item_id, quantity in lines:
+                held[item_id] += quantity
+            releases = [
+                models.When(pk=item_id, then=models.F("reserved") - quantity)
+                for item_id, quantity in held.items()
+            ]
+            Item.objects.filter(pk__in=held).update(
+                reserved=models.Case(*releases, output_field=models.PositiveIntegerField())
+            )
+            CartItem.objects.filter(pk__in=[line_id for line_id, _, _ in lines]).delete()
+            live.changed(held)
+            released += len(lines)
@@ -0,0 +1,148 @@
+"""
+Incremental maintenance of ``CategoryRollup``.
+
+Every write path hands ``apply`` pairs of ``(before, after)`` item states
+(``Item.rollup_state()``; ``None`` for "did not exist"). The differences are
+summed per category in Python and written with one ``UPDATE`` of ``F()``
+increments, inside the caller's transaction:
+
+* ``Item.save()`` / ``delete()``: the receivers in ``inventory.signals``,
+  which re-read the row ``FOR UPDATE`` in the write's transaction, so the
+  ``before`` state is the committed one even under concurrent saves;
+* ``bulk_create`` / ``bulk_update`` / ``QuerySet.update()`` paths (checkout,
+  the bulk API): ``record(items)`` after the write, on items the caller
+  loaded with ``select_for_update()``;
+* ``manage.py import_items`` writes with raw SQL and calls ``rebuild()``.
+
+``rebuild()`` recomputes every row from the items and ``drift()`` reports
+where the table and the items disagree (``manage.py rebuild_category_rollups``).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import CategoryRollup, Item
+from .versioning import bump_on_commit
+
+COUNTERS = ("item_count", "units_in_stock", "value", "low_stock_count", "out_of_stock_count")
+
+
+def contribution(state):
+    """What an item in ``state`` adds to its category's rollup, or ``None``."""
+    if state is None:
+        return None
+    category_id, is_active, in_stock, cost, low_stock_bar = state
+    if not is_active or category_id is None:
+        return None
+    in_stock = in_stock or 0
+    return category_id, (
+        1,
+        in_stock,
+        Decimal(cost or 0) * in_stock,
+        1 if 0 < in_stock <= low_stock_bar else 0,
+        1 if in_stock <= 0 else 0,
+    )
+
+
+def apply(pairs):
+    """Apply ``(before, after)`` item state pairs to the rollup table."""
+    deltas = defaultdict(lambda: [0, 0, Decimal("0"), 0, 0])
+    for before, after in pairs:
+        if before == after:
+            continue
+        for state, sign in ((before, -1), (after, 1)):
+            found = contribution(state)
+            if found is None:
+                continue
+            category_id, values = found
+            for i, value in enumerate(values):
+                deltas[category_id][i] += sign * value
+    deltas = {category_id: values for category_id, values in deltas.items() if any(values)}
+    if not deltas:
+        return
+
+    CategoryRollup.objects.bulk_create(
+        [CategoryRollup(category_id=category_id) for category_id in deltas], ignore_conflicts=True
+    )
+    updates = {}
+    for i, counter in enumerate(COUNTERS):
+        output = DecimalField(max_digits=20, decimal_places=2) if counter == "value" else None
+        whens = [
+            When(category_id=category_id, then=Value(values[i], output_field=output))
+            for category_id, values in deltas.items()
+        ]
+        updates[counter] = F(counter) + Case(*whens, default=Value(0, output_field=output), output_field=output)
+    CategoryRollup.objects.filter(category_id__in=deltas).update(updated_at=timezone.now(), **updates)
+
+
+def record(items, created=False):
+    """
+    Apply the changes made to ``items`` since they were loaded (or, with
+    ``created``, their whole contribution) after a write that sent no signals.
+    """
+    pairs = []
+    for item in items:
+        before = None if created else getattr(item, "_rollup_state", None)
+        after = item.rollup_state()
+        pairs.append((before, after))
+        item._rollup_state = after
+    apply(pairs)
+
+
+def computed() -> dict:
+    """Rollup values per category id, aggregated from the items."""
+    rows = (
+        Item.objects.filter(is_active=True)
+        .order_by()
+        .values("category_id")
+        .annotate(
+            item_count=Count("pk"),
+            units_in_stock=Sum("in_stock"),
+            value=Sum(F("cost") * F("in_stock"), output_field=DecimalField(max_digits=20, decimal_places=2)),
+            low_stock_count=Count("pk", filter=Q(in_stock__gt=0, in_stock__lte=F("low_stock_bar"))),
+            out_of_stock_count=Count("pk", filter=Q(in_stock__lte=0)),
+        )
+    )
+    return {row.pop("category_id"): row for row in rows}
+
+
+@transaction.atomic
+def rebuild() -> int:
+    """Recompute every rollup row from the items. Returns the number of rows."""
+    from .models import ItemCategory
+
+    # Lock the current rows first: writers wait and then add their deltas on
+    # top of values that already include everything committed before them
+    list(CategoryRollup.objects.select_for_update().values_list("pk"))
+    fresh = computed()
+    now = timezone.now()
+    rows = [
+        CategoryRollup(
+            category_id=category_id,
+            updated_at=now,
+            **{counter: (fresh.get(category_id, {}).get(counter) or 0) for counter in COUNTERS},
+        )
+        for category_id in ItemCategory.objects.values_list("pk", flat=True)
+    ]
+    CategoryRollup.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=["category"], update_fields=[*COUNTERS, "updated_at"]
+    )
+    bump_on_commit()
+    return len(rows)
+
+
+def drift() -> list:
+    """``(category_id, counter, stored, actual)`` for every value that is off."""
+    fresh = computed()
+    stored = {row.pop("category_id"): row for row in CategoryRollup.objects.values("category_id", *COUNTERS)}
+    problems = []
+    for category_id in sorted(set(fresh) | set(stored)):
+        for counter in COUNTERS:
+            actual = fresh.get(category_id, {}).get(counter) or 0
+            have = stored.get(category_id, {}).get(counter) or 0
+            if Decimal(actual) != Decimal(have):
+                problems.append((category_id, counter, have, actual))
+    return problems
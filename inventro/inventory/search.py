@@ -0,0 +1,131 @@
+"""
+Indexed item search for the inventory quick filter.
+
+``name__icontains OR sku__icontains`` is a sequential scan on every keystroke.
+Each backend gets its own indexed path instead (see migration 0011):
+
+* Postgres: ``pg_trgm`` GIN indexes on ``UPPER(name)`` / ``UPPER(sku)`` make
+  the substring match indexable, and the trigger-maintained ``search_vector``
+  column adds prefix matching on whole words plus a relevance ``rank``.
+* SQLite: the ``inventory_item_fts`` FTS5 table (trigram tokenizer) answers
+  substring matches of three or more characters and ranks them with ``bm25``.
+
+Anything else falls back to the plain ``icontains`` filter.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connections
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "inventory_item_fts"
+# The FTS5 trigram tokenizer cannot match anything shorter than a trigram
+FTS_MIN_LENGTH = 3
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _prefix_tsquery(q: str) -> str:
+    """Turn ``"wire mic"`` into the raw tsquery ``wire:* & mic:*``."""
+    return " & ".join(f"{word}:*" for word in _WORD_RE.findall(q.lower()))
+
+
+def _fts5_phrase(q: str) -> str:
+    return '"' + q.replace('"', '""') + '"'
+
+
+def _postgres_search(queryset, q: str):
+    matches = Q(name__icontains=q) | Q(sku__icontains=q)
+    rank = TrigramSimilarity("name", q)
+    tsquery = _prefix_tsquery(q)
+    if tsquery:
+        query = SearchQuery(tsquery, search_type="raw", config="simple")
+        matches |= Q(search_vector=query)
+        rank = rank + SearchRank(F("search_vector"), query)
+    return queryset.filter(matches).alias(rank=rank)
+
+
+def _sqlite_search(queryset, q: str):
+    if len(q) < FTS_MIN_LENGTH:
+        return _fallback_search(queryset, q)
+    phrase = _fts5_phrase(q)
+    table = queryset.model._meta.db_table
+    hits = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (phrase,))
+    # bm25() is "lower is better"; negate it so every backend sorts rank descending
+    rank = RawSQL(
+        f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+        f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {table}.id",
+        (phrase,),
+        output_field=FloatField(),
+    )
+    return queryset.filter(id__in=hits).alias(rank=rank)
+
+
+def _fallback_search(queryset, q: str):
+    return queryset.filter(Q(name__icontains=q) | Q(sku__icontains=q)).alias(
+        rank=Value(0.0, output_field=FloatField())
+    )
+
+
+SQLITE_FTS_TRIGGERS = {
+    "inventory_item_fts_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS inventory_item_fts_ai AFTER INSERT ON inventory_item BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, name, sku) VALUES (new.id, new.name, new.sku);
+        END
+    """,
+    "inventory_item_fts_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS inventory_item_fts_ad AFTER DELETE ON inventory_item BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, sku) VALUES ('delete', old.id, old.name, old.sku);
+        END
+    """,
+    "inventory_item_fts_au": f"""
+        CREATE TRIGGER IF NOT EXISTS inventory_item_fts_au AFTER UPDATE OF name, sku ON inventory_item BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, sku) VALUES ('delete', old.id, old.name, old.sku);
+            INSERT INTO {FTS_TABLE}(rowid, name, sku) VALUES (new.id, new.name, new.sku);
+        END
+    """,
+}
+
+
+def ensure_sqlite_fts(using: str = "default"):
+    """
+    Put back the FTS5 sync triggers if a migration dropped them. SQLite alters
+    a table by rebuilding it, and the rebuilt ``inventory_item`` has no
+    triggers; the FTS table is then rebuilt to cover the rows it missed.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+        if cursor.fetchone() is None:
+            return
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'inventory_item'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [name for name in SQLITE_FTS_TRIGGERS if name not in existing]
+        if not missing:
+            return
+        for name in missing:
+            cursor.execute(SQLITE_FTS_TRIGGERS[name])
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def search_items(queryset, q: str):
+    """
+    Restrict ``queryset`` to items whose name or SKU matches ``q`` and alias a
+    ``rank`` (higher is more relevant). The rank is only computed if the caller
+    orders or annotates by it, so keyset-paginated tables can keep their own
+    sort without paying for it.
+    """
+    q = (q or "").strip()
+    if not q:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        return _postgres_search(queryset, q)
+    if vendor == "sqlite":
+        return _sqlite_search(queryset, q)
+    return _fallback_search(queryset, q)
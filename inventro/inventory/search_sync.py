@@ -0,0 +1,270 @@
+"""
+OpenSearch sync through a transactional outbox.
+
+Item writes never talk to the search cluster. Instead every write path adds
+a ``SearchOutbox`` row in the same transaction as the item change:
+
+* ``Item.save()`` / ``delete()`` through the signals (a soft delete, i.e.
+  ``is_active=False``, queues a delete);
+* the bulk API and checkout, which write with ``bulk_update`` /
+  ``QuerySet.update()``, call ``enqueue`` themselves;
+* ``manage.py import_items`` inserts the rows with SQL from its staging table.
+
+``manage.py sync_search`` drains the outbox with ``drain()``: it claims a
+batch of due rows (``FOR UPDATE SKIP LOCKED`` on Postgres, so several workers
+can run) for ``INVENTRO_SEARCH_SYNC_CLAIM_LEASE`` seconds, coalesces them to
+the latest action per item, reads the current item documents, commits, and
+then sends everything in one ``_bulk`` request over a pooled HTTP session.
+Acknowledged rows are deleted; failed ones are retried with
+exponential backoff (``INVENTRO_SEARCH_SYNC_RETRY_BASE`` seconds, doubling,
+capped at ``INVENTRO_SEARCH_SYNC_RETRY_MAX``).
+
+Nothing is queued while ``OPENSEARCH_URL`` is unset.
+"""
+import json
+import logging
+import random
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Item, SearchOutbox
+
+LOGGER = logging.getLogger(__name__)
+
+OPENSEARCH_URL = getattr(settings, "OPENSEARCH_URL", "")
+OPENSEARCH_USER = getattr(settings, "OPENSEARCH_USER", "")
+OPENSEARCH_PASSWORD = getattr(settings, "OPENSEARCH_PASSWORD", "")
+OPENSEARCH_INDEX = getattr(settings, "OPENSEARCH_INDEX", "items")
+
+BATCH_SIZE = getattr(settings, "INVENTRO_SEARCH_SYNC_BATCH_SIZE", 500)
+RETRY_BASE = getattr(settings, "INVENTRO_SEARCH_SYNC_RETRY_BASE", 5)
+RETRY_MAX = getattr(settings, "INVENTRO_SEARCH_SYNC_RETRY_MAX", 600)
+REQUEST_TIMEOUT = 10
+# How long claimed rows stay with the worker sending them; past that they are due again
+CLAIM_LEASE = getattr(settings, "INVENTRO_SEARCH_SYNC_CLAIM_LEASE", 60)
+
+# Item columns that make up the indexed document
+DOCUMENT_FIELDS = ("sku", "name", "in_stock", "total_amount", "category_id", "is_active")
+
+_session = None
+
+
+def enabled() -> bool:
+    return bool(OPENSEARCH_URL)
+
+
+def enqueue(items):
+    """Queue the current state of ``items``: index the active ones, delete the rest."""
+    if not enabled():
+        return
+    SearchOutbox.objects.bulk_create([
+        SearchOutbox(
+            item_id=item.pk,
+            action=SearchOutbox.ACTION_INDEX if item.is_active else SearchOutbox.ACTION_DELETE,
+        )
+        for item in items
+    ])
+
+
+def enqueue_delete(item_ids):
+    if not enabled():
+        return
+    SearchOutbox.objects.bulk_create([
+        SearchOutbox(item_id=item_id, action=SearchOutbox.ACTION_DELETE) for item_id in item_ids
+    ])
+
+
+def enqueue_category(category_id):
+    """Re-index every item of a category (its name is part of the document)."""
+    if not enabled():
+        return
+    item_ids = Item.objects.filter(category_id=category_id, is_active=True).values_list("pk", flat=True)
+    SearchOutbox.objects.bulk_create(
+        [SearchOutbox(item_id=item_id, action=SearchOutbox.ACTION_INDEX) for item_id in item_ids],
+        batch_size=1000,
+    )
+
+
+def enqueue_all() -> int:
+    """Queue every active item, e.g. to fill a new index. Returns the count."""
+    if not enabled():
+        return 0
+    item_ids = Item.objects.filter(is_active=True).values_list("pk", flat=True).iterator()
+    rows = SearchOutbox.objects.bulk_create(
+        [SearchOutbox(item_id=item_id, action=SearchOutbox.ACTION_INDEX) for item_id in item_ids],
+        batch_size=1000,
+    )
+    return len(rows)
+
+
+def document(item: Item) -> dict:
+    return {
+        "id": item.id,
+        "sku": item.sku,
+        "name": item.name,
+        "in_stock": item.in_stock,
+        "total_amount": item.total_amount,
+        "category": item.category.name if item.category_id else None,
+    }
+
+
+def _http():
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(pool_maxsize=4))
+        session.mount("https://", HTTPAdapter(pool_maxsize=4))
+        if OPENSEARCH_USER or OPENSEARCH_PASSWORD:
+            session.auth = (OPENSEARCH_USER, OPENSEARCH_PASSWORD)
+        _session = session
+    return _session
+
+
+MAPPING = {
+    "mappings": {
+        "properties": {
+            "sku": {"type": "keyword"},
+            "name": {"type": "text"},
+            "in_stock": {"type": "integer"},
+            "total_amount": {"type": "integer"},
+            "category": {"type": "keyword"},
+        }
+    }
+}
+
+
+def ensure_index():
+    """Create the index with its mapping; an existing index is left alone."""
+    url = f"{OPENSEARCH_URL.rstrip('/')}/{OPENSEARCH_INDEX}"
+    response = _http().put(url, json=MAPPING, timeout=REQUEST_TIMEOUT)
+    if response.status_code >= 400 and "already_exists" not in response.text:
+        response.raise_for_status()
+
+
+def _send(operations) -> dict:
+    """
+    Send ``(action, item_id, document)`` operations in one ``_bulk`` request.
+    Returns ``{item_id: error}`` for the operations OpenSearch rejected;
+    raises if the request as a whole failed.
+    """
+    lines = []
+    for action, item_id, doc in operations:
+        lines.append(json.dumps({action: {"_index": OPENSEARCH_INDEX, "_id": str(item_id)}}))
+        if doc is not None:
+            lines.append(json.dumps(doc))
+    response = _http().post(
+        f"{OPENSEARCH_URL.rstrip('/')}/_bulk",
+        data="\n".join(lines) + "\n",
+        headers={"Content-Type": "application/x-ndjson"},
+        timeout=REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+    failed = {}
+    for entry in response.json().get("items", []):
+        (action, result), = entry.items()
+        status = result.get("status", 500)
+        # Deleting a document that is already gone is fine
+        if status >= 300 and not (action == "delete" and status == 404):
+            failed[int(result["_id"])] = json.dumps(result.get("error") or status)
+    return failed
+
+
+def _backoff(attempts: int) -> float:
+    delay = min(RETRY_BASE * 2 ** attempts, RETRY_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _claim(batch_size, now):
+    """
+    Take a batch of due rows (locked while claiming, ``SKIP LOCKED`` on
+    Postgres) and lease them for ``CLAIM_LEASE`` seconds, so other workers
+    pass over them once this short transaction commits. Returns the rows and
+    the operations to send for them.
+    """
+    with transaction.atomic():
+        rows = list(
+            SearchOutbox.objects.select_for_update(skip_locked=True)
+            .filter(available_at__lte=now)
+            .order_by("available_at", "id")
+            .values_list("id", "item_id", "action", "attempts")[:batch_size]
+        )
+        if not rows:
+            return rows, []
+        SearchOutbox.objects.filter(pk__in=[row[0] for row in rows]).update(
+            available_at=now + timedelta(seconds=CLAIM_LEASE)
+        )
+
+        # Coalesce: only the latest queued action per item matters
+        latest = {}
+        for row_id, item_id, action, _ in rows:
+            if item_id not in latest or row_id > latest[item_id][0]:
+                latest[item_id] = (row_id, action)
+
+        wanted = [item_id for item_id, (_, action) in latest.items() if action == SearchOutbox.ACTION_INDEX]
+        items = Item.objects.select_related("category").in_bulk(wanted)
+    operations = []
+    for item_id in latest:
+        item = items.get(item_id)
+        if item is not None and item.is_active:
+            operations.append(("index", item_id, document(item)))
+        else:
+            operations.append(("delete", item_id, None))
+    return rows, operations
+
+
+def drain(batch_size=BATCH_SIZE) -> dict:
+    """
+    Send one batch of due outbox rows. Returns counts: ``rows`` taken,
+    ``items`` after coalescing, ``indexed``, ``deleted`` and ``failed``.
+
+    No transaction is open during the request: the rows are claimed in one
+    short transaction and settled in another once OpenSearch has answered.
+    A worker that dies in between leaves them to be retried when the lease
+    runs out.
+    """
+    stats = {"rows": 0, "items": 0, "indexed": 0, "deleted": 0, "failed": 0}
+    rows, operations = _claim(batch_size, timezone.now())
+    if not rows:
+        return stats
+
+    try:
+        failed = _send(operations)
+    except Exception as e:
+        LOGGER.warning("OpenSearch bulk sync failed: %s", e)
+        failed = {item_id: str(e) for _, item_id, _ in operations}
+
+    row_ids, attempts = defaultdict(list), {}
+    for row_id, item_id, _, tries in rows:
+        row_ids[item_id].append(row_id)
+        attempts[item_id] = max(attempts.get(item_id, 0), tries)
+    now = timezone.now()
+    with transaction.atomic():
+        # Only the claimed rows: anything queued since is sent next time
+        done = [row_id for item_id, ids in row_ids.items() if item_id not in failed for row_id in ids]
+        SearchOutbox.objects.filter(pk__in=done).delete()
+
+        retries = defaultdict(list)
+        for item_id, error in failed.items():
+            retries[(attempts[item_id], error[:1000])].extend(row_ids[item_id])
+        for (tries, error), ids in retries.items():
+            SearchOutbox.objects.filter(pk__in=ids).update(
+                attempts=F("attempts") + 1,
+                available_at=now + timedelta(seconds=_backoff(tries)),
+                last_error=error,
+            )
+
+    stats["rows"] = len(rows)
+    stats["items"] = len(operations)
+    stats["failed"] = len(failed)
+    for action, item_id, _ in operations:
+        if item_id not in failed:
+            stats["indexed" if action == "index" else "deleted"] += 1
+    return stats
@@ -1,4 +1,12 @@
-from rest_framework import serializers
+import datetime
+import decimal
+
+from django.db import connections
+from django.db.models import CharField, Func
+from django.db.models.functions import Cast
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueValidator
 from .models import Item, ItemCategory, Cart, CartItem
 
 
@@ -8,10 +16,53 @@ class ItemCategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
 
 
+class CategoryPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    ``category_id`` input. Bulk requests preload every referenced category into
+    ``context["categories"]`` (id -> ItemCategory) so entries need no query each.
+    """
+
+    def to_internal_value(self, data):
+        categories = self.context.get("categories")
+        if categories is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return categories[int(data)]
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+
+
+class UniqueSkuValidator(UniqueValidator):
+    """
+    ``sku`` uniqueness. Bulk requests preload the items holding the SKUs they
+    send into ``context["skus"]`` (sku -> item id) so entries need no query
+    each, and claim each SKU there as its entry validates.
+    """
+
+    def __call__(self, value, serializer_field):
+        skus = serializer_field.context.get("skus")
+        if skus is None:
+            return super().__call__(value, serializer_field)
+        instance = getattr(serializer_field.parent, "instance", None)
+        owner = skus.get(value)
+        if owner is not None and (instance is None or owner != instance.pk):
+            raise serializers.ValidationError(self.message, code="unique")
+
+
 class ItemSerializer(serializers.ModelSerializer):
-    """Serializer for Item with category details"""
+    """
+    Serializer for Item with category details.
+
+    Sparse fieldsets: ``context["fields"]`` (a set of names, from ``?fields=``)
+    limits the output to those fields; input is validated in full. In a sparse response ``category`` is
+    its id unless ``context["expand"]`` (from ``?expand=``) names it.
+    """
     category = ItemCategorySerializer(read_only=True)
-    category_id = serializers.PrimaryKeyRelatedField(
+    category_id = CategoryPrimaryKeyField(
         queryset=ItemCategory.objects.all(),
         source='category',
         write_only=True,
@@ -26,9 +77,169 @@ class ItemSerializer(serializers.ModelSerializer):
             'description', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
-        
-        
-        
+        extra_kwargs = {
+            'sku': {'validators': [
+                UniqueSkuValidator(queryset=Item.objects.all(), message='An item with this sku already exists.')
+            ]},
+        }
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get("fields") and "category" not in self.context.get("expand", ()):
+            fields["category"] = serializers.PrimaryKeyRelatedField(read_only=True)
+        return fields
+
+    @property
+    def _readable_fields(self):
+        # Output only: a sparse PUT/PATCH still validates and saves every field it sends
+        only = self.context.get("fields")
+        for field in super()._readable_fields:
+            if not only or field.field_name in only:
+                yield field
+
+
+def _output_zone(field):
+    """The zone a ``DateTimeField`` renders ISO 8601 in, or ``None`` for any other format."""
+    if getattr(field, "format", api_settings.DATETIME_FORMAT) != ISO_8601:
+        return None
+    zone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+    if getattr(zone, "key", None) in ("UTC", "Etc/UTC"):
+        # Same offset, but astimezone() is a no-op for the fixed UTC object
+        # the database adapters return
+        zone = datetime.timezone.utc
+    return zone
+
+
+def _plain_decimal(field) -> bool:
+    """Whether ``field`` renders decimals as ``"{:f}"`` of the value quantized to its places."""
+    return (
+        isinstance(field, serializers.DecimalField)
+        and field.decimal_places is not None
+        and getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+        and not field.normalize_output
+        and not field.localize
+    )
+
+
+class UTCTimestampText(Func):
+    """
+    A ``timestamptz`` column as ``DateTimeField`` renders it in UTC
+    (``isoformat()`` with ``Z``, no fraction on whole seconds), formatted by
+    Postgres.
+    """
+
+    output_field = CharField()
+    template = (
+        "to_char(%(expressions)s AT TIME ZONE 'UTC', "
+        "CASE WHEN date_trunc('second', %(expressions)s) = %(expressions)s "
+        "THEN 'YYYY-MM-DD\"T\"HH24:MI:SS\"Z\"' ELSE 'YYYY-MM-DD\"T\"HH24:MI:SS.US\"Z\"' END)"
+    )
+
+
+def _database_text(field, vendor):
+    """
+    An expression reading ``field``'s column already as the text it renders
+    to, or ``None``. Postgres only: there, loading timestamps and decimals and
+    formatting them again in Python is most of the cost of a large listing.
+    """
+    if vendor != "postgresql":
+        return None
+    if isinstance(field, serializers.DateTimeField) and _output_zone(field) is datetime.timezone.utc:
+        return UTCTimestampText(field.source)
+    if _plain_decimal(field) and Item._meta.get_field(field.source).decimal_places == field.decimal_places:
+        # numeric(p, s) prints exactly s places, as quantize() does
+        return Cast(field.source, CharField())
+    return None
+
+
+def _fast_representation(field):
+    """
+    A plain function equivalent to ``field.to_representation`` for non-null
+    values, or ``None`` when the database value can be used as is. Settings
+    the field would look up per value (timezone, decimal context) are
+    resolved once here.
+    """
+    if isinstance(field, (serializers.IntegerField, serializers.CharField, serializers.BooleanField,
+                          serializers.PrimaryKeyRelatedField)):
+        return None
+    if isinstance(field, serializers.DateTimeField):
+        zone = _output_zone(field)
+        if zone is not None:
+            def iso_datetime(value):
+                if value.tzinfo is None:
+                    return field.to_representation(value)
+                text = value.astimezone(zone).isoformat()
+                return text[:-6] + "Z" if text.endswith("+00:00") else text
+            return iso_datetime
+    if _plain_decimal(field):
+        context = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+        exponent = decimal.Decimal(".1") ** field.decimal_places
+
+        def decimal_string(value):
+            if not isinstance(value, decimal.Decimal):
+                return field.to_representation(value)
+            return "{:f}".format(value.quantize(exponent, rounding=field.rounding, context=context))
+        return decimal_string
+    return field.to_representation
+
+
+class ItemRowBuilder:
+    """
+    Fast path for ``ItemSerializer(..., many=True, context=context).data``.
+
+    ``lookups`` are the columns to read with ``values_list``; ``build`` turns
+    those tuples into the row dicts directly, skipping DRF's per-row field
+    machinery. Key order and values match the serializer exactly, so the
+    rendered JSON is byte-identical. With ``vendor="postgresql"`` timestamps
+    and decimals are read already formatted (``_database_text``).
+    """
+
+    def __init__(self, context=None, vendor=None):
+        fields = ItemSerializer(context=context or {})._readable_fields
+        self.names, self.lookups, self.converters, self.category_at = [], [], [], None
+        for field in fields:
+            self.names.append(field.field_name)
+            if isinstance(field, ItemCategorySerializer):
+                # Two columns here, folded into one nested dict per row
+                self.category_at = len(self.lookups)
+                self.lookups += ["category__id", "category__name"]
+                continue
+            text = _database_text(field, vendor)
+            if text is not None:
+                self.lookups.append(text)
+                continue
+            convert = _fast_representation(field)
+            if convert is not None:
+                self.converters.append((len(self.lookups), convert))
+            self.lookups.append("category_id" if field.field_name == "category" else field.source)
+
+    def build(self, rows) -> list:
+        names, converters, category_at = self.names, self.converters, self.category_at
+        results = []
+        for row in rows:
+            values = list(row)
+            for i, convert in converters:
+                if values[i] is not None:
+                    values[i] = convert(values[i])
+            if category_at is not None:
+                category_id = values[category_at]
+                values[category_at:category_at + 2] = [
+                    None if category_id is None else {"id": category_id, "name": values[category_at + 1]}
+                ]
+            results.append(dict(zip(names, values)))
+        return results
+
+
+def item_rows(queryset, context=None) -> list:
+    """``ItemSerializer(queryset, many=True, context=context).data`` via ``ItemRowBuilder``."""
+    builder = ItemRowBuilder(context, connections[queryset.db].vendor)
+    # Every row dict is held for the response anyway, so a server-side cursor
+    # (``iterator()``) would only add round trips
+    return builder.build(queryset.values_list(*builder.lookups))
+
+
 ############################################################################
 
 class ItemSlimSerializer(serializers.ModelSerializer):
@@ -1,34 +1,16 @@
 from __future__ import annotations
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-
-from inventory.models import Item
 
+import asyncio
 
-from django.conf import settings
-from django.core.mail import send_mail
-from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save, post_delete
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
 from django.dispatch import receiver
-from .models import Item
-import logging, os, json
-
-import requests  # used for optional serverless/webhook + OpenSearch REST
-
-LOGGER = logging.getLogger(__name__)
-
-LOW_STOCK_THRESHOLD = getattr(settings, "INVENTRO_LOW_STOCK_THRESHOLD", 10)
-
-OPENSEARCH_URL = getattr(settings, "OPENSEARCH_URL", "")  # e.g. https://os.example.com:9200
-OPENSEARCH_USER = getattr(settings, "OPENSEARCH_USER", "")
-OPENSEARCH_PASSWORD = getattr(settings, "OPENSEARCH_PASSWORD", "")
-OPENSEARCH_INDEX = getattr(settings, "OPENSEARCH_INDEX", "items")
-
-NOTIFY_LOW_STOCK_WEBHOOK = getattr(settings, "NOTIFY_LOW_STOCK_WEBHOOK", "")  # optional serverless endpoint
-
 
+from .models import Item, ItemCategory
+from . import alerts, autocomplete, live, rollups, search_sync
+from .versioning import bump_catalog_version, bump_on_commit
 
 def _build_payload(item: Item) -> dict:
     return {
@@ -41,118 +23,168 @@ def _build_payload(item: Item) -> dict:
     }
 
 
-@receiver(post_save, sender=Item)
-def notify_low_stock(sender, instance: Item, **kwargs):
-    if instance is None:
-        return
+def _below_minimum(item: Item) -> bool:
     try:
-        current = int(instance.in_stock)
-        minimum = int(instance.total_amount)
+        return int(item.in_stock) < int(item.total_amount)
     except (TypeError, ValueError):
-        return
+        return False
 
-    if current >= minimum:
-        return
 
-    channel_layer = get_channel_layer()
-    if channel_layer is None:
-        return
+def _went_below_minimum(item: Item, previous_in_stock) -> bool:
+    """Whether a write took ``item`` below its minimum; ``previous_in_stock`` is ``None`` for new items."""
+    if not _below_minimum(item):
+        return False
+    try:
+        return previous_in_stock is None or int(previous_in_stock) >= int(item.total_amount)
+    except (TypeError, ValueError):
+        return True
+
 
-    async_to_sync(channel_layer.group_send)(
-        "low_stock",
-        {"type": "low_stock_alert", "item": _build_payload(instance)},
-    )
-
-def _alert_recipients() -> list[str]:
-    if settings.ALERT_EMAILS:
-        return [e.strip() for e in settings.ALERT_EMAILS.split(",") if e.strip()]
-    User = get_user_model()
-    return list(User.objects.filter(is_superuser=True, email__isnull=False)
-                .exclude(email="").values_list("email", flat=True))
-
-def _send_low_stock_email(item: Item):
-    recipients = _alert_recipients()
-    if not recipients:
+def push_low_stock(item_ids):
+    """Push a ``low_stock`` alert for each of ``item_ids`` still below its minimum once committed."""
+    if get_channel_layer() is None:
         return
-    subject = f"[Inventro] Low stock: {item.name} (SKU {item.SKU})"
-    body = f"""Item has low stock.
-
-Name: {item.name}
-SKU: {item.SKU}
-In stock: {item.in_stock}
-Threshold: {LOW_STOCK_THRESHOLD}
-"""
-    try:
-        send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, recipients, fail_silently=True)
-    except Exception as e:
-        LOGGER.warning("Email send failed: %s", e)
+    items = Item.objects.filter(pk__in=list(item_ids)).select_related("category")
+    payloads = [_build_payload(item) for item in items if _below_minimum(item)]
+    if payloads:
+        async_to_sync(_apush_low_stock)(payloads)
+
+
+async def _apush_low_stock(payloads):
+    layer = get_channel_layer()
+    # Concurrent, so a batching layer sends them all in one round
+    await asyncio.gather(*(
+        layer.group_send("low_stock", {"type": "low_stock_alert", "item": payload})
+        for payload in payloads
+    ))
+
+
+@receiver(post_save, sender=Item)
+def notify_low_stock(sender, instance: Item, created=False, raw=False, **kwargs):
+    # Once per crossing, pushed after commit so a rolled back save alerts nobody
+    if not raw and _went_below_minimum(instance, None if created else instance.loaded_value("in_stock")):
+        item_id = instance.pk
+        transaction.on_commit(lambda: push_low_stock([item_id]))
+
+@receiver(post_save, sender=Item)
+def on_item_save(sender, instance: Item, created: bool, raw=False, **kwargs):
+    # OpenSearch: queued in this transaction, sent by `manage.py sync_search`
+    if not raw and (created or instance.has_changed(*search_sync.DOCUMENT_FIELDS)):
+        search_sync.enqueue([instance])
+
+    # Low-stock alerts: queued on a crossing, sent as digests by `manage.py send_low_stock_digests`
+    if not raw and (created or instance.has_changed(*alerts.FIELDS)):
+        alerts.record([instance], created=created)
+
+    # Open inventory tables patch the row once committed
+    if not raw and (created or instance.has_changed(*live.FIELDS)):
+        live.changed([instance.pk])
+
+def items_saved(created, changes):
+    """
+    Run the side effects of ``Item.save()`` once for a batch of rows written
+    with ``bulk_create`` / ``bulk_update`` / ``QuerySet.update()``, which send
+    no signals. Meant for ``transaction.on_commit``.
+
+    ``created`` holds new items; ``changes`` holds ``(item, previous_in_stock)``
+    pairs for updated items, whose ``item.in_stock`` already has the new value.
+    Low-stock pushes go out for the items the write took below their minimum.
+    """
+    batch = [(item, None) for item in created] + list(changes)
+    bump_catalog_version()
+    live.changed(item.pk for item, _ in batch)
+    push_low_stock(item.pk for item, previous in batch if _went_below_minimum(item, previous))
+    for item, _ in batch:
+        update_autocomplete(Item, item)
+
+def stock_changed(changes):
+    """
+    Run the stock side effects of ``Item.save()`` for rows written with
+    ``QuerySet.update()`` (e.g. checkout). See ``items_saved``.
+    """
+    items_saved((), changes)
+
+@receiver(post_delete, sender=Item)
+def on_item_delete(sender, instance: Item, **kwargs):
+    search_sync.enqueue_delete([instance.pk])
+    live.removed([instance])
 
-def _call_serverless(item: Item):
-    if not NOTIFY_LOW_STOCK_WEBHOOK:
+
+@receiver(post_save, sender=Item)
+def update_autocomplete(sender, instance: Item, **kwargs):
+    # Only maintain an index this worker has already built; never build from a save
+    if not autocomplete.index.built:
         return
-    try:
-        requests.post(NOTIFY_LOW_STOCK_WEBHOOK, json={
-            "sku": item.SKU,
-            "name": item.name,
-            "in_stock": item.in_stock
-        }, timeout=3)
-    except Exception as e:
-        LOGGER.warning("Serverless notify failed: %s", e)
-
-def _os_auth():
-    if not OPENSEARCH_URL:
-        return None
-    auth = None
-    if OPENSEARCH_USER or OPENSEARCH_PASSWORD:
-        auth = (OPENSEARCH_USER, OPENSEARCH_PASSWORD)
-    return {"base": OPENSEARCH_URL.rstrip("/"), "auth": auth}
-
-def _os_index_item(item: Item):
-    osconf = _os_auth()
-    if not osconf:
+    if not instance.has_changed("name", "sku", "category_id", "is_active"):
         return
-    doc = {
-        "id": item.id,
-        "sku": item.SKU,
-        "name": item.name,
-        "in_stock": item.in_stock,
-        "total_amount": item.total_amount,
-        "category": item.category.name if item.category_id else None,
-    }
-    try:
-        url = f"{osconf['base']}/{OPENSEARCH_INDEX}/_doc/{item.id}"
-        requests.put(url, json=doc, auth=osconf["auth"], timeout=3)
-    except Exception as e:
-        LOGGER.warning("OpenSearch index failed: %s", e)
-
-def _os_delete_item(item_id: int):
-    osconf = _os_auth()
-    if not osconf:
+    if instance.is_active:
+        category = getattr(instance.category, "name", "") if instance.category_id else ""
+        autocomplete.index.upsert(instance.pk, instance.name, instance.sku, category)
+    else:
+        autocomplete.index.remove(instance.pk)
+
+
+@receiver(post_delete, sender=Item)
+def remove_from_autocomplete(sender, instance: Item, **kwargs):
+    autocomplete.index.remove(instance.pk)
+
+
+@receiver(pre_save, sender=Item)
+def capture_previous_values(sender, instance: Item, raw=False, **kwargs):
+    # Items loaded from the database carry their loaded values; anything else
+    # (Item(pk=...).save(), deferred fields) is looked up once here
+    if raw:
         return
-    try:
-        url = f"{osconf['base']}/{OPENSEARCH_INDEX}/_doc/{item_id}"
-        requests.delete(url, auth=osconf["auth"], timeout=3)
-    except Exception as e:
-        LOGGER.warning("OpenSearch delete failed: %s", e)
+    loaded = getattr(instance, "_loaded_values", None)
+    if loaded is None or (instance.pk is not None and not hasattr(instance, "_rollup_state")):
+        previous = None
+        if instance.pk is not None:
+            previous = Item.objects.filter(pk=instance.pk).values(*Item.ROLLUP_FIELDS).first()
+        instance._loaded_values = {**(previous or {}), **(loaded or {})}
+        instance._rollup_state = tuple(previous[field] for field in Item.ROLLUP_FIELDS) if previous else None
+
 
 @receiver(post_save, sender=Item)
-def on_item_save(sender, instance: Item, created: bool, **kwargs):
-    # OpenSearch upsert
-    _os_index_item(instance)
+def update_rollups(sender, instance: Item, created: bool, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    # Item._do_update made sure this is the row as it was committed before the save
+    before = None if created else getattr(instance, "_rollup_state", None)
+    after = instance.rollup_state()
+    if before is not None and update_fields is not None:
+        # Columns this save did not write keep their stored values
+        written = {Item._meta.get_field(name).attname for name in update_fields}
+        after = tuple(
+            value if field in written else old
+            for field, value, old in zip(Item.ROLLUP_FIELDS, after, before)
+        )
+    rollups.apply([(before, after)])
+    instance._rollup_state = after
+
+
+@receiver(pre_delete, sender=Item)
+def capture_deleted_values(sender, instance: Item, **kwargs):
+    # Inside the delete's transaction: make sure the snapshot is what gets deleted
+    instance._rollup_state = instance.stored_rollup_state(getattr(instance, "_rollup_state", None))
 
-    # Low-stock alert only when at/below threshold
-    try:
-        prev = None
-        if not created and instance.pk:
-            prev = Item.objects.filter(pk=instance.pk).values_list("in_stock", flat=True).first()
-        crossed = (created and instance.in_stock <= LOW_STOCK_THRESHOLD) or \
-                  (prev is not None and prev > LOW_STOCK_THRESHOLD and instance.in_stock <= LOW_STOCK_THRESHOLD)
-        if crossed:
-            _send_low_stock_email(instance)
-            _call_serverless(instance)
-    except Exception as e:
-        LOGGER.warning("low-stock check failed: %s", e)
 
 @receiver(post_delete, sender=Item)
-def on_item_delete(sender, instance: Item, **kwargs):
-    _os_delete_item(instance.id)
+def remove_from_rollups(sender, instance: Item, **kwargs):
+    rollups.apply([(getattr(instance, "_rollup_state", None), None)])
+
+
+@receiver(post_save, sender=ItemCategory)
+def on_category_save(sender, instance: ItemCategory, created: bool, **kwargs):
+    # A rename changes the category text of every item in it; rebuild rather than patch
+    if not created:
+        autocomplete.request_rebuild()
+        search_sync.enqueue_category(instance.pk)
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+@receiver(post_save, sender=ItemCategory)
+@receiver(post_delete, sender=ItemCategory)
+def invalidate_catalog_caches(sender, raw=False, **kwargs):
+    if not raw:
+        bump_on_commit()
@@ -0,0 +1,922 @@
+import io
+import json
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+import pandas as pd
+import requests
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from requests.adapters import BaseAdapter
+from rest_framework import viewsets
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from . import alerts, exporting, history, reservations, rollups, search_sync, signals
+from .autocomplete import AutocompleteIndex
+from .conditional import ConditionalGetMixin
+from .importing import normalize_chunk, resolve_categories, upsert_rows
+from .models import (
+    CartItem, CategoryDailySnapshot, CategoryRollup, InventoryItem, Item, ItemCategory, ItemDailySnapshot,
+    LowStockAlert, SearchOutbox,
+)
+from .pagination import keyset_paginate
+from .renderers import MessagePackParser, MessagePackRenderer, UJSONParser, UJSONRenderer
+from .serializers import ItemSerializer, item_rows
+from .views import filtered_items
+
+
+def make_item(category, name, **fields):
+    values = {
+        "sku": name.upper(),
+        "in_stock": 10,
+        "low_stock_bar": 2,
+        "total_amount": 10,
+        "location": "A1",
+        "cost": "1.50",
+    }
+    values.update(fields)
+    return Item.objects.create(name=name, category=category, **values)
+
+
+class BulkAdapter(BaseAdapter):
+    """Answers ``_bulk`` requests like OpenSearch, rejecting the ids in ``reject``."""
+
+    def __init__(self, reject=(), status=200):
+        super().__init__()
+        self.reject = set(reject)
+        self.status = status
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        lines = [json.loads(line) for line in request.body.splitlines() if line]
+        operations = []
+        while lines:
+            (action, meta), = lines.pop(0).items()
+            doc = lines.pop(0) if action == "index" else None
+            operations.append((action, int(meta["_id"]), doc))
+        self.requests.append(operations)
+
+        items = [
+            {action: {"_id": str(item_id), "status": 429, "error": {"type": "rejected"}}}
+            if item_id in self.reject else {action: {"_id": str(item_id), "status": 200}}
+            for action, item_id, _ in operations
+        ]
+        response = requests.Response()
+        response.status_code = self.status
+        response._content = json.dumps({"errors": bool(self.reject), "items": items}).encode()
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+class SearchSyncDrainTests(TestCase):
+    def setUp(self):
+        category = ItemCategory.objects.create(name="Cables")
+        self.a = make_item(category, "alpha")
+        self.b = make_item(category, "beta")
+        self.c = make_item(category, "gamma")
+
+    def drain(self, adapter):
+        session = requests.Session()
+        session.mount("http://", adapter)
+        with mock.patch.object(search_sync, "OPENSEARCH_URL", "http://search.test"), \
+                mock.patch.object(search_sync, "_session", session):
+            return search_sync.drain()
+
+    def queue(self, *rows):
+        for item, action in rows:
+            SearchOutbox.objects.create(item_id=item.pk, action=action)
+
+    def test_coalesces_to_latest_action_and_deletes_acknowledged_rows(self):
+        index, delete = SearchOutbox.ACTION_INDEX, SearchOutbox.ACTION_DELETE
+        self.queue(
+            (self.a, index), (self.b, index), (self.c, delete),
+            (self.a, index), (self.b, delete), (self.c, index),
+        )
+        adapter = BulkAdapter()
+
+        stats = self.drain(adapter)
+
+        self.assertEqual(len(adapter.requests), 1)
+        sent = {item_id: (action, doc) for action, item_id, doc in adapter.requests[0]}
+        self.assertEqual(len(adapter.requests[0]), 3)
+        self.assertEqual(sent[self.a.pk][0], "index")
+        self.assertEqual(sent[self.a.pk][1]["name"], "alpha")
+        self.assertEqual(sent[self.a.pk][1]["category"], "Cables")
+        self.assertEqual(sent[self.b.pk], ("delete", None))
+        self.assertEqual(sent[self.c.pk][0], "index")
+        self.assertEqual(stats, {"rows": 6, "items": 3, "indexed": 2, "deleted": 1, "failed": 0})
+        self.assertFalse(SearchOutbox.objects.exists())
+
+    def test_rejected_item_backs_off_and_counts_the_attempt(self):
+        self.queue(
+            (self.a, SearchOutbox.ACTION_INDEX),
+            (self.b, SearchOutbox.ACTION_INDEX),
+            (self.b, SearchOutbox.ACTION_INDEX),
+        )
+        before = timezone.now()
+
+        stats = self.drain(BulkAdapter(reject={self.b.pk}))
+
+        self.assertEqual(stats["indexed"], 1)
+        self.assertEqual(stats["failed"], 1)
+        left = list(SearchOutbox.objects.all())
+        self.assertEqual({row.item_id for row in left}, {self.b.pk})
+        self.assertEqual(len(left), 2)
+        for row in left:
+            self.assertEqual(row.attempts, 1)
+            self.assertGreaterEqual(row.available_at, before + timedelta(seconds=search_sync.RETRY_BASE * 0.8))
+            self.assertIn("rejected", row.last_error)
+
+        # Not due yet: the next run sends nothing
+        adapter = BulkAdapter()
+        self.assertEqual(self.drain(adapter)["rows"], 0)
+        self.assertEqual(adapter.requests, [])
+
+    def test_failed_request_retries_every_item(self):
+        self.queue((self.a, SearchOutbox.ACTION_INDEX), (self.b, SearchOutbox.ACTION_DELETE))
+
+        with self.assertLogs(search_sync.LOGGER, "WARNING"):
+            stats = self.drain(BulkAdapter(status=503))
+
+        self.assertEqual(stats["failed"], 2)
+        self.assertEqual(
+            sorted(SearchOutbox.objects.values_list("item_id", "attempts")),
+            sorted([(self.a.pk, 1), (self.b.pk, 1)]),
+        )
+
+    def test_sends_outside_a_transaction_with_the_rows_leased(self):
+        self.queue((self.a, SearchOutbox.ACTION_INDEX), (self.b, SearchOutbox.ACTION_INDEX))
+        depth = len(connection.savepoint_ids)
+        late = self.a
+        seen = {}
+
+        class Observing(BulkAdapter):
+            def send(self, request, **kwargs):
+                seen["depth"] = len(connection.savepoint_ids)
+                seen["due"] = SearchOutbox.objects.filter(available_at__lte=timezone.now()).count()
+                # Queued while the request is out: left for the next run
+                SearchOutbox.objects.create(item_id=late.pk, action=SearchOutbox.ACTION_INDEX)
+                return super().send(request, **kwargs)
+
+        stats = self.drain(Observing())
+
+        self.assertEqual(seen, {"depth": depth, "due": 0})
+        self.assertEqual(stats["indexed"], 2)
+        self.assertEqual(list(SearchOutbox.objects.values_list("item_id", flat=True)), [self.a.pk])
+
+
+
+class CategoryRollupTests(TestCase):
+    def setUp(self):
+        self.category = ItemCategory.objects.create(name="Cables")
+        self.item = make_item(self.category, "alpha")
+
+    def rollup(self):
+        return CategoryRollup.objects.values_list("units_in_stock", "value").get(category=self.category)
+
+    def test_saves_from_stale_copies_apply_the_committed_difference(self):
+        first, second = Item.objects.get(pk=self.item.pk), Item.objects.get(pk=self.item.pk)
+        first.in_stock = 7
+        first.save()
+        # Loaded before the first save: its snapshot still says 10 in stock
+        second.cost = "2.00"
+        second.save()
+        second.in_stock = 4
+        second.save()
+
+        self.assertEqual(rollups.drift(), [])
+        self.assertEqual(self.rollup(), (4, 8))
+
+    def test_loaded_item_saves_without_reading_the_row(self):
+        item = Item.objects.get(pk=self.item.pk)
+        item.in_stock = 6
+        with CaptureQueriesContext(connection) as queries:
+            item.save()
+
+        item_reads = [q["sql"] for q in queries if q["sql"].startswith("SELECT") and '"inventory_item"' in q["sql"]]
+        self.assertEqual(item_reads, [])
+        self.assertEqual(self.rollup(), (6, 9))
+
+    def test_delete_of_a_stale_copy_removes_the_committed_contribution(self):
+        stale = Item.objects.get(pk=self.item.pk)
+        self.item.in_stock = 3
+        self.item.save()
+
+        stale.delete()
+
+        self.assertEqual(rollups.drift(), [])
+        self.assertEqual(self.rollup(), (0, 0))
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    ALERT_EMAILS="ops@example.com, buyer@example.com",
+)
+class LowStockAlertTests(TestCase):
+    def setUp(self):
+        self.item = make_item(ItemCategory.objects.create(name="Cables"), "alpha")
+
+    def set_stock(self, in_stock):
+        self.item.in_stock = in_stock
+        self.item.save()
+
+    def test_alerts_once_per_crossing(self):
+        self.assertFalse(LowStockAlert.objects.exists())
+
+        self.set_stock(2)
+        alert = LowStockAlert.objects.get()
+        self.assertEqual(alert.item_id, self.item.pk)
+        self.assertIsNone(alert.notified_at)
+
+        # Still low: the pending alert is left alone
+        self.set_stock(1)
+        self.set_stock(0)
+        self.assertEqual(LowStockAlert.objects.get().triggered_at, alert.triggered_at)
+
+    def test_recovery_rearms_the_alert(self):
+        self.set_stock(1)
+        LowStockAlert.objects.update(notified_at=timezone.now())
+
+        self.set_stock(5)
+        self.assertFalse(LowStockAlert.objects.exists())
+
+        self.set_stock(2)
+        self.assertIsNone(LowStockAlert.objects.get().notified_at)
+
+    def test_waits_for_the_digest_window(self):
+        self.set_stock(1)
+
+        result = alerts.send_digests(window=300)
+
+        self.assertEqual(result, {"items": 0, "emails": 0, "pending": 1})
+        self.assertEqual(mail.outbox, [])
+        self.assertIsNone(LowStockAlert.objects.get().notified_at)
+
+    def test_sends_one_email_per_recipient_over_one_connection(self):
+        other = make_item(self.item.category, "beta")
+        self.set_stock(1)
+        other.in_stock = 0
+        other.save()
+        LowStockAlert.objects.update(triggered_at=timezone.now() - timedelta(seconds=301))
+
+        with mock.patch.object(
+            locmem.EmailBackend, "send_messages", autospec=True, side_effect=locmem.EmailBackend.send_messages
+        ) as send_messages:
+            result = alerts.send_digests(window=300)
+
+        send_messages.assert_called_once()
+        self.assertEqual(result, {"items": 2, "emails": 2, "pending": 0})
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ["buyer@example.com", "ops@example.com"])
+        for message in mail.outbox:
+            self.assertIn("alpha", message.body)
+            self.assertIn("beta", message.body)
+        self.assertFalse(LowStockAlert.objects.filter(notified_at__isnull=True).exists())
+
+        # Nothing pending any more: the next run sends nothing
+        self.assertEqual(alerts.send_digests(window=300)["emails"], 0)
+        self.assertEqual(len(mail.outbox), 2)
+
+
+
+class LowStockPushTests(TestCase):
+    def setUp(self):
+        self.category = ItemCategory.objects.create(name="Cables")
+        self.layer = mock.Mock(group_send=mock.AsyncMock())
+        patcher = mock.patch.object(signals, "get_channel_layer", return_value=self.layer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pushes_once_committed_on_a_crossing(self):
+        item = make_item(self.category, "alpha")
+        self.layer.group_send.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item.in_stock = 3
+            item.save()
+
+        self.layer.group_send.assert_awaited_once()
+        group, message = self.layer.group_send.await_args.args
+        self.assertEqual(group, "low_stock")
+        self.assertEqual(message["item"]["in_stock"], 3)
+        self.assertEqual(message["item"]["category"], "Cables")
+
+        # Still below the minimum: nothing new to say
+        with self.captureOnCommitCallbacks(execute=True):
+            item.in_stock = 2
+            item.save()
+        self.layer.group_send.assert_awaited_once()
+
+    def test_bulk_writes_push_in_one_batch(self):
+        with self.captureOnCommitCallbacks():
+            items = [make_item(self.category, name, in_stock=1) for name in ("alpha", "beta", "gamma")]
+            stocked = make_item(self.category, "delta")
+            already_low = make_item(self.category, "epsilon", in_stock=1)
+        stocked.in_stock = 4
+        Item.objects.filter(pk=stocked.pk).update(in_stock=4)
+
+        with self.assertNumQueries(1):
+            signals.items_saved(items, [(stocked, 10), (already_low, 2)])
+
+        self.assertEqual(
+            sorted(call.args[1]["item"]["name"] for call in self.layer.group_send.await_args_list),
+            ["alpha", "beta", "delta", "gamma"],
+        )
+
+
+class ItemRowsTests(TestCase):
+    def test_matches_the_serializer_byte_for_byte(self):
+        category = ItemCategory.objects.create(name='Cables "and" Ünïcode')
+        stamps = [
+            timezone.now().replace(microsecond=0),
+            timezone.now().replace(microsecond=1),
+            timezone.now().replace(microsecond=500000),
+        ]
+        for i, (cost, stamp) in enumerate(zip(("0.00", "-5.10", "9999999999999.99"), stamps)):
+            item = make_item(category, f"item {i}", cost=cost, description=None if i else "")
+            Item.objects.filter(pk=item.pk).update(created_at=stamp, updated_at=stamp)
+        queryset = Item.objects.select_related("category")
+
+        for context in ({}, {"fields": {"id", "cost", "updated_at", "category"}},
+                        {"fields": {"id", "category"}, "expand": {"category"}}):
+            with self.subTest(context=context):
+                self.assertEqual(
+                    JSONRenderer().render(item_rows(queryset, context)),
+                    JSONRenderer().render(ItemSerializer(queryset, many=True, context=context).data),
+                )
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.item = make_item(ItemCategory.objects.create(name="Cables"), "alpha")
+        self.url = f"/api/items/{self.item.pk}/"
+
+    def test_sparse_patch_saves_every_sent_field(self):
+        response = self.client.patch(
+            f"{self.url}?fields=id", {"name": "alpha 2", "sku": "ALPHA-2"}, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"id": self.item.pk})
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.name, self.item.sku), ("alpha 2", "ALPHA-2"))
+
+    def test_sparse_put_still_validates_omitted_fields(self):
+        response = self.client.put(f"{self.url}?fields=id", {"in_stock": 4}, content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("name", response.json())
+
+
+class RendererTests(TestCase):
+    VALUES = [
+        {"a": 1, "b": [1, 2.5, None, True, (3, 4)], 7: "int key"},
+        Decimal("1.10"),
+        datetime(2024, 5, 1, 12, 30, 15, 120000, tzinfo=dt_timezone.utc),
+        "caf\u00e9 </script> \u2028\u2029 \x00",
+        b"caf\xc3\xa9",
+        2 ** 70,
+    ]
+
+    def test_renders_what_drf_renders(self):
+        for value in self.VALUES:
+            with self.subTest(value=value):
+                self.assertEqual(UJSONRenderer().render(value), JSONRenderer().render(value))
+
+    def test_item_listing_matches_drf(self):
+        category = ItemCategory.objects.create(name="Cables")
+        for i in range(3):
+            make_item(category, f"item {i}", cost=f"{i}.25")
+        data = ItemSerializer(Item.objects.select_related("category"), many=True).data
+        self.assertEqual(UJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_refuses_nan_like_drf(self):
+        for value in (float("nan"), [float("inf")]):
+            with self.subTest(value=value), self.assertRaisesMessage(ValueError, "Out of range float values"):
+                UJSONRenderer().render(value)
+
+    def test_indented_output_is_drfs(self):
+        value = {"a": [1, "x"]}
+        self.assertEqual(
+            UJSONRenderer().render(value, "application/json; indent=4"),
+            JSONRenderer().render(value, "application/json; indent=4"),
+        )
+
+    def test_parser_reads_what_drf_reads(self):
+        for text in ('{"a": [1, 2.5, null, true], "b": "caf\\u00e9"}', "123456789012345678901234567890"):
+            with self.subTest(text=text):
+                self.assertEqual(
+                    UJSONParser().parse(io.BytesIO(text.encode())), JSONParser().parse(io.BytesIO(text.encode()))
+                )
+
+    def test_parser_refuses_what_drf_refuses(self):
+        for text in ("[NaN]", '{"a": Infinity}', "[1,]", "", b"\xff"):
+            with self.subTest(text=text), self.assertRaises(ParseError):
+                UJSONParser().parse(io.BytesIO(text if isinstance(text, bytes) else text.encode()))
+
+    def test_msgpack_keeps_decimal_text(self):
+        value = {"cost": Decimal("1.10"), "when": datetime(2024, 5, 1, tzinfo=dt_timezone.utc)}
+        parsed = MessagePackParser().parse(io.BytesIO(MessagePackRenderer().render(value)))
+        self.assertEqual(parsed, {"cost": "1.10", "when": "2024-05-01T00:00:00Z"})
+
+
+class VersionedItemViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """Relies on the mixin's default versions."""
+
+    queryset = Item.objects.select_related("category")
+    serializer_class = ItemSerializer
+
+
+class ConditionalGetDefaultsTests(TestCase):
+    def setUp(self):
+        category = ItemCategory.objects.create(name="Cables")
+        self.a = make_item(category, "alpha")
+        self.b = make_item(category, "beta")
+        self.factory = APIRequestFactory()
+
+    def get(self, pk=None, **headers):
+        if pk is None:
+            return VersionedItemViewSet.as_view({"get": "list"})(self.factory.get("/api/items/", **headers))
+        view = VersionedItemViewSet.as_view({"get": "retrieve"})
+        return view(self.factory.get(f"/api/items/{pk}/", **headers), pk=pk)
+
+    def stamp(self, **when):
+        Item.objects.update(updated_at=timezone.now().replace(**when))
+
+    def test_list_revalidates_by_etag(self):
+        self.stamp(microsecond=123456)
+        first = self.get()
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn("Last-Modified", first)
+
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        self.b.in_stock = 3
+        self.b.save()
+        changed = self.get(HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+
+    def test_list_version_counts_rows(self):
+        self.stamp(microsecond=0)
+        first = self.get()
+        Item.objects.filter(pk=self.b.pk).delete()
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
+    def test_last_modified_only_for_whole_seconds(self):
+        self.stamp(microsecond=0)
+        response = self.get()
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 304)
+
+    def test_retrieve_revalidates_by_etag(self):
+        first = self.get(self.a.pk)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.get(self.a.pk, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        self.a.name = "alpha 2"
+        self.a.save()
+        self.assertEqual(self.get(self.a.pk, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+        self.assertEqual(self.get(10 ** 9).status_code, 404)
+
+
+class CatalogListVersionTests(TestCase):
+    def setUp(self):
+        self.category = ItemCategory.objects.create(name="Cables")
+        self.item = make_item(self.category, "alpha")
+
+    def test_changes_once_a_write_commits(self):
+        for url, write in (
+            ("/api/items/", lambda: setattr(self.item, "in_stock", 4) or self.item.save()),
+            ("/api/categories/", lambda: setattr(self.category, "name", "Leads") or self.category.save()),
+        ):
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+                with self.captureOnCommitCallbacks() as callbacks:
+                    write()
+                # Not committed yet: the old copy is still current
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+                for callback in callbacks:
+                    callback()
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
+
+class ImportTests(TestCase):
+    def chunk(self, *rows):
+        frame = pd.DataFrame(
+            rows, columns=["name", "sku", "total_amount", "cost", "category", "in_stock"], dtype=str
+        )
+        frame.index += 2
+        return frame
+
+    def test_out_of_range_values_are_rejected(self):
+        categories = resolve_categories(["Cables", "C" * 51], {}, create=True)
+        rows, rejects = normalize_chunk(self.chunk(
+            ["ok", "A-1", "10", "$1.50", "Cables", "2147483647"],
+            ["huge total", "A-2", "2147483648", "1", "Cables", "1"],
+            ["huge stock", "A-3", "10", "1", "Cables", "1e10"],
+            ["long category", "A-4", "10", "1", "C" * 51, "1"],
+        ), categories)
+
+        self.assertEqual(list(rows["sku"]), ["A-1"])
+        self.assertEqual(dict(zip(rejects["sku"], rejects["error"])), {
+            "A-2": "total_amount must be a whole number from 0 to 2147483647",
+            "A-3": "in_stock must be a whole number from 0 to 2147483647",
+            "A-4": "category longer than 50 characters",
+        })
+        self.assertEqual(list(ItemCategory.objects.values_list("name", flat=True)), ["Cables"])
+
+    def test_upserts_on_sku(self):
+        category = ItemCategory.objects.create(name="Cables")
+        existing = make_item(category, "alpha", sku="A-1", in_stock=7)
+        rows, _ = normalize_chunk(self.chunk(
+            ["alpha renamed", "A-1", "20", "2", "Cables", "1"],
+            ["beta", "B-1", "5", "1", "Cables", "5"],
+        ), {"Cables": category.pk})
+
+        self.assertEqual(upsert_rows(rows), (1, 1))
+
+        existing.refresh_from_db()
+        self.assertEqual((existing.name, existing.total_amount, existing.in_stock), ("alpha renamed", 20, 7))
+        self.assertEqual(Item.objects.get(sku="B-1").in_stock, 5)
+
+
+class BulkItemApiTests(TestCase):
+    def setUp(self):
+        self.category = ItemCategory.objects.create(name="Cables")
+        self.item = make_item(self.category, "alpha", sku="A-1")
+
+    def entry(self, name, sku, **fields):
+        return {"name": name, "sku": sku, "in_stock": 5, "low_stock_bar": 1, "total_amount": 5,
+                "cost": "1.00", "category_id": self.category.pk, **fields}
+
+    def test_duplicate_skus_fail_per_entry(self):
+        response = self.client.post("/api/items/bulk/", [
+            self.entry("taken", "A-1"),
+            self.entry("beta", "B-1"),
+            self.entry("beta again", "B-1"),
+        ], content_type="application/json")
+
+        self.assertEqual([result["status"] for result in response.json()["results"]], [400, 201, 400])
+        self.assertEqual(sorted(Item.objects.values_list("sku", flat=True)), ["A-1", "B-1"])
+
+    def test_update_may_keep_its_own_sku(self):
+        response = self.client.patch("/api/items/bulk/", [{"id": self.item.pk, "sku": "A-1", "in_stock": 3}],
+                                     content_type="application/json")
+
+        self.assertEqual(response.json()["results"][0]["status"], 200)
+
+    def test_reports_a_status_per_entry(self):
+        response = self.client.patch("/api/items/bulk/", [
+            {"id": 10 ** 9, "in_stock": 1},
+            {"id": self.item.pk, "in_stock": 3},
+            {"id": self.item.pk, "in_stock": 4},
+            {"id": make_item(self.category, "beta").pk, "in_stock": "many"},
+        ], content_type="application/json")
+
+        self.assertEqual(response.status_code, 207)
+        results = response.json()["results"]
+        self.assertEqual([result["status"] for result in results], [404, 200, 400, 400])
+        self.assertEqual(results[1]["item"]["in_stock"], 3)
+        self.assertIn("in_stock", results[3]["errors"])
+        self.assertEqual(dict(Item.objects.values_list("name", "in_stock")), {"alpha": 3, "beta": 10})
+
+    def test_no_valid_entry_is_a_bad_request(self):
+        response = self.client.patch("/api/items/bulk/", [{"id": 10 ** 9, "in_stock": 1}],
+                                     content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["results"][0]["status"], 404)
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        category = ItemCategory.objects.create(name="Cables")
+        self.alpha = make_item(category, "alpha", in_stock=5)
+        self.beta = make_item(category, "beta", in_stock=5)
+        self.user = get_user_model().objects.create(username="buyer")
+        self.other = get_user_model().objects.create(username="other")
+        self.client.force_login(self.user)
+
+    def set_stock(self, item, in_stock):
+        Item.objects.filter(pk=item.pk).update(in_stock=in_stock)
+
+    def checkout(self):
+        return self.client.post(reverse("inventory_add_cart"))
+
+    def test_moves_the_cart_into_the_inventory(self):
+        reservations.reserve(self.user, self.alpha.pk, 2)
+        reservations.reserve(self.user, self.beta.pk, 1)
+
+        self.assertEqual(self.checkout().status_code, 302)
+
+        self.assertEqual(
+            dict(Item.objects.values_list("name", "in_stock")), {"alpha": 3, "beta": 4}
+        )
+        self.assertEqual(sum(Item.objects.values_list("reserved", flat=True)), 0)
+        self.assertEqual(
+            dict(InventoryItem.objects.filter(borrower=self.user).values_list("item__name", "quantity")),
+            {"alpha": 2, "beta": 1},
+        )
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_does_not_take_stock_others_hold(self):
+        reservations.reserve(self.other, self.alpha.pk, 3)
+        reservations.reserve(self.user, self.alpha.pk, 2)
+        # Stock written down after both reserved: 4 left for 5 held
+        self.set_stock(self.alpha, 4)
+
+        self.assertEqual(self.checkout().status_code, 400)
+        self.assertEqual(Item.objects.get(pk=self.alpha.pk).in_stock, 4)
+
+    def test_lapsed_holds_only_get_free_stock(self):
+        reservations.reserve(self.other, self.alpha.pk, 3)
+        reservations.reserve(self.user, self.alpha.pk, 2)
+        CartItem.objects.filter(cart__user=self.other).update(expires_at=timezone.now() - timedelta(minutes=1))
+        self.set_stock(self.alpha, 4)
+
+        # The other user's hold has lapsed (not yet swept) and no longer counts
+        self.assertEqual(self.checkout().status_code, 302)
+        self.assertEqual(Item.objects.get(pk=self.alpha.pk).in_stock, 2)
+
+    def test_own_lapsed_line_needs_free_stock(self):
+        reservations.reserve(self.user, self.alpha.pk, 2)
+        CartItem.objects.filter(cart__user=self.user).update(expires_at=timezone.now() - timedelta(minutes=1))
+        reservations.reserve(self.other, self.alpha.pk, 3)
+        self.set_stock(self.alpha, 4)
+
+        self.assertEqual(self.checkout().status_code, 400)
+
+    def test_one_short_line_fails_the_whole_checkout(self):
+        reservations.reserve(self.user, self.alpha.pk, 2)
+        reservations.reserve(self.user, self.beta.pk, 5)
+        self.set_stock(self.beta, 4)
+
+        response = self.checkout()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertContains(response, "beta", status_code=400)
+        self.assertEqual(dict(Item.objects.values_list("name", "in_stock")), {"alpha": 5, "beta": 4})
+        self.assertEqual(CartItem.objects.count(), 2)
+        self.assertFalse(InventoryItem.objects.exists())
+
+
+class AutocompleteIndexTests(SimpleTestCase):
+    def test_edits_keep_entries_ordered_by_token_and_id(self):
+        index = AutocompleteIndex()
+        index.build([(i, f"red cable {i}", f"RC-{i}", "Cables") for i in range(1, 40, 2)])
+
+        for i in range(40, 0, -3):
+            index.upsert(i, f"blue cable {i}", f"BC-{i}", "Cables")
+        for i in range(1, 40, 5):
+            index.remove(i)
+
+        entries = list(zip(index._keys, index._key_ids))
+        expected = sorted(
+            (token, item_id)
+            for item_id, (name, sku, category, _) in index._docs.items()
+            for token in index._tokens(name, sku, category)
+        )
+        self.assertEqual(entries, expected)
+        self.assertEqual([hit["id"] for hit in index.search("blue", limit=3)], [4, 7, 10])
+        self.assertNotIn(11, [hit["id"] for hit in index.search("red", limit=50)])
+
+
+class DailySnapshotTests(TestCase):
+    def setUp(self):
+        self.item = make_item(ItemCategory.objects.create(name="Cables"), "alpha")
+        rollups.rebuild()
+        self.day = date(2026, 3, 1)
+
+    def recorded(self):
+        return list(ItemDailySnapshot.objects.order_by("date").values_list("date", "in_stock"))
+
+    def test_catches_writes_that_committed_after_the_previous_run(self):
+        history.take_snapshot(self.day)
+        taken_at = CategoryDailySnapshot.objects.get().taken_at
+        # Stamped just before that run, committed just after it
+        Item.objects.filter(pk=self.item.pk).update(in_stock=4, updated_at=taken_at - timedelta(seconds=1))
+
+        history.take_snapshot(self.day + timedelta(days=1))
+
+        self.assertEqual(self.recorded(), [(self.day, 10), (self.day + timedelta(days=1), 4)])
+
+    def test_backfill_reads_since_the_day_before_it(self):
+        history.take_snapshot(self.day)
+        Item.objects.filter(pk=self.item.pk).update(in_stock=4, updated_at=timezone.now())
+        history.take_snapshot(self.day + timedelta(days=2))
+
+        result = history.take_snapshot(self.day + timedelta(days=1))
+
+        self.assertFalse(result["full"])
+        self.assertEqual(
+            self.recorded(),
+            [(self.day, 10), (self.day + timedelta(days=1), 4), (self.day + timedelta(days=2), 4)],
+        )
+
+
+
+class DirtySaveTests(TestCase):
+    def setUp(self):
+        make_item(ItemCategory.objects.create(name="Cables"), "alpha")
+        self.item = Item.objects.get(name="alpha")
+
+    def item_updates(self, queries):
+        # The SET clause of each UPDATE of the item row
+        return [
+            query["sql"].split(" WHERE ")[0] for query in queries
+            if query["sql"].startswith('UPDATE "inventory_item"')
+        ]
+
+    def test_unchanged_item_saves_nothing(self):
+        with self.assertNumQueries(0):
+            self.item.save()
+
+    def test_writes_only_the_changed_columns(self):
+        self.item.name = "alpha 2"
+        with CaptureQueriesContext(connection) as queries:
+            self.item.save()
+
+        [update] = self.item_updates(queries)
+        self.assertIn('"name"', update)
+        self.assertIn('"updated_at"', update)
+        self.assertNotIn('"in_stock"', update)
+        self.assertFalse(self.item.changed_fields())
+
+    def test_update_fields_are_honored(self):
+        self.item.name = "alpha 2"
+        self.item.in_stock = 4
+        with CaptureQueriesContext(connection) as queries:
+            self.item.save(update_fields=["in_stock"])
+
+        [update] = self.item_updates(queries)
+        self.assertNotIn('"name"', update)
+        self.assertEqual(Item.objects.values_list("name", "in_stock").get(), ("alpha", 4))
+        # The name was not written, so it still counts as changed
+        self.assertEqual(self.item.changed_fields(), {"name"})
+
+
+class AvailableStockTests(TestCase):
+    def setUp(self):
+        self.category = ItemCategory.objects.create(name="Cables")
+        self.user = get_user_model().objects.create(username="viewer")
+        self.client.force_login(self.user)
+
+    def test_available_is_stock_no_cart_holds(self):
+        alpha = make_item(self.category, "alpha", in_stock=10)
+        make_item(self.category, "beta", in_stock=4)
+        reservations.reserve(self.user, alpha.pk, 3)
+
+        self.assertEqual(
+            dict(Item.objects.with_available().values_list("name", "available")), {"alpha": 7, "beta": 4}
+        )
+
+    @override_settings(INVENTRO_INVENTORY_SHOW_TOTAL=False)
+    def test_inventory_page_queries_do_not_grow_with_the_page(self):
+        for i in range(8):
+            item = make_item(self.category, f"item {i}")
+            reservations.reserve(self.user, item.pk, 1)
+
+        counts = []
+        for per_page in (2, 8):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse("dashboard_inventory"), {"per_page": per_page})
+            counts.append(len(queries))
+            self.assertEqual([item.available for item in response.context["items"]], [9] * per_page)
+        self.assertEqual(counts[0], counts[1])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        category = ItemCategory.objects.create(name="Cables")
+        # Repeated names make the id break the ties
+        for i in range(7):
+            make_item(category, f"item {i % 3}", sku=f"SKU-{i}")
+
+    def walk(self, per_page, keys=("name", "id")):
+        pages, cursor = [], ""
+        while True:
+            page = keyset_paginate(Item.objects.all(), per_page, cursor, keys=keys)
+            pages.append([item.pk for item in page])
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_row_once_in_order(self):
+        for keys in (("name", "id"), ("-name", "id")):
+            with self.subTest(keys=keys):
+                pages = self.walk(3, keys)
+                expected = list(Item.objects.order_by(*keys).values_list("pk", flat=True))
+                self.assertEqual([len(page) for page in pages], [3, 3, 1])
+                self.assertEqual([pk for page in pages for pk in page], expected)
+
+    def test_last_full_page_has_no_next(self):
+        self.assertEqual([len(page) for page in self.walk(7)], [7])
+
+    def test_malformed_cursor_starts_over(self):
+        first = keyset_paginate(Item.objects.all(), 3)
+        for cursor in ("not a cursor", "WzFd", first.next_cursor[:-2]):
+            with self.subTest(cursor=cursor):
+                page = keyset_paginate(Item.objects.all(), 3, cursor)
+                self.assertEqual(list(page), list(first))
+
+
+class ReservationTests(TestCase):
+    def setUp(self):
+        category = ItemCategory.objects.create(name="Cables")
+        self.alpha = make_item(category, "alpha", in_stock=5)
+        self.beta = make_item(category, "beta", in_stock=5)
+        self.user = get_user_model().objects.create(username="buyer")
+        self.other = get_user_model().objects.create(username="other")
+
+    def reserved(self):
+        return dict(Item.objects.values_list("name", "reserved"))
+
+    def test_cart_changes_adjust_reserved(self):
+        reservations.reserve(self.user, self.alpha.pk, 2)
+        reservations.reserve(self.user, self.alpha.pk, 1)
+        self.assertEqual(CartItem.objects.get().quantity, 3)
+        self.assertEqual(self.reserved(), {"alpha": 3, "beta": 0})
+
+        reservations.set_quantity(self.user, self.alpha.pk, 5)
+        self.assertEqual(self.reserved(), {"alpha": 5, "beta": 0})
+
+        self.assertEqual(reservations.release(self.user, self.alpha.pk, 4), 1)
+        self.assertEqual(self.reserved(), {"alpha": 1, "beta": 0})
+        self.assertEqual(reservations.release(self.user, self.alpha.pk), 0)
+        self.assertFalse(CartItem.objects.exists())
+        self.assertEqual(self.reserved(), {"alpha": 0, "beta": 0})
+
+    def test_cannot_hold_more_than_is_available(self):
+        reservations.reserve(self.other, self.alpha.pk, 4)
+
+        with self.assertRaises(reservations.InsufficientStock):
+            reservations.reserve(self.user, self.alpha.pk, 2)
+        reservations.reserve(self.user, self.alpha.pk, 1)
+        with self.assertRaises(reservations.InsufficientStock):
+            reservations.set_quantity(self.user, self.alpha.pk, 2)
+        with self.assertRaises(ValueError):
+            reservations.release(self.user, self.alpha.pk, 2)
+        self.assertEqual(self.reserved(), {"alpha": 5, "beta": 0})
+
+    def test_release_expired_frees_only_lapsed_lines(self):
+        reservations.reserve(self.user, self.alpha.pk, 2)
+        reservations.reserve(self.user, self.beta.pk, 1)
+        reservations.reserve(self.other, self.alpha.pk, 3)
+        past = timezone.now() - timedelta(minutes=1)
+        CartItem.objects.filter(cart__user=self.user).update(expires_at=past)
+
+        self.assertEqual(reservations.release_expired(batch_size=1), 2)
+
+        self.assertEqual(self.reserved(), {"alpha": 3, "beta": 0})
+        self.assertEqual(list(CartItem.objects.values_list("cart__user__username", "quantity")), [("other", 3)])
+        self.assertEqual(reservations.release_expired(), 0)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        category = ItemCategory.objects.create(name="Cables")
+        make_item(category, "beta", cost="2.00", in_stock=3)
+        make_item(category, "alpha", cost="1.50")
+        self.client.force_login(get_user_model().objects.create(username="viewer"))
+
+    def test_csv_header_comes_before_the_query(self):
+        blocks = exporting.export_lines(filtered_items({}), "csv")
+        with self.assertNumQueries(0):
+            header = next(blocks)
+        self.assertEqual(header, ",".join(column for column, _ in exporting.COLUMNS) + "\r\n")
+
+        lines = "".join(blocks).splitlines()
+        self.assertEqual([line.split(",")[2] for line in lines], ["alpha", "beta"])
+
+    def test_ndjson_has_one_object_per_row(self):
+        rows = [json.loads(line) for line in "".join(exporting.export_lines(filtered_items({}), "ndjson")).splitlines()]
+
+        self.assertEqual([(row["name"], row["cost"], Decimal(row["value"])) for row in rows],
+                         [("alpha", "1.50", Decimal("15")), ("beta", "2.00", Decimal("6"))])
+
+    def test_view_streams_the_export(self):
+        response = self.client.get(reverse("inventory_export"), {"format": "ndjson", "q": ""})
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn(".ndjson", response["Content-Disposition"])
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 2)
+        self.assertEqual(self.client.get(reverse("inventory_export"), {"format": "xml"}).status_code, 400)
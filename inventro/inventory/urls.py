@@ -13,6 +13,7 @@ urlpatterns = [
     path('remove_inventory/', views.return_to_inventory_view, name='inventory_return_item'),
     path('cart/', views.cart, name='dashboard_cart'),
     path('inventory/', views.inventory, name='dashboard_inventory'),
+    path('inventory/export/', views.export_items, name='inventory_export'),
     path('inventory/delete/<int:pk>/', views.delete_item, name='inventory_delete'),
     path('item/category/add/', views.add_category, name='add_category'),
     
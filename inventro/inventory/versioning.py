@@ -0,0 +1,38 @@
+"""
+Catalog version for cached renderings.
+
+A number kept in the shared cache that changes, after commit, whenever items
+or categories change. Anything derived from the catalog (the dashboard
+snapshot, the dashboard and analytics template fragments) puts it in its
+cache key, so a write makes every worker and pod miss at once and old
+entries simply expire.
+
+Bumped by the ``Item`` / ``ItemCategory`` signals, by ``items_saved`` for the
+bulk paths, and by the commands that write behind the ORM's back
+(``import_items``, ``rebuild_category_rollups``, ``snapshot_inventory``).
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = "inventro:catalog:version"
+
+
+def catalog_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version() -> int:
+    version = time.time_ns()
+    cache.set(VERSION_KEY, version, None)
+    return version
+
+
+def bump_on_commit():
+    """Bump once the current transaction commits (right away outside one)."""
+    transaction.on_commit(bump_catalog_version)
@@ -1,26 +1,76 @@
 from rest_framework import viewsets
 from rest_framework.views import APIView
-from rest_framework.decorators import api_view
+from rest_framework.decorators import action, api_view
 
 from django.shortcuts import render, get_object_or_404, redirect, HttpResponse
 from rest_framework import viewsets, permissions
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import Cart, CartItem, Item, InventoryItem, ItemCategory
-from .serializers import ItemCategorySerializer, ItemSerializer
-from authentication.models import User
+from .models import Cart, CartItem, Item, InventoryItem, ItemCategory, StockMovement
+from . import alerts, autocomplete, exporting, history, reservations, rollups, search_sync
+from .conditional import ConditionalGetMixin, catalog_list_version, item_version
+from .pagination import estimated_count, keyset_paginate
+from .search import search_items
+from .serializers import ItemCategorySerializer, ItemSerializer, item_rows
+from .signals import items_saved, stock_changed
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 
-from django.db import models
-from django.core.paginator import Paginator
-from django.http import HttpResponseForbidden, HttpResponse
+from collections import defaultdict
+from datetime import date
 
-class ItemViewSet(viewsets.ModelViewSet):
-    queryset = Item.objects.all()
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+from django.http import Http404, HttpResponseForbidden, HttpResponse, StreamingHttpResponse
+
+class ItemViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Item.objects.select_related("category")
     serializer_class = ItemSerializer
 
+    def get_serializer_context(self):
+        # ?fields=id,name,category&expand=category (see ItemSerializer)
+        context = super().get_serializer_context()
+        params = self.request.query_params if self.request else {}
+        for key in ("fields", "expand"):
+            names = {name.strip() for name in params.get(key, "").split(",") if name.strip()}
+            if names:
+                context[key] = names
+        return context
+
+    def list(self, request, *args, **kwargs):
+        # JSON/MessagePack listings skip DRF's per-row field machinery; same data, see item_rows
+        if request.accepted_renderer.format not in ("json", "msgpack") or self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        return self._conditional(request, self.list_version(), lambda: Response(
+            item_rows(self.filter_queryset(self.get_queryset()), self.get_serializer_context())
+        ))
+
+    def list_version(self):
+        return catalog_list_version()
+
+    def object_version(self, pk):
+        return item_version(pk)
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        item = serializer.save()
+        StockMovement.for_item(
+            item, item.in_stock, StockMovement.REASON_CREATED, StockMovement.SOURCE_API, self.request.user
+        ).save()
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous = serializer.instance.in_stock
+        item = serializer.save()
+        if item.in_stock != previous:
+            StockMovement.for_item(
+                item, item.in_stock - previous, StockMovement.REASON_ADJUSTMENT,
+                StockMovement.SOURCE_API, self.request.user,
+            ).save()
+
+    @transaction.atomic
     def destroy(self, request, *args, **kwargs):
         """Soft-delete: mark item inactive so dashboards can log the event."""
         instance = self.get_object()
@@ -30,94 +80,332 @@ class ItemViewSet(viewsets.ModelViewSet):
         except Exception:
             pass
         instance.save(update_fields=["is_active", "updated_at", "updated_by"])
+        StockMovement.for_item(
+            instance, 0, StockMovement.REASON_DELETED, StockMovement.SOURCE_API, request.user
+        ).save()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-class ItemCategoryViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=["get"])
+    def history(self, request, pk=None):
+        """
+        The item's daily snapshots, oldest first: one entry per day its
+        category, stock, cost or active flag changed (``?since=YYYY-MM-DD``).
+        """
+        item = self.get_object()
+        since = request.query_params.get("since")
+        if since:
+            try:
+                since = date.fromisoformat(since)
+            except ValueError:
+                return Response({"since": ["Expected YYYY-MM-DD."]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(history.item_history(item.pk, since or None))
+
+    @action(detail=False, methods=["post", "put", "patch"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Create (POST), replace (PUT) or partially update (PATCH) a list of items.
+
+        Every entry is validated on its own and gets its own ``status`` in the
+        response; valid entries are written with one ``bulk_create`` or
+        ``bulk_update`` and their side effects run once, after commit.
+        PUT/PATCH entries carry the ``id`` of the item they change.
+        """
+        entries = request.data
+        if not isinstance(entries, list):
+            return Response({"detail": "Expected a list of items."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = getattr(settings, "INVENTRO_BULK_MAX_ITEMS", 1000)
+        if len(entries) > limit:
+            return Response(
+                {"detail": f"At most {limit} items per request."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        creating = request.method == "POST"
+        user = request.user if request.user.is_authenticated else None
+        context = {
+            **self.get_serializer_context(),
+            "categories": _referenced_categories(entries),
+            "skus": _referenced_skus(entries),
+        }
+        results = [None] * len(entries)
+
+        with transaction.atomic():
+            instances = {}
+            if not creating:
+                ids = {_entry_id(entry) for entry in entries} - {None}
+                instances = Item.objects.select_for_update(of=("self",)).select_related("category").in_bulk(ids)
+
+            valid, seen = [], set()
+            for index, entry in enumerate(entries):
+                instance = None
+                if not creating:
+                    instance = instances.get(_entry_id(entry))
+                    if instance is None:
+                        results[index] = {"status": status.HTTP_404_NOT_FOUND, "errors": {"id": ["No such item."]}}
+                        continue
+                    if instance.pk in seen:
+                        results[index] = {
+                            "status": status.HTTP_400_BAD_REQUEST,
+                            "errors": {"id": ["Item appears more than once in this request."]},
+                        }
+                        continue
+                    seen.add(instance.pk)
+                serializer = ItemSerializer(
+                    instance, data=entry, partial=request.method == "PATCH", context=context
+                )
+                if not serializer.is_valid():
+                    results[index] = {"status": status.HTTP_400_BAD_REQUEST, "errors": serializer.errors}
+                elif creating and "category" not in serializer.validated_data:
+                    results[index] = {
+                        "status": status.HTTP_400_BAD_REQUEST,
+                        "errors": {"category_id": ["This field is required."]},
+                    }
+                else:
+                    valid.append((index, instance, serializer.validated_data))
+                    if "sku" in serializer.validated_data:
+                        # Later entries of this request may not take it either (new items: any non-id)
+                        context["skus"][serializer.validated_data["sku"]] = instance.pk if instance else -index - 1
+
+            if creating:
+                created = Item.objects.bulk_create([
+                    Item(**data, created_by=user, updated_by=user) for _, _, data in valid
+                ])
+                changes = []
+                movements = [
+                    StockMovement.for_item(item, item.in_stock, StockMovement.REASON_CREATED, StockMovement.SOURCE_API, user)
+                    for item in created
+                ]
+                saved = created
+            else:
+                created, changes, movements = [], [], []
+                fields = {"updated_at", "updated_by"}
+                now = timezone.now()
+                for _, item, data in valid:
+                    previous = item.in_stock
+                    for field, value in data.items():
+                        setattr(item, field, value)
+                    fields.update(data)
+                    item.updated_at = now
+                    item.updated_by = user
+                    changes.append((item, previous))
+                    if item.in_stock != previous:
+                        movements.append(StockMovement.for_item(
+                            item, item.in_stock - previous, StockMovement.REASON_ADJUSTMENT,
+                            StockMovement.SOURCE_API, user,
+                        ))
+                saved = [item for _, item, _ in valid]
+                Item.objects.bulk_update(saved, sorted(fields), batch_size=500)
+            rollups.record(saved, created=creating)
+            search_sync.enqueue(saved)
+            alerts.record(saved, created=creating)
+            StockMovement.objects.bulk_create(movements)
+            transaction.on_commit(lambda: items_saved(created, changes))
+
+        ok = status.HTTP_201_CREATED if creating else status.HTTP_200_OK
+        for (index, _, _), item in zip(valid, saved):
+            results[index] = {"status": ok, "item": ItemSerializer(item, context=context).data}
+
+        if not valid and entries:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif len(valid) < len(entries):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = ok
+        return Response({"results": results}, status=response_status)
+
+def _entry_id(entry):
+    try:
+        return int(entry["id"])
+    except (TypeError, ValueError, KeyError):
+        return None
+
+
+def _referenced_categories(entries) -> dict:
+    """Every category named by ``category_id`` in a bulk payload, in one query."""
+    ids = set()
+    for entry in entries:
+        try:
+            ids.add(int(entry["category_id"]))
+        except (TypeError, ValueError, KeyError):
+            continue
+    return ItemCategory.objects.in_bulk(ids) if ids else {}
+
+
+def _referenced_skus(entries) -> dict:
+    """The ids of the items holding the SKUs in a bulk payload, in one query."""
+    skus = set()
+    for entry in entries:
+        try:
+            skus.add(str(entry["sku"]).strip())
+        except (TypeError, KeyError):
+            continue
+    return dict(Item.objects.filter(sku__in=skus).values_list("sku", "pk")) if skus else {}
+
+
+class ItemCategoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = ItemCategory.objects.all()
     serializer_class = ItemCategorySerializer
 
+    def list_version(self):
+        return catalog_list_version()
+
+    def object_version(self, pk):
+        try:
+            name = ItemCategory.objects.filter(pk=int(pk)).values_list("name", flat=True).first()
+        except (TypeError, ValueError):
+            return None
+        return (f"{pk}:{name}", None) if name is not None else None
+
 class CartAPIView(APIView):
+    """Cart lines are stock reservations; see ``inventory.reservations``."""
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request, format=None):
         """Create or update the current user's cart."""
         item_id = int(request.data.get('item_id'))
         quantity = int(request.data.get('quantity'))
-        
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        cart_item = cart.cart_items.filter(item__id=item_id).first()
-        
-        if not cart_item:
-            item = get_object_or_404(Item, id=item_id)
-            cart_item = CartItem(cart=cart, item=item, quantity=0)
-            
-        if quantity + cart_item.quantity > cart_item.item.in_stock:
-            return Response({"detail": "Not enough stock available."}, status=status.HTTP_400_BAD_REQUEST)
-
-        cart_item.quantity += quantity
-        cart_item.save()
+
+        try:
+            reservations.reserve(request.user, item_id, quantity)
+        except Item.DoesNotExist:
+            raise Http404
+        except reservations.InsufficientStock as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         return redirect("dashboard_cart")
    
     def patch(self, request, format=None):
         """Update the quantity of an item in the current user's cart."""
         item_id = int(request.data.get('item_id'))
         quantity = int(request.data.get('quantity'))
-        
-        cart = get_object_or_404(Cart, user=request.user)
-        cart_item = get_object_or_404(CartItem, cart=cart, item__id=item_id)
-
-        if quantity > cart_item.item.in_stock:
-            return Response({"detail": "Not enough stock available."}, status=status.HTTP_400_BAD_REQUEST)
 
-        cart_item.quantity = quantity
-        cart_item.save()
+        try:
+            reservations.set_quantity(request.user, item_id, quantity)
+        except (Item.DoesNotExist, CartItem.DoesNotExist):
+            raise Http404
+        except reservations.InsufficientStock as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         return Response(status=status.HTTP_200_OK)
     
     def delete(self, request, format=None):
-        """Remove an item from the current user's cart."""
-        cart = get_object_or_404(Cart, user=request.user)
-        item_id = request.data.get('item_id')
+        """Remove an item (or ``quantity`` of it) from the current user's cart."""
+        item_id = int(request.data.get('item_id'))
         quantity = request.data.get('quantity')
-        cart_item = get_object_or_404(CartItem, cart=cart, item__id=item_id)
-
-        if cart_item.quantity >quantity:
-            return Response({"detail": "Quantity to remove exceeds quantity in cart."}, status=status.HTTP_400_BAD_REQUEST)
-        elif cart_item.quantity == quantity:
-            cart_item.quantity -= quantity
-            cart_item.save()
-            
-            if cart_item.quantity == 0:
-                cart_item.delete()
-        
-            return Response(status=status.HTTP_204_NO_CONTENT)
-    
+        quantity = int(quantity) if quantity not in (None, '') else None
+
+        try:
+            reservations.release(request.user, item_id, quantity)
+        except (Item.DoesNotExist, CartItem.DoesNotExist):
+            raise Http404
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 @login_required
 def add_to_inventory_view(request):
-    """Add an item to the user's inventory."""
-    user = User.objects.get(id=request.user.id)
-    cart = user.cart.first()
-    
-    for cart_item in cart.cart_items.all():
-        item = cart_item.item
-        quantity = cart_item.quantity
-        
-        if item.in_stock < quantity:
-            return HttpResponse(status=400, content=f"Not enough {item.name}'s in stock")
-        
-        if user.inventory.filter(item=item).exists():
-            inventory_item = user.inventory.get(item=item)
-            inventory_item.quantity += quantity
-            inventory_item.save()
-        else:
-            inventory_item = InventoryItem(borrower=user, item=item, quantity=quantity)
-            inventory_item.save()
-            user.inventory.add(inventory_item)
-        
-        item.in_stock -= quantity
-        item.save()
-        
-        cart_item.delete()
-    
+    """
+    Check out the user's cart into their inventory.
+
+    The whole checkout is one transaction with a fixed number of queries:
+    lock every affected ``Item`` row and the cart lines, check all lines at
+    once against the stock no other unexpired reservation holds, upsert the ``InventoryItem`` rows in bulk, decrement
+    ``in_stock`` with a single ``UPDATE`` and clear the cart with a single
+    ``DELETE``.
+    """
+    user = request.user
+    cart_lines = CartItem.objects.filter(cart__user=user)
+
+    with transaction.atomic():
+        item_ids = set(cart_lines.values_list("item_id", flat=True))
+        if not item_ids:
+            return redirect("user_inventory_page")
+
+        # Items first, then cart lines: the lock order reservations use
+        items = {
+            item.pk: item
+            for item in Item.objects.select_for_update(of=("self",))
+            .select_related("category")
+            .filter(pk__in=item_ids)
+            .order_by("pk")
+        }
+        now = timezone.now()
+        wanted, own_live = defaultdict(int), defaultdict(int)
+        locked_lines = cart_lines.select_for_update().filter(item_id__in=item_ids)
+        for item_id, quantity, expires_at in locked_lines.values_list("item_id", "quantity", "expires_at"):
+            wanted[item_id] += quantity
+            if expires_at > now:
+                own_live[item_id] += quantity
+        if not wanted:
+            return redirect("user_inventory_page")
+
+        # Lapsed lines (anyone's) stop holding stock even before the sweeper
+        # releases them; a lapsed line of this cart competes for what is free
+        lapsed = dict(
+            CartItem.objects.filter(item_id__in=wanted, expires_at__lte=now)
+            .order_by()
+            .values("item_id")
+            .annotate(total=models.Sum("quantity"))
+            .values_list("item_id", "total")
+        )
+        for item_id, quantity in wanted.items():
+            item = items[item_id]
+            available = item.in_stock - (item.reserved - lapsed.get(item_id, 0))
+            if quantity > available + own_live[item_id]:
+                return HttpResponse(status=400, content=f"Not enough {item.name}'s in stock")
+
+        held = {
+            inventory_item.item_id: inventory_item
+            for inventory_item in InventoryItem.objects.select_for_update().filter(
+                borrower=user, item_id__in=wanted
+            )
+        }
+        to_update, to_create = [], []
+        for item_id, quantity in wanted.items():
+            if item_id in held:
+                held[item_id].quantity += quantity
+                to_update.append(held[item_id])
+            else:
+                to_create.append(InventoryItem(borrower=user, item_id=item_id, quantity=quantity))
+        if to_update:
+            InventoryItem.objects.bulk_update(to_update, ["quantity"])
+        if to_create:
+            InventoryItem.objects.bulk_create(to_create)
+
+        decrements = [
+            models.When(pk=item_id, then=models.F("in_stock") - quantity)
+            for item_id, quantity in wanted.items()
+        ]
+        # The cart lines' reservations turn into withdrawals
+        unreserve = [
+            models.When(pk=item_id, then=models.F("reserved") - quantity)
+            for item_id, quantity in wanted.items()
+        ]
+        Item.objects.filter(pk__in=wanted).update(
+            in_stock=models.Case(*decrements, output_field=models.IntegerField()),
+            reserved=models.Case(*unreserve, output_field=models.PositiveIntegerField()),
+            updated_at=timezone.now(),
+            updated_by=user,
+        )
+        locked_lines.delete()
+
+        changes, movements = [], []
+        for item_id, quantity in wanted.items():
+            item = items[item_id]
+            previous = item.in_stock
+            item.in_stock -= quantity
+            changes.append((item, previous))
+            movements.append(StockMovement.for_item(
+                item, -quantity, StockMovement.REASON_CHECKOUT, StockMovement.SOURCE_WEB, user
+            ))
+        rollups.record(items[item_id] for item_id in wanted)
+        search_sync.enqueue(items[item_id] for item_id in wanted)
+        alerts.record(items[item_id] for item_id in wanted)
+        StockMovement.objects.bulk_create(movements)
+        # update() sends no post_save; replay the stock side effects once committed
+        transaction.on_commit(lambda: stock_changed(changes))
+
     return redirect("user_inventory_page")
 
 @login_required
@@ -136,50 +424,107 @@ def add_category(request):
 
 @login_required
 def return_to_inventory_view(request):
-    """Remove an item from the user's inventory."""
-    user = User.objects.get(id=request.user.id)
+    """
+    Return ``quantity`` units from the user's inventory to stock.
+
+    One transaction: the ``Item`` and ``InventoryItem`` rows are locked in the
+    order checkout takes them, the held quantity is checked and ``in_stock``
+    is incremented with an ``F()`` expression.
+    """
+    user = request.user
     item_id = int(request.POST.get('item_id'))
     quantity = int(request.POST.get('quantity'))
-    
-    item = get_object_or_404(Item, id=item_id)
-    inventory_item = get_object_or_404(InventoryItem, borrower=user, item=item)
-    
-    if inventory_item.quantity >= quantity:
-        inventory_item.quantity -= quantity
-        inventory_item.save()
-    
-    if inventory_item.quantity == 0:
-        inventory_item.delete()
 
-    item.in_stock += quantity
-    item.save()
+    with transaction.atomic():
+        item = get_object_or_404(
+            Item.objects.select_for_update(of=("self",)).select_related("category"), id=item_id
+        )
+        inventory_item = get_object_or_404(
+            InventoryItem.objects.select_for_update(), borrower=user, item=item
+        )
+        if quantity <= 0 or inventory_item.quantity < quantity:
+            return HttpResponse(
+                status=400, content=f"You hold {inventory_item.quantity} of {item.name}, cannot return {quantity}"
+            )
+
+        if inventory_item.quantity == quantity:
+            inventory_item.delete()
+        else:
+            inventory_item.quantity -= quantity
+            inventory_item.save(update_fields=["quantity"])
+
+        Item.objects.filter(pk=item.pk).update(
+            in_stock=models.F("in_stock") + quantity,
+            updated_at=timezone.now(),
+            updated_by=user,
+        )
+        previous = item.in_stock
+        # Read back what the UPDATE wrote; refresh_from_db() would also reset
+        # the loaded values the rollup and alert checks compare against
+        item.in_stock = Item.objects.filter(pk=item.pk).values_list("in_stock", flat=True).get()
+        rollups.record([item])
+        search_sync.enqueue([item])
+        alerts.record([item])
+        StockMovement.for_item(
+            item, quantity, StockMovement.REASON_RETURN, StockMovement.SOURCE_WEB, user
+        ).save()
+        # update() sends no post_save; replay the stock side effects once committed
+        transaction.on_commit(lambda: stock_changed([(item, previous)]))
+
     return redirect("user_inventory_page")
 
 @login_required
 def inventory(request):
-    user = User.objects.get(id=request.user.id)
     categories = ItemCategory.objects.all()
-    items = filter_items(request)
+    # ``available`` is in_stock minus every live cart reservation
+    items = filter_items(request).with_available()
 
     per_page = get_pos_int_parameter('per_page', request, 10)
-    page_number = get_pos_int_parameter('page', request, 1)
+    cursor = request.GET.get('cursor', '')
+
+    keys = ("name", "id")
+    if (request.GET.get('q') or '').strip():
+        # Best matches first; the cursor carries the rank, ties broken by id
+        items = items.annotate(search_rank=models.F("rank"))
+        keys = ("-search_rank", "id")
+    page = keyset_paginate(items, per_page, cursor, keys=keys)
+    # Only the first page carries a total; scrolled-in pages never count
+    if not cursor and getattr(settings, "INVENTRO_INVENTORY_SHOW_TOTAL", True):
+        page.total = estimated_count(filter_items(request))
+
+    context = {
+        'items': page,
+        'categories': categories,
+        'cursor': cursor,
+        'next_query': _next_page_query(request, page),
+        'total': page.total,
+    }
+    if cursor:
+        return render(request, 'cart/partials/inventory_rows.html', context)
 
-    paginator = Paginator(items, per_page)
-    items = paginator.get_page(page_number)
-    
-    cart = user.cart.first()
-    
-    if cart:
-        for item in items:
-            cart_item = cart.cart_items.filter(item=item).first()
-            if cart_item:
-                item.in_stock -= cart_item.quantity
-            
-        
     if 'HX-Request' in request.headers:
-        return render(request, 'cart/partials/inventory_table.html', {'items': items, "categories": categories,})
-    
-    return render(request, "cart/inventory.html", {'items': items, "categories": categories, "full_inventory": True})
+        return render(request, 'cart/partials/inventory_table.html', context)
+
+    return render(request, "cart/inventory.html", {**context, "full_inventory": True})
+
+
+@login_required
+def export_items(request):
+    """
+    Stream the inventory, narrowed by the same filters as the inventory page,
+    as ``?format=csv`` (default) or ``?format=ndjson``.
+    """
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in exporting.FORMATS:
+        return HttpResponse(f"Unknown export format: {fmt}", status=400)
+
+    content_type, extension = exporting.FORMATS[fmt]
+    response = StreamingHttpResponse(
+        exporting.export_lines(filter_items(request), fmt), content_type=content_type
+    )
+    stamp = timezone.localdate().isoformat()
+    response['Content-Disposition'] = f'attachment; filename="inventory-{stamp}.{extension}"'
+    return response
 
 
 @login_required
@@ -195,20 +540,24 @@ def item_form(request, id=None):
 @login_required
 def my_inventory_view(request):
     """Render the user's inventory page."""
-    user = User.objects.get(id=request.user.id)
-    inventory_items = user.inventory.all()
-    
+    inventory_items = InventoryItem.objects.filter(borrower=request.user).select_related('item__category')
+
     per_page = get_pos_int_parameter('per_page', request, 10)
-    page_number = get_pos_int_parameter('page', request, 1)
+    cursor = request.GET.get('cursor', '')
 
-    paginator = Paginator(inventory_items, per_page)
-    inventory_items = paginator.get_page(page_number)
-    print(inventory_items)
+    page = keyset_paginate(inventory_items, per_page, cursor, keys=("item__name", "id"))
+    context = {
+        'items': page,
+        'cursor': cursor,
+        'next_query': _next_page_query(request, page),
+    }
+    if cursor:
+        return render(request, 'cart/partials/my_inventory_rows.html', context)
 
     if 'HX-Request' in request.headers:
-        return render(request, 'cart/partials/my_inventory_table.html', {'items': inventory_items})
+        return render(request, 'cart/partials/my_inventory_table.html', context)
 
-    return render(request, "cart/inventory.html", {'items': inventory_items, "full_inventory": False})
+    return render(request, "cart/inventory.html", {**context, "full_inventory": False})
 
 @login_required
 def cart(request):
@@ -216,7 +565,10 @@ def cart(request):
     Display the current user's cart.  Creates one if it doesn't exist.
     """
     cart_obj, _ = Cart.objects.get_or_create(user=request.user)
-    cart_items = cart_obj.cart_items.select_related('item').all()
+    # A line can grow by whatever nobody else has reserved
+    cart_items = cart_obj.cart_items.select_related('item').annotate(
+        max_quantity=models.F('item__in_stock') - models.F('item__reserved') + models.F('quantity')
+    )
     return render(request, "cart/cart.html", {"cart_items": cart_items, 'page_num': 1})
 
 
@@ -230,15 +582,33 @@ def get_pos_int_parameter(param_name: str, request, default: int) -> int:
     finally:
         return param
 
+def _next_page_query(request, page) -> str:
+    """Query string for the next keyset page, keeping the active filters."""
+    if not page.has_next:
+        return ''
+    query = request.GET.copy()
+    query.pop('page', None)
+    query['cursor'] = page.next_cursor
+    return query.urlencode()
+
 def filter_items(request):
+    return filtered_items(request.GET)
+
+
+def filtered_items(params):
+    """
+    Active items matching the inventory page filters in ``params`` (``q``,
+    ``category``, ``status``), annotated with ``value``. Takes any mapping,
+    so management commands can filter without building a request.
+    """
     items = Item.objects.select_related('category').filter(is_active=True)
 
-    q = (request.GET.get('q') or '').strip()
-    status = request.GET.get('status')
-    category = request.GET.get('category')
+    q = (params.get('q') or '').strip()
+    status = params.get('status')
+    category = params.get('category')
 
     if q:
-        items = items.filter(models.Q(name__icontains=q) | models.Q(sku__icontains=q))
+        items = search_items(items, q)
 
     if category:
         items = items.filter(category__name__iexact=category)
@@ -294,6 +664,9 @@ def delete_item(request, pk):
         except Exception:
             pass
         item.save()
+        StockMovement.for_item(
+            item, 0, StockMovement.REASON_DELETED, StockMovement.SOURCE_WEB, request.user
+        ).save()
         try:
             messages.success(request, f"Deleted item: {name}")
         except Exception:
@@ -313,18 +686,15 @@ def delete_item(request, pk):
 @api_view(["GET"])
 def api_search(request):
     """
-    Simple search endpoint used by the frontend quick-search.
+    Quick-search endpoint used by the frontend.
     GET /api/search/?q=term
+
+    Served from this worker's in-memory autocomplete index (see
+    ``inventory.autocomplete``), so a keystroke does not touch the database.
     """
     q = (request.GET.get("q") or "").strip()
-    results = {"items": [], "inventory": []}
+    limit = min(get_pos_int_parameter("limit", request, 10) or 10, 50)
+    results = {"items": []}
     if q:
-        results["items"] = list(
-            Item.objects.filter(name__icontains=q).values("id", "name", "SKU")[:10]
-        )
-        results["inventory"] = list(
-            InventoryItem.objects.filter(name__icontains=q).values(
-                "id", "name", "category", "location"
-            )[:10]
-        )
-    return Response(results)
\ No newline at end of file
+        results["items"] = autocomplete.get_index().search(q, limit)
+    return Response(results)
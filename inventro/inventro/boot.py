@@ -0,0 +1,89 @@
+"""
+Worker warm-up.
+
+``warm()`` does the first-request work of a fresh worker ahead of time, so
+the first real requests after a scale-up do not pay for it:
+
+* ``urls`` – import every view module and compile the URL patterns;
+* ``templates`` – load and compile the page templates;
+* ``database`` – open the connection;
+* ``dashboard`` – compute the shared dashboard snapshot (see
+  ``dashboard.snapshot``);
+* ``autocomplete`` – build this process's autocomplete index.
+
+It runs from ``manage.py warmup`` and, under gunicorn, in every worker
+before it accepts requests (``gunicorn.conf.py``). With ``--preload`` the
+steps that do not touch the database run once in the master instead, and
+the workers share those pages copy-on-write.
+"""
+import logging
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+TEMPLATES = [
+    "dashboard/index.html",
+    "dashboard/analytics.html",
+    "cart/inventory.html",
+    "cart/cart.html",
+    "cart/item_form.html",
+]
+
+STATIC_STEPS = ("urls", "templates")
+STEPS = (*STATIC_STEPS, "database", "dashboard", "autocomplete")
+
+
+def _urls():
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+
+
+def _templates():
+    from django.template.loader import get_template
+
+    for name in TEMPLATES:
+        get_template(name)
+
+
+def _database():
+    from django.db import connection
+
+    connection.ensure_connection()
+
+
+def _dashboard():
+    from dashboard.snapshot import get_snapshot
+
+    get_snapshot()
+
+
+def _autocomplete():
+    from inventory import autocomplete
+
+    autocomplete.get_index()
+
+
+_RUNNERS = {
+    "urls": _urls,
+    "templates": _templates,
+    "database": _database,
+    "dashboard": _dashboard,
+    "autocomplete": _autocomplete,
+}
+
+
+def warm(steps=STEPS) -> list:
+    """Run ``steps`` in order; returns ``[(step, milliseconds, error or None)]``."""
+    timings = []
+    for step in steps:
+        start = time.perf_counter()
+        error = None
+        try:
+            _RUNNERS[step]()
+        except Exception as e:
+            # A cold cache is not a reason to keep the worker down
+            LOGGER.warning("warm-up step %s failed: %s", step, e)
+            error = str(e)
+        timings.append((step, (time.perf_counter() - start) * 1000, error))
+    return timings
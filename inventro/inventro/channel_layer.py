@@ -0,0 +1,512 @@
+"""
+Channel layer on the Postgres we already run (LISTEN/NOTIFY), so a
+``group_send`` from any worker or pod reaches the websocket consumers of all
+of them without Redis. ``CHANNEL_LAYER=postgres`` selects it (see settings).
+
+* Every process gets one Postgres channel, ``inventro_layer_<id>``, and names
+  its consumers' channels ``specific.<id>!<random>``. A listener thread holds
+  one connection that ``LISTEN``s on it and hands arriving messages to the
+  consumers' event loop.
+* Sends and group operations go through one publisher thread with a second
+  connection. Each round it takes everything queued since the last one (after
+  waiting ``batch_delay`` seconds), looks up which processes have members in
+  every target group with one query, packs the entries for each process into
+  as few NOTIFY payloads as fit in ``max_payload`` bytes and commits them
+  together.
+* A ``group_send`` travels once per process, addressed to the group; the
+  receiving process delivers it to its own members. For that every process
+  keeps a map of its channels' groups: its publisher updates it for local
+  ``group_add``/``group_discard`` calls, other processes send it the changes
+  they made, and the listener reloads it from the table on reconnect.
+* A message too large for a NOTIFY payload spills over into
+  ``channel_layer_message`` and the notification carries only its id. Named
+  channels (no ``!``) always go through that table, so exactly one receiving
+  process claims each message.
+* Each local channel buffers at most ``capacity`` messages (or its
+  ``channel_capacity`` pattern). Messages for a full buffer are dropped
+  (``ChannelFull`` for a send within the process), and messages older than
+  ``expiry`` seconds are skipped on receive.
+* Group membership lives in ``channel_layer_group``, shared by every process.
+  A process removes its own rows when it exits; rows of one that crashed
+  expire after ``group_expiry`` seconds.
+"""
+import asyncio
+import atexit
+import base64
+import hashlib
+import logging
+import os
+import queue
+import random
+import string
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import Future
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+from django.conf import settings
+
+LOGGER = logging.getLogger(__name__)
+
+PG_CHANNEL_PREFIX = "inventro_layer_"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+NOTIFY_LIMIT = 7900
+NAMED_PREFIX = PG_CHANNEL_PREFIX + "n_"
+SPILL_MARKER = "@"
+CLEANUP_INTERVAL = 30
+LIBPQ_OPTIONS = ("sslmode", "sslrootcert", "sslcert", "sslkey", "connect_timeout", "options")
+
+
+def _pack(value) -> bytes:
+    import msgpack
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def _unpack(data: bytes):
+    import msgpack
+    return msgpack.unpackb(data, raw=False)
+
+
+def _array_header(length: int) -> bytes:
+    import msgpack
+    return msgpack.Packer().pack_array_header(length)
+
+
+class PostgresChannelLayer(BaseChannelLayer):
+    extensions = ["groups", "flush"]
+
+    def __init__(
+        self,
+        database="default",
+        expiry=60,
+        group_expiry=86400,
+        capacity=100,
+        channel_capacity=None,
+        batch_delay=0.001,
+        max_payload=NOTIFY_LIMIT,
+    ):
+        super().__init__(expiry=expiry, capacity=capacity)
+        self.channel_capacity = self.compile_capacities(channel_capacity or {})
+        self.database = database
+        self.group_expiry = group_expiry
+        self.batch_delay = batch_delay
+        self.max_payload = min(max_payload, NOTIFY_LIMIT)
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._pid = None
+
+    # Per-process state; rebuilt after a fork (gunicorn --preload)
+
+    def _start(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.client_id = uuid.uuid4().hex[:16]
+            self.pg_channel = PG_CHANNEL_PREFIX + self.client_id
+            self.buffers = {}  # channel -> (loop, asyncio.Queue)
+            self.local_groups = defaultdict(dict)  # group -> {channel: expiry timestamp}
+            self._ops = queue.Queue()
+            self._listens = queue.Queue()
+            self._closing = threading.Event()
+            self._last_cleanup = 0.0
+            self._threads = [
+                threading.Thread(target=self._publish_loop, name="channel-layer-publish", daemon=True),
+                threading.Thread(target=self._listen_loop, name="channel-layer-listen", daemon=True),
+            ]
+            for thread in self._threads:
+                thread.start()
+            if self._pid is None:
+                atexit.register(self.close)
+            self._pid = os.getpid()
+
+    def _connect(self, autocommit):
+        import psycopg
+
+        db = settings.DATABASES[self.database]
+        params = {
+            "dbname": db.get("NAME"),
+            "user": db.get("USER"),
+            "password": db.get("PASSWORD"),
+            "host": db.get("HOST"),
+            "port": db.get("PORT"),
+            **{key: value for key, value in db.get("OPTIONS", {}).items() if key in LIBPQ_OPTIONS},
+        }
+        params = {key: value for key, value in params.items() if value not in (None, "")}
+        return psycopg.connect(autocommit=autocommit, application_name="inventro-channel-layer", **params)
+
+    # Channel names
+
+    def _pg_channel_for(self, channel: str) -> str:
+        """The Postgres channel a layer channel is delivered on."""
+        if "!" in channel:
+            return PG_CHANNEL_PREFIX + channel.split("!", 1)[0][-16:]
+        digest = hashlib.sha1(channel.encode()).hexdigest()[:24]
+        return NAMED_PREFIX + digest
+
+    def _is_local(self, channel: str) -> bool:
+        return "!" in channel and channel.split("!", 1)[0].endswith(self.client_id)
+
+    # Channel layer API
+
+    async def new_channel(self, prefix="specific."):
+        self._start()
+        suffix = "".join(random.choices(string.ascii_letters, k=12))
+        channel = f"{prefix}{self.client_id}!{suffix}"
+        self._buffer(channel)
+        return channel
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        self._start()
+        if self._is_local(channel):
+            entry = self.buffers.get(channel)
+            if entry is not None and entry[0] is not asyncio.get_running_loop():
+                self._deliver([(channel, time.time() + self.expiry, message)])
+            elif not self._deliver_now(channel, time.time() + self.expiry, message):
+                raise ChannelFull(channel)
+            return
+        await self._run(("send", [channel], message, time.time()))
+
+    async def receive(self, channel):
+        assert self.valid_channel_name(channel)
+        self._start()
+        named = "!" not in channel
+        if named and channel not in self.buffers:
+            # This process starts claiming the named channel's messages
+            self._buffer(channel)
+            self._listens.put(self._pg_channel_for(channel))
+        _, buffer = self._buffer(channel)
+        try:
+            while True:
+                deadline, message = await buffer.get()
+                if deadline >= time.time():
+                    return message
+        except asyncio.CancelledError:
+            # The consumer is gone; stop buffering for it. A named channel
+            # keeps its buffer: this process has claimed messages for it
+            if not named:
+                self.buffers.pop(channel, None)
+            raise
+
+    async def group_add(self, group, channel):
+        assert self.valid_group_name(group), "Group name not valid"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        await self._run(("add", group, channel))
+
+    async def group_discard(self, group, channel):
+        assert self.valid_group_name(group), "Group name not valid"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        await self._run(("discard", group, channel))
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "Message is not a dict"
+        assert self.valid_group_name(group), "Group name not valid"
+        await self._run(("group_send", group, message, time.time()))
+
+    async def flush(self):
+        self._start()
+        self.buffers.clear()
+        await self._run(("flush",))
+
+    def close(self):
+        """Stop the threads and drop this process's group memberships."""
+        if self._pid != os.getpid() or self._closing.is_set():
+            return
+        try:
+            self._submit(("forget",)).result(timeout=5)
+        except Exception as e:
+            LOGGER.warning("channel layer close failed: %s", e)
+        self._closing.set()
+        self._ops.put(None)
+
+    # Local buffers
+
+    def _buffer(self, channel):
+        entry = self.buffers.get(channel)
+        if entry is None:
+            entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.get_capacity(channel)))
+            self.buffers[channel] = entry
+        return entry
+
+    def _deliver_now(self, channel, deadline, message) -> bool:
+        """Put a message in a local buffer; runs on the buffer's event loop."""
+        entry = self.buffers.get(channel)
+        if entry is None:
+            return True
+        try:
+            entry[1].put_nowait((deadline, message))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        return True
+
+    def _deliver(self, deliveries):
+        """Hand ``(channel, deadline, message)`` to the local buffers, from any thread."""
+        by_loop = defaultdict(list)
+        for channel, deadline, message in deliveries:
+            entry = self.buffers.get(channel)
+            if entry is not None:
+                by_loop[entry[0]].append((channel, deadline, message))
+        for loop, batch in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(self._deliver_batch, batch)
+            except RuntimeError:
+                pass  # the loop is closed; its consumers are gone
+
+    def _deliver_batch(self, batch):
+        for channel, deadline, message in batch:
+            self._deliver_now(channel, deadline, message)
+
+    # Publisher thread
+
+    def _submit(self, op) -> Future:
+        self._start()
+        future = Future()
+        self._ops.put((op, future))
+        return future
+
+    async def _run(self, op):
+        return await asyncio.wrap_future(self._submit(op))
+
+    def _publish_loop(self):
+        conn = None
+        while True:
+            item = self._ops.get()
+            if item is None:
+                break
+            if self.batch_delay:
+                time.sleep(self.batch_delay)
+            batch = [item]
+            while True:
+                try:
+                    item = self._ops.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._ops.put(None)
+                    break
+                batch.append(item)
+            try:
+                if conn is None or conn.closed:
+                    conn = self._connect(autocommit=False)
+                local = self._publish(conn, [op for op, _ in batch])
+            except Exception as e:
+                LOGGER.warning("channel layer publish failed: %s", e)
+                if conn is not None:
+                    conn.close()
+                conn = None
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self._deliver(local)
+            for _, future in batch:
+                future.set_result(None)
+        if conn is not None:
+            conn.close()
+
+    def _publish(self, conn, ops) -> list:
+        """Apply one batch of operations in one transaction. Returns the local deliveries."""
+        adds = [op[1:] for op in ops if op[0] == "add"]
+        discards = [op[1:] for op in ops if op[0] == "discard"]
+        groups = {op[1] for op in ops if op[0] == "group_send"}
+        expires = time.time() + self.group_expiry
+        # Which processes (and named channels) belong to each target group
+        members = defaultdict(list)
+
+        with conn.transaction(), conn.cursor() as cursor:
+            if any(op[0] == "flush" for op in ops):
+                cursor.execute("DELETE FROM channel_layer_group")
+                cursor.execute("DELETE FROM channel_layer_message")
+            if any(op[0] == "forget" for op in ops):
+                cursor.execute("DELETE FROM channel_layer_group WHERE pg_channel = %s", [self.pg_channel])
+            if adds:
+                cursor.executemany(
+                    """
+                    INSERT INTO channel_layer_group (group_name, channel, pg_channel, expires_at)
+                    VALUES (%s, %s, %s, to_timestamp(%s))
+                    ON CONFLICT (group_name, channel) DO UPDATE SET expires_at = EXCLUDED.expires_at
+                    """,
+                    [(group, channel, self._pg_channel_for(channel), expires) for group, channel in adds],
+                )
+            if discards:
+                cursor.executemany(
+                    "DELETE FROM channel_layer_group WHERE group_name = %s AND channel = %s", discards
+                )
+            if groups:
+                cursor.execute(
+                    """
+                    SELECT DISTINCT group_name, pg_channel,
+                        CASE WHEN pg_channel LIKE %s THEN channel ELSE '' END
+                    FROM channel_layer_group
+                    WHERE group_name = ANY(%s) AND expires_at > now()
+                    """,
+                    [NAMED_PREFIX.replace("_", r"\_") + "%", list(groups)],
+                )
+                for group, pg_channel, channel in cursor.fetchall():
+                    members[group].append((pg_channel, channel))
+
+            # Walk the operations in order, so messages keep their order per channel
+            local = []
+            outgoing = defaultdict(list)  # pg channel -> entries
+            for op in ops:
+                kind = op[0]
+                if kind in ("add", "discard"):
+                    group, channel = op[1:]
+                    pg_channel = self._pg_channel_for(channel)
+                    if pg_channel == self.pg_channel:
+                        self._membership(kind, group, channel, expires)
+                    elif not pg_channel.startswith(NAMED_PREFIX):
+                        # The member's process keeps its own view of its groups
+                        outgoing[pg_channel].append([kind, group, channel, expires])
+                elif kind == "group_send":
+                    group, message, sent_at = op[1:]
+                    deadline = sent_at + self.expiry
+                    for pg_channel, channel in members[group]:
+                        if pg_channel == self.pg_channel:
+                            local.extend(self._group_deliveries(group, message, deadline))
+                        elif channel:
+                            outgoing[pg_channel].append(["send", [channel], message, deadline])
+                        else:
+                            outgoing[pg_channel].append(["group_send", group, message, deadline])
+                elif kind == "send":
+                    channels, message, sent_at = op[1:]
+                    deadline = sent_at + self.expiry
+                    outgoing[self._pg_channel_for(channels[0])].append(["send", channels, message, deadline])
+            self._notify(cursor, outgoing)
+
+            if time.monotonic() - self._last_cleanup > CLEANUP_INTERVAL:
+                self._last_cleanup = time.monotonic()
+                cursor.execute("DELETE FROM channel_layer_group WHERE expires_at <= now()")
+                cursor.execute(
+                    "DELETE FROM channel_layer_message WHERE created_at < now() - make_interval(secs => %s)",
+                    [self.expiry],
+                )
+        return local
+
+    # This process's group memberships, kept up to date by its own publisher
+    # and by add/discard entries from other processes
+
+    def _membership(self, kind, group, channel, expires=None):
+        with self._lock:
+            if kind == "add":
+                self.local_groups[group][channel] = expires
+            else:
+                self.local_groups[group].pop(channel, None)
+                if not self.local_groups[group]:
+                    del self.local_groups[group]
+
+    def _group_deliveries(self, group, message, deadline) -> list:
+        now = time.time()
+        with self._lock:
+            channels = [channel for channel, expires in self.local_groups.get(group, {}).items() if expires > now]
+        return [(channel, deadline, message) for channel in channels]
+
+    def _notify(self, cursor, outgoing):
+        """Pack the entries for each Postgres channel into NOTIFY payloads (or spill rows)."""
+        notifications, spills = [], []
+        for pg_channel, entries in outgoing.items():
+            if pg_channel.startswith(NAMED_PREFIX):
+                # Named channel: one stored message per entry, claimed by one receiver
+                spills.extend((pg_channel, _pack([entry])) for entry in entries)
+                continue
+            chunk, size = [], 0
+            for entry in entries:
+                packed = _pack(entry)
+                # base64 grows the packed bytes by a third, plus the array header
+                encoded = (len(packed) + 2) // 3 * 4
+                if chunk and size + encoded + 8 > self.max_payload:
+                    notifications.append((pg_channel, self._encode(chunk)))
+                    chunk, size = [], 0
+                if encoded + 8 > self.max_payload:
+                    spills.append((pg_channel, _array_header(1) + packed))
+                    continue
+                chunk.append(packed)
+                size += encoded
+            if chunk:
+                notifications.append((pg_channel, self._encode(chunk)))
+
+        for pg_channel, payload in spills:
+            cursor.execute(
+                "INSERT INTO channel_layer_message (pg_channel, payload, created_at) VALUES (%s, %s, now()) "
+                "RETURNING id",
+                [pg_channel, payload],
+            )
+            notifications.append((pg_channel, f"{SPILL_MARKER}{cursor.fetchone()[0]}"))
+        if notifications:
+            cursor.executemany("SELECT pg_notify(%s, %s)", notifications)
+
+    @staticmethod
+    def _encode(chunk) -> str:
+        return base64.b64encode(_array_header(len(chunk)) + b"".join(chunk)).decode("ascii")
+
+    # Listener thread
+
+    def _listen_loop(self):
+        listening = [self.pg_channel]
+        while not self._closing.is_set():
+            conn = None
+            try:
+                conn = self._connect(autocommit=True)
+                for pg_channel in listening:
+                    conn.execute(f"LISTEN {pg_channel}")
+                # Catch up on memberships added while we were not listening
+                rows = conn.execute(
+                    "SELECT group_name, channel, extract(epoch FROM expires_at) FROM channel_layer_group "
+                    "WHERE pg_channel = %s",
+                    [self.pg_channel],
+                ).fetchall()
+                for group, channel, expires in rows:
+                    self._membership("add", group, channel, float(expires))
+                while not self._closing.is_set():
+                    while not self._listens.empty():
+                        pg_channel = self._listens.get()
+                        if pg_channel not in listening:
+                            conn.execute(f"LISTEN {pg_channel}")
+                            listening.append(pg_channel)
+                            # Claim what was sent before anyone listened
+                            self._receive(conn, [(pg_channel, None)])
+                    notifies = list(conn.notifies(timeout=0.5, stop_after=1))
+                    if notifies:
+                        self._receive(conn, [(notify.channel, notify.payload) for notify in notifies])
+            except Exception as e:
+                if not self._closing.is_set():
+                    LOGGER.warning("channel layer listener failed, reconnecting: %s", e)
+                    time.sleep(1)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _receive(self, conn, notifications):
+        entries, spilled, backlog = [], [], []
+        for pg_channel, payload in notifications:
+            if payload is None:
+                backlog.append(pg_channel)
+            elif payload.startswith(SPILL_MARKER):
+                spilled.append(int(payload[1:]))
+            else:
+                entries.extend(_unpack(base64.b64decode(payload)))
+        if spilled or backlog:
+            rows = conn.execute(
+                "DELETE FROM channel_layer_message WHERE id = ANY(%s) OR pg_channel = ANY(%s) "
+                "RETURNING id, payload",
+                [spilled, backlog],
+            ).fetchall()
+            for _, payload in sorted(rows):
+                entries.extend(_unpack(bytes(payload)))
+
+        deliveries = []
+        for kind, target, *rest in entries:
+            if kind in ("add", "discard"):
+                self._membership(kind, target, rest[0], rest[1])
+            elif kind == "group_send":
+                deliveries.extend(self._group_deliveries(target, *rest))
+            else:
+                message, deadline = rest
+                deliveries.extend((channel, deadline, message) for channel in target)
+        self._deliver(deliveries)
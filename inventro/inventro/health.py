@@ -0,0 +1,45 @@
+"""
+Liveness and readiness endpoints for the Kubernetes probes.
+
+``HealthCheckMiddleware`` sits first in ``MIDDLEWARE`` and answers
+``/healthz`` and ``/readyz`` itself, before sessions, auth, CSRF and the
+``ALLOWED_HOSTS`` check (probes address the pod IP):
+
+* ``/healthz`` – the process is up and serving; touches nothing else.
+* ``/readyz`` – the database answers a ``SELECT 1``; ``503`` otherwise, so
+  the pod is taken out of the Service until it recovers.
+"""
+import logging
+
+from django.db import connection
+from django.http import JsonResponse
+
+LOGGER = logging.getLogger(__name__)
+
+HEALTH_PATH = "/healthz"
+READY_PATH = "/readyz"
+
+
+def readiness() -> tuple:
+    """``(ok, checks)`` for ``/readyz``."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    except Exception as e:
+        LOGGER.warning("readiness check failed: %s", e)
+        return False, {"database": str(e)}
+    return True, {"database": "ok"}
+
+
+class HealthCheckMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path == HEALTH_PATH:
+            return JsonResponse({"status": "ok"})
+        if request.path == READY_PATH:
+            ok, checks = readiness()
+            return JsonResponse({"status": "ok" if ok else "unavailable", **checks}, status=200 if ok else 503)
+        return self.get_response(request)
@@ -46,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Answers the /healthz and /readyz probes before anything else runs
+    'inventro.health.HealthCheckMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -142,6 +144,18 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
+    # ujson for application/json, MessagePack for application/msgpack
+    "DEFAULT_RENDERER_CLASSES": [
+        "inventory.renderers.UJSONRenderer",
+        "inventory.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "inventory.renderers.UJSONParser",
+        "inventory.renderers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
@@ -153,19 +167,75 @@ WHITENOISE_USE_FINDERS = DEBUG
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",
+# Cache shared by every worker and pod (dashboard snapshot and fragments,
+# catalog version, count estimates). CACHE_URL=db keeps it in a table of the
+# main database (`manage.py createcachetable`); redis://... uses Redis (needs
+# the redis package); unset falls back to a per-process memory cache.
+CACHE_URL = os.getenv("CACHE_URL", "")
+if CACHE_URL == "db":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "inventro_cache",
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        }
     }
-}
+elif CACHE_URL.startswith(("redis://", "rediss://")):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Dashboard and analytics template fragments, keyed on the catalog version
+INVENTRO_FRAGMENT_CACHE_TTL = int(os.getenv("INVENTRO_FRAGMENT_CACHE_TTL", "300"))
+
+# Websocket channel layer. CHANNEL_LAYER=postgres delivers group_send across
+# workers and pods with LISTEN/NOTIFY on the main database
+# (inventro.channel_layer); unset keeps an in-process layer.
+CHANNEL_LAYER = os.getenv("CHANNEL_LAYER", "")
+if CHANNEL_LAYER == "postgres":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "inventro.channel_layer.PostgresChannelLayer",
+            "CONFIG": {
+                "capacity": int(os.getenv("CHANNEL_LAYER_CAPACITY", "100")),
+                # One channel per process carries every live item delta (dashboard.consumers.ItemDeltaHub)
+                "channel_capacity": {"items-hub.*": 10000},
+                "expiry": 60,
+                "group_expiry": 86400,
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+            "CONFIG": {"channel_capacity": {"items-hub.*": 10000}},
+        }
+    }
+
+# Live item deltas for the inventory table (inventory.live, ws/items/): at
+# most one frame per INVENTRO_LIVE_FRAME_MS per client, and up to
+# INVENTRO_LIVE_MAX_PENDING changed items waiting for a slow client
+INVENTRO_LIVE_ITEMS = os.getenv("INVENTRO_LIVE_ITEMS", "1") == "1"
+INVENTRO_LIVE_FRAME_MS = int(os.getenv("INVENTRO_LIVE_FRAME_MS", "250"))
+INVENTRO_LIVE_MAX_PENDING = int(os.getenv("INVENTRO_LIVE_MAX_PENDING", "500"))
 
 # Allow users to authenticate using either their username or email address.
 AUTHENTICATION_BACKENDS = [
     'authentication.backends.EmailOrUsernameModelBackend',
     'django.contrib.auth.backends.ModelBackend',
 ]
-# Emails (for future SMTP wiring)
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Emails (low-stock digests; EMAIL_BACKEND=django.core.mail.backends.locmem.EmailBackend for tests)
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
 EMAIL_HOST = os.getenv("EMAIL_HOST", "")
 EMAIL_PORT = int(os.getenv("EMAIL_PORT", "587"))
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
@@ -173,7 +243,14 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
 EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "1") in ("1", "true", "True")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "no-reply@inventro.local")
 
-# OpenSearch (placeholders; can be used by your indexing tasks)
+# Low-stock digests: recipients (comma-separated; default: superusers with an
+# email), how long alerts are collected before a digest goes out, and an
+# optional webhook that receives each digest
+ALERT_EMAILS = os.getenv("ALERT_EMAILS", "")
+INVENTRO_LOW_STOCK_DIGEST_WINDOW = int(os.getenv("INVENTRO_LOW_STOCK_DIGEST_WINDOW", "300"))
+NOTIFY_LOW_STOCK_WEBHOOK = os.getenv("NOTIFY_LOW_STOCK_WEBHOOK", "")
+
+# OpenSearch, fed from the inventory.SearchOutbox table by `manage.py sync_search`
 OPENSEARCH_URL = os.getenv("OPENSEARCH_URL", "")
 OPENSEARCH_USER = os.getenv("OPENSEARCH_USER", "")
 OPENSEARCH_PASSWORD = os.getenv("OPENSEARCH_PASSWORD", "")
@@ -3,8 +3,8 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from django.conf import settings
 
-from inventory.views import ItemCategoryViewSet, ItemViewSet, CartAPIView
-from dashboard.api_views import dashboard_stats, metrics, recent_activity
+from inventory.views import ItemCategoryViewSet, ItemViewSet, CartAPIView, api_search
+from dashboard.api_views import dashboard_bundle, dashboard_stats, metrics, recent_activity
 
 from django.urls import path
 # from inventro.dashboard.templates import views as dash_views
@@ -18,6 +18,8 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
     path('api/cart/', CartAPIView.as_view(), name='cart_api'),
+    path('api/search/', api_search, name='api_search'),
+    path('api/dashboard/', dashboard_bundle, name='dashboard_bundle'),
     path('api/stats/', dashboard_stats, name='dashboard_stats'),
     path('api/metrics/', metrics, name='metrics'),
     path('api/activity/', recent_activity, name='recent_activity'),
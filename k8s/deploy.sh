@@ -19,10 +19,13 @@ echo "Applying services, and postgres deployment..."
 kubectl apply -f services
 kubectl apply -f deployments/postgres-deployment.yaml
 
-echo "Applying HPA, backup, and claim..."
+echo "Applying HPA, CronJobs, and claim..."
 kubectl apply -f hpa.yaml
 kubectl apply -f claim.yaml
 kubectl apply -f cronjob-backup.yaml
+kubectl apply -f cronjob-release-reservations.yaml
+kubectl apply -f cronjob-snapshot-inventory.yaml
+kubectl apply -f cronjob-low-stock-digests.yaml
 
 
 kubectl apply -f https://raw.githubusercontent.com/kubernetes/ingress-nginx/controller-v1.14.1/deploy/static/provider/cloud/deploy.yaml
@@ -36,6 +39,13 @@ ip=$(kubectl -n ingress-nginx get svc ingress-nginx-controller -o jsonpath='{.st
 
 kubectl -n inventro create secret generic inventro-url-secret --from-literal=TRUSTED_ORIGIN="http://$ip" --from-literal=ALLOWED_HOST="$ip"
 
+echo "Running migrations..."
+kubectl -n inventro delete job inventro-migrate --ignore-not-found
+kubectl apply -f job-migrate.yaml
+kubectl wait --namespace inventro \
+  --for=condition=complete job/inventro-migrate \
+  --timeout=300s
+
 echo "Starting web deployments..."
 kubectl apply -f deployments/web-deployment.yaml
 
@@ -44,6 +54,16 @@ kubectl wait --namespace inventro \
   --selector=app=inventro-web \
   --timeout=120s
 
+kubectl apply -f deployments/websocket-deployment.yaml
+
+kubectl wait --namespace inventro \
+  --for=condition=ready pod \
+  --selector=app=inventro-websocket \
+  --timeout=120s
+
+echo "Starting workers..."
+kubectl apply -f deployments/search-sync-deployment.yaml
+
 kubectl apply -f ingress.yaml
 
 echo "Deployment complete. The external IP of the Ingress is $ip"
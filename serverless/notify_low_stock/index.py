@@ -7,14 +7,21 @@ TO_EMAILS = os.getenv("ALERT_EMAILS", "")  # "ops@example.com,owner@example.com"
 FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "no-reply@inventro.local")
 
 def main(args):
-    sku = args.get("sku")
-    name = args.get("name")
-    in_stock = args.get("in_stock")
-    if not (SENDGRID_API_KEY and TO_EMAILS and sku and name):
+    # A digest ({"items": [{"sku", "name", "in_stock"}, ...]}) or a single item
+    items = args.get("items") or [args]
+    items = [item for item in items if item.get("sku") and item.get("name")]
+    if not (SENDGRID_API_KEY and TO_EMAILS and items):
         return {"statusCode": 200, "body": {"ok": True, "skipped": True}}
 
-    subject = f"[Inventro] Low stock: {name} (SKU {sku})"
-    content = f"Item {name} (SKU {sku}) is low on stock. Remaining: {in_stock}"
+    if len(items) == 1:
+        item = items[0]
+        subject = f"[Inventro] Low stock: {item['name']} (SKU {item['sku']})"
+    else:
+        subject = f"[Inventro] Low stock: {len(items)} items"
+    content = "\n".join(
+        f"Item {item['name']} (SKU {item['sku']}) is low on stock. Remaining: {item.get('in_stock')}"
+        for item in items
+    )
 
     data = {
       "personalizations": [{"to": [{"email": e.strip()} for e in TO_EMAILS.split(",") if e.strip()]}],